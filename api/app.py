@@ -2,7 +2,6 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import sys
 import os
-import json
 import traceback
 from datetime import datetime
 
@@ -11,12 +10,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from ml_recipe_recommender import RecipeRecommender
-    import numpy as np
-    import pandas as pd
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.preprocessing import StandardScaler, LabelEncoder
-    from sklearn.ensemble import RandomForestRegressor
-    import pickle
+    from catalog import load_catalog, recipes_hash, CatalogError
+    from model_store import ModelArtifactError
+    from response_cache import ResponseCache, recommendation_cache_key
+    from filters import parse_filter_args, filter_signature
+    from recipe_listing import recipes_response, StaleCursorError
+    from fragments import splice, to_json
+    from request_log import RequestLogger, install as install_request_log
+    from instrumentation import REGISTRY, instrument, stage
+    from ingredient_matcher import normalize_ingredient
+    import debug_endpoints
+    from preload import share_index
 except ImportError as e:
     print(f"Import error: {e}")
     # Fallback for missing dependencies
@@ -25,41 +29,55 @@ except ImportError as e:
 app = Flask(__name__)
 CORS(app)
 
+# Latency histograms and counters at /metrics, per-stage Server-Timing headers (COOKWISE_METRICS=0 disables)
+instrument(app, 'app')
+
+# Opt-in sampled log of /recommend traffic for benchmarks/replay.py (COOKWISE_REQUEST_LOG)
+request_log = RequestLogger.from_env()
+install_request_log(app, request_log)
+
 # Global variables
 recommender = None
 recipes_data = None
+catalog_version = None
+common_ingredients = []
+# Arrays and bytes moved to shared memory for pre-forked workers (COOKWISE_PRELOAD=1)
+shared_index = None
+
+# Largest number of queries accepted by /recommend/batch
+MAX_BATCH_SIZE = 500
+
+# Largest page of /search results
+MAX_SEARCH_LIMIT = 50
+
+# Cache of /recommend results keyed on the canonical query; 0 disables it
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('COOKWISE_CACHE_SIZE', 1024)),
+    ttl_seconds=float(os.environ.get('COOKWISE_CACHE_TTL', 300))
+)
+
+# Cache of /facets results keyed on the filter signature
+facet_cache = ResponseCache(
+    max_entries=int(os.environ.get('COOKWISE_CACHE_SIZE', 1024)),
+    ttl_seconds=float(os.environ.get('COOKWISE_CACHE_TTL', 300))
+)
 
 def load_mock_data():
-    """Load mock recipe data"""
+    """Load recipe data from the compiled catalog artifact"""
+    global catalog_version, common_ingredients
     try:
-        # Import the actual mock data from your existing system
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        
         try:
-            from src.data.mockData import mockRecipes, enhancedReverseRecipes, leftoverRecipes
-            # Combine all recipe sources
-            all_recipes = []
-            
-            # Add mockRecipes
-            if mockRecipes:
-                all_recipes.extend(mockRecipes)
-            
-            # Add enhancedReverseRecipes
-            if enhancedReverseRecipes:
-                all_recipes.extend(enhancedReverseRecipes)
-            
-            # Add leftoverRecipes
-            if leftoverRecipes:
-                all_recipes.extend(leftoverRecipes)
-            
-            print(f"Loaded {len(all_recipes)} recipes from mock data")
+            # Compiled from src/data/mockData.ts by catalog.py; recompiled if stale
+            catalog = load_catalog()
+            catalog_version = catalog.version
+            common_ingredients = catalog.collections.get('commonIngredients', [])
+            all_recipes = catalog.recipes
+            print(f"Loaded {len(all_recipes)} recipes from catalog version {catalog.version}")
             return all_recipes
             
-        except ImportError:
-            # Fallback to basic recipes if import fails
-            print("Could not import mock data, using fallback recipes")
+        except (OSError, ValueError, CatalogError) as e:
+            # Fallback to basic recipes if the catalog cannot be loaded
+            print(f"Could not load recipe catalog ({e}), using fallback recipes")
             fallback_recipes = [
                 {
                     "id": "1",
@@ -167,6 +185,7 @@ def load_mock_data():
                     "rating": 4.3
                 }
             ]
+            catalog_version = 'fallback'
             return fallback_recipes
             
     except Exception as e:
@@ -179,6 +198,24 @@ def initialize_recommender():
     try:
         recommender = RecipeRecommender()
         recipes_data = load_mock_data()
+        
+        # Reuse a saved model artifact for this catalog if one is configured,
+        # otherwise fit once at startup (and save it for the next start).
+        # COOKWISE_SERVE_ONLY=1 never fits: the artifact comes from the offline
+        # build step (python model_store.py <path>) and sklearn/pandas stay unloaded
+        model_path = os.environ.get('COOKWISE_MODEL_PATH')
+        try:
+            if not model_path:
+                raise ModelArtifactError("COOKWISE_MODEL_PATH not set")
+            recommender.load_model(model_path, expected_catalog_hash=recipes_hash(recipes_data))
+            print(f"Loaded model artifact from {model_path}")
+        except ModelArtifactError as e:
+            if os.environ.get('COOKWISE_SERVE_ONLY') == '1':
+                raise
+            recommender.fit(recipes_data, common_ingredients=common_ingredients)
+            if model_path:
+                print(f"Model artifact not usable ({e}); refitted and saved to {model_path}")
+                recommender.save_model(model_path)
         print(f"Initialized recommender with {len(recipes_data)} recipes")
         return True
     except Exception as e:
@@ -186,6 +223,55 @@ def initialize_recommender():
         traceback.print_exc()
         return False
 
+def share_recommender_index():
+    """Build the index in full and move its arrays to shared memory before gunicorn forks the workers"""
+    global shared_index
+    if recommender is None or recommender.index is None:
+        return
+    try:
+        shared_index = share_index(recommender.index)
+        print(f"Shared {shared_index['arrays']} index arrays ({shared_index['bytes']} bytes) with forked workers")
+    except Exception as e:
+        print(f"Error sharing recommender index: {e}")
+        traceback.print_exc()
+
+def memory_components():
+    """Named objects measured by /debug/memory; lazily built index structures are None until first use"""
+    index = recommender.index if recommender is not None else None
+    if index is None:
+        return {"recipes_data": recipes_data, "response_cache": response_cache, "facet_cache": facet_cache}
+    vectorizer = index.tfidf_vectorizer
+    return {
+        "recipes_data": recipes_data,
+        "dataframe": index.df,
+        "recipe_embeddings": index.recipe_embeddings,
+        # recipe_features is assembled on demand from the embeddings and this block
+        "numeric_features": index.numeric_features,
+        "tfidf_vocabulary": {"vocabulary": vectorizer.vocabulary_, "idf": vectorizer.idf_},
+        "label_encoders": index.label_encoders,
+        "ingredient_index": index.ingredient_index,
+        "columns": index.columns,
+        "neighbors": index._neighbors,
+        "search_index": index._search_index,
+        "ingredient_vocabulary": index._ingredient_vocabulary,
+        "pantry": index._pantry,
+        "filters": index._filters,
+        "fragments": index._fragments,
+        "response_cache": response_cache,
+        "facet_cache": facet_cache
+    }
+
+def memory_lru_caches():
+    index = recommender.index if recommender is not None else None
+    caches = {"normalize_ingredient": normalize_ingredient}
+    if index is not None:
+        caches["ingredient_matches"] = index.ingredient_index.matcher._matches
+        caches["ingredient_token_rows"] = index.ingredient_index._token_rows
+    return caches
+
+# /debug/memory and /debug/profile, only with COOKWISE_DEBUG_ENDPOINTS=1
+debug_endpoints.install(app, memory_components, memory_lru_caches)
+
 @app.route('/')
 def home():
     """Health check endpoint"""
@@ -195,8 +281,17 @@ def home():
         "timestamp": datetime.now().isoformat(),
         "endpoints": {
             "/recommend": "POST - Get recipe recommendations",
+            "/recommend/batch": "POST - Get recommendations for a list of queries",
+            "/recommend/cook-now": "POST - Recipes cookable from a pantry with at most max_missing ingredients missing",
             "/health": "GET - Health check",
-            "/recipes": "GET - List all recipes"
+            "/cache/stats": "GET - Recommendation cache statistics",
+            "/metrics": "GET - Latency histograms and counters in Prometheus text format",
+            "/recipes": "GET - List recipes (cursor, limit, fields, format=ndjson; ETag/If-None-Match)",
+            "/recipes/<id>/similar": "GET - Recipes similar to a recipe",
+            "/facets": "GET - Recipe counts per cuisine, region, state, diet and meal type for a filter selection",
+            "/search": "GET - Full-text recipe search (q, limit, offset, prefix)",
+            "/search/complete": "GET - Typeahead completions for a partial word",
+            "/ingredients/suggest": "GET - Ingredient typeahead returning canonical ingredient ids"
         }
     })
 
@@ -207,19 +302,228 @@ def health():
         "status": "healthy",
         "recommender_initialized": recommender is not None,
         "recipes_loaded": len(recipes_data) if recipes_data else 0,
+        "catalog_version": catalog_version,
+        "cache": response_cache.stats(),
+        "request_log": request_log.stats() if request_log else None,
+        "shared_index": shared_index,
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/cache/stats')
+def cache_stats():
+    """Recommendation cache statistics"""
+    return jsonify({
+        "status": "success",
+        "cache": response_cache.stats(),
+        "facet_cache": facet_cache.stats()
+    })
+
+@app.route('/facets')
+def get_facets():
+    """Recipe counts per cuisine, region, state, diet, meal type, spice level and cooking time.
+    
+    Filters use the same keys as /recommend filters, as query parameters with
+    comma-separated lists (e.g. ?dietType=Veg&mealType=Lunch,Dinner).
+    """
+    try:
+        try:
+            filters = parse_filter_args(request.args)
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400
+        
+        if not recommender or recommender.index is None:
+            return jsonify({
+                "status": "error",
+                "message": "Recommender not initialized"
+            }), 500
+        
+        # Equivalent selections share one entry; a new index version clears the cache
+        signature = filter_signature(filters)
+        index = recommender.index
+        result = facet_cache.get(signature, index.version)
+        if result is None:
+            result = index.filters.facets(filters)
+            facet_cache.put(signature, result, index.version)
+        
+        response = jsonify({
+            "status": "success",
+            "filters": filters,
+            "signature": signature,
+            "total": result["total"],
+            "facets": result["facets"]
+        })
+        response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
+    except Exception as e:
+        print(f"Error computing facets: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 @app.route('/recipes')
 def get_recipes():
-    """Get all available recipes"""
+    """List recipes a page at a time (cursor, limit, fields, format=ndjson), with ETags"""
+    try:
+        # Serve the recommender's current snapshot so the ETag follows index updates
+        if recommender and recommender.index is not None:
+            index = recommender.index
+            recipes, version = index.recipes, index.version
+        else:
+            index = None
+            recipes, version = recipes_data or [], catalog_version or 'empty'
+        return recipes_response(request, recipes, version, index.fragments if index else None)
+    except StaleCursorError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 410
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/recipes/<recipe_id>/similar')
+def get_similar_recipes(recipe_id):
+    """Get recipes similar to one recipe from the precomputed neighbor table"""
+    try:
+        k = request.args.get('k', 10, type=int)
+        if k is None or k < 0:
+            return jsonify({
+                "status": "error",
+                "message": "'k' must be a non-negative integer"
+            }), 400
+        
+        if not recommender or recommender.index is None:
+            return jsonify({
+                "status": "error",
+                "message": "Recommender not initialized"
+            }), 500
+        
+        similar = recommender.similar(recipe_id, k)
+        return jsonify({
+            "status": "success",
+            "recipe_id": recipe_id,
+            "similar": similar,
+            "count": len(similar)
+        })
+    except KeyError:
+        return jsonify({
+            "status": "error",
+            "message": f"Recipe '{recipe_id}' not found"
+        }), 404
+    except Exception as e:
+        print(f"Error in similar recipes: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/search')
+def search_recipes():
+    """Full-text recipe search with typeahead on the last word"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', 20, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        prefix = request.args.get('prefix', 'true').lower() not in ('0', 'false', 'no')
+        
+        if not query:
+            return jsonify({
+                "status": "error",
+                "message": "Query parameter 'q' is required"
+            }), 400
+        if limit is None or not 1 <= limit <= MAX_SEARCH_LIMIT or offset is None or offset < 0:
+            return jsonify({
+                "status": "error",
+                "message": f"'limit' must be between 1 and {MAX_SEARCH_LIMIT} and 'offset' non-negative"
+            }), 400
+        
+        if not recommender or recommender.index is None:
+            return jsonify({
+                "status": "error",
+                "message": "Recommender not initialized"
+            }), 500
+        
+        results, total = recommender.search(query, limit=limit, offset=offset, prefix=prefix)
+        return jsonify({
+            "status": "success",
+            "query": query,
+            "results": results,
+            "count": len(results),
+            "total": total,
+            "offset": offset,
+            "limit": limit
+        })
+    except Exception as e:
+        print(f"Error in search: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/search/complete')
+def complete_search_terms():
+    """Typeahead completions for a partial search word"""
+    try:
+        prefix = request.args.get('q', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int) or 10, MAX_SEARCH_LIMIT))
+        
+        if not recommender or recommender.index is None:
+            return jsonify({
+                "status": "error",
+                "message": "Recommender not initialized"
+            }), 500
+        
+        completions = recommender.index.search_index.complete(prefix, limit)
+        return jsonify({
+            "status": "success",
+            "completions": completions,
+            "count": len(completions)
+        })
+    except Exception as e:
+        print(f"Error in search completion: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/ingredients/suggest')
+def suggest_ingredients():
+    """Ingredient typeahead: canonical ingredient ids ranked by how many recipes use them"""
     try:
+        query = request.args.get('q', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int) or 10, MAX_SEARCH_LIMIT))
+        
+        if not recommender or recommender.index is None:
+            return jsonify({
+                "status": "error",
+                "message": "Recommender not initialized"
+            }), 500
+        
+        suggestions = recommender.suggest_ingredients(query, limit)
         return jsonify({
             "status": "success",
-            "recipes": recipes_data,
-            "count": len(recipes_data)
+            "query": query,
+            "suggestions": suggestions,
+            "count": len(suggestions)
         })
     except Exception as e:
+        print(f"Error in ingredient suggestions: {e}")
+        traceback.print_exc()
         return jsonify({
             "status": "error",
             "message": str(e)
@@ -229,7 +533,7 @@ def get_recipes():
 def get_recommendations():
     """Get personalized recipe recommendations"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data:
             return jsonify({
@@ -237,40 +541,161 @@ def get_recommendations():
                 "message": "No data provided"
             }), 400
         
-        # Extract parameters
-        selected_ingredients = data.get('ingredients', [])
-        selected_leftovers = data.get('leftovers', [])
-        quiz_preferences = data.get('quiz_preferences', {})
-        user_location = data.get('user_location', {})
-        top_k = data.get('top_k', 10)
+        # Get recommendations
+        if recommender and recipes_data:
+            # Validated like a /recommend/batch query. ingredient_ids are canonical ids
+            # from /ingredients/suggest, matched exactly; filters are hard constraints
+            # (dietType, mealType, spiceLevel, region, state, cuisine, isHealthy,
+            # cookingTime, maxCookingTime) and only matching recipes are scored
+            try:
+                query = recommender._parse_query(data, 10)
+                filters = data.get('filters') or {}
+                if not isinstance(filters, dict):
+                    raise ValueError("'filters' must be an object")
+            except ValueError as e:
+                return jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 400
+            selected_ingredients = query['ingredients']
+            selected_leftovers = query['leftovers']
+            ingredient_ids = query['ingredient_ids']
+            quiz_preferences = query['quiz_preferences']
+            user_location = query['user_location']
+            top_k = query['top_k']
+            
+            # Equivalent queries share one cache entry; the index version
+            # invalidates every entry when the catalog is refitted or reloaded
+            cache_key = recommendation_cache_key(
+                selected_ingredients, selected_leftovers, quiz_preferences, user_location, top_k, ingredient_ids,
+                filters
+            )
+            version = recommender.index.version
+            # Cached as the serialized recommendations array and its length
+            cached = response_cache.get(cache_key, version)
+            REGISTRY.increment('cookwise_recommend_cache_total', result='miss' if cached is None else 'hit')
+            if cached is None:
+                try:
+                    cached = recommender.get_recommendations_json(
+                        selected_ingredients=selected_ingredients,
+                        selected_leftovers=selected_leftovers,
+                        quiz_preferences=quiz_preferences,
+                        user_location=user_location,
+                        top_k=top_k,
+                        ingredient_ids=ingredient_ids,
+                        filters=filters
+                    )
+                except ValueError as e:
+                    return jsonify({
+                        "status": "error",
+                        "message": str(e)
+                    }), 400
+                response_cache.put(cache_key, cached, version)
+            recommendations_json, count = cached
+            
+            # The recipes are spliced in as pre-serialized JSON, not re-encoded
+            with stage('serialize'):
+                body = splice(to_json({
+                    "status": "success",
+                    "count": count,
+                    "query": {
+                        "ingredients": selected_ingredients,
+                        "ingredient_ids": ingredient_ids,
+                        "leftovers": selected_leftovers,
+                        "quiz_preferences": quiz_preferences,
+                        "user_location": user_location,
+                        "filters": filters
+                    }
+                }), raw={"recommendations": recommendations_json})
+            return app.response_class(body, mimetype='application/json')
+        else:
+            return jsonify({
+                "status": "error",
+                "message": "Recommender not initialized"
+            }), 500
+            
+    except Exception as e:
+        print(f"Error in recommendations: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/recommend/batch', methods=['POST'])
+def get_batch_recommendations():
+    """Get recommendations for many queries in one request"""
+    try:
+        data = request.get_json(silent=True)
         
-        # Validate inputs
-        if not selected_ingredients and not selected_leftovers:
+        if not data or not isinstance(data.get('queries'), list):
             return jsonify({
                 "status": "error",
-                "message": "At least one ingredient or leftover must be selected"
+                "message": "Request must contain a 'queries' list"
+            }), 400
+        
+        queries = data['queries']
+        if len(queries) > MAX_BATCH_SIZE:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {MAX_BATCH_SIZE} queries per batch"
             }), 400
         
-        # Get recommendations
         if recommender and recipes_data:
-            recommendations = recommender.get_recommendations(
-                recipes_data=recipes_data,
-                selected_ingredients=selected_ingredients,
-                selected_leftovers=selected_leftovers,
-                quiz_preferences=quiz_preferences,
-                user_location=user_location,
-                top_k=top_k
-            )
+            results = recommender.get_batch_recommendations(queries, top_k=data.get('top_k', 10))
+            
+            return jsonify({
+                "status": "success",
+                "results": results,
+                "count": len(results),
+                "errors": sum(1 for result in results if result["status"] == "error")
+            })
+        else:
+            return jsonify({
+                "status": "error",
+                "message": "Recommender not initialized"
+            }), 500
+            
+    except Exception as e:
+        print(f"Error in batch recommendations: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@app.route('/recommend/cook-now', methods=['POST'])
+def get_cook_now_recommendations():
+    """Recipes that can be cooked from the given pantry, best coverage first"""
+    try:
+        data = request.get_json(silent=True)
+        
+        if not data:
+            return jsonify({
+                "status": "error",
+                "message": "No data provided"
+            }), 400
+        
+        if recommender and recipes_data:
+            try:
+                query = recommender._parse_cook_now_query(data)
+                recommendations = recommender.cook_now(
+                    query['pantry'], query['ingredient_ids'], max_missing=query['max_missing'], top_k=query['top_k']
+                )
+            except ValueError as e:
+                return jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 400
             
             return jsonify({
                 "status": "success",
                 "recommendations": recommendations,
                 "count": len(recommendations),
                 "query": {
-                    "ingredients": selected_ingredients,
-                    "leftovers": selected_leftovers,
-                    "quiz_preferences": quiz_preferences,
-                    "user_location": user_location
+                    "pantry": query['pantry'],
+                    "ingredient_ids": query['ingredient_ids'],
+                    "max_missing": query['max_missing']
                 }
             })
         else:
@@ -280,7 +705,7 @@ def get_recommendations():
             }), 500
             
     except Exception as e:
-        print(f"Error in recommendations: {e}")
+        print(f"Error in cook-now recommendations: {e}")
         traceback.print_exc()
         return jsonify({
             "status": "error",
@@ -311,7 +736,6 @@ def test_recommendations():
         # Get recommendations
         if recommender and recipes_data:
             recommendations = recommender.get_recommendations(
-                recipes_data=recipes_data,
                 selected_ingredients=test_data["ingredients"],
                 selected_leftovers=test_data["leftovers"],
                 quiz_preferences=test_data["quiz_preferences"],
@@ -352,4 +776,7 @@ if __name__ == '__main__':
 else:
     # For Vercel deployment
     print("Initializing for Vercel deployment...")
-    initialize_recommender() 
\ No newline at end of file
+    initialize_recommender()
+    # Set by gunicorn.conf.py: this import runs once in the gunicorn master
+    if os.environ.get('COOKWISE_PRELOAD') == '1':
+        share_recommender_index() 
\ No newline at end of file
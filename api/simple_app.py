@@ -1,11 +1,33 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import json
+import sys
+import os
+import heapq
 import random
 
+# Add the parent directory to the path to import the shared ingredient matcher
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import recipes_hash
+from ingredient_matcher import IngredientMatcher
+from fragments import RecipeFragments, splice, to_json
+from recipe_listing import recipes_response, StaleCursorError
+from request_log import RequestLogger, install as install_request_log
+from instrumentation import instrument, stage
+import debug_endpoints
+
 app = Flask(__name__)
 CORS(app)
 
+# Latency histograms and counters at /metrics, per-stage Server-Timing headers (COOKWISE_METRICS=0 disables)
+instrument(app, 'simple_app')
+
+# Opt-in sampled log of /recommend traffic for benchmarks/replay.py (COOKWISE_REQUEST_LOG)
+install_request_log(app, RequestLogger.from_env())
+
+# scoring.MAX_TOP_K; scoring imports numpy, which this app keeps out of its cold start
+MAX_TOP_K = 100
+
 # Simple recipe database
 RECIPES_DATABASE = [
     {
@@ -138,19 +160,34 @@ RECIPES_DATABASE = [
     }
 ]
 
+# Content hash of the recipe database, used for /recipes cursors and ETags
+CATALOG_VERSION = recipes_hash(RECIPES_DATABASE)
+
+# Every recipe serialized once; responses splice these instead of re-encoding
+RECIPE_FRAGMENTS = RecipeFragments(RECIPES_DATABASE)
+
+# Whole-word matcher over every recipe ingredient, compiled once at startup
+INGREDIENT_MATCHER = IngredientMatcher(
+    ingredient for recipe in RECIPES_DATABASE for ingredient in recipe.get('ingredients', [])
+)
+
+# /debug/memory and /debug/profile, only with COOKWISE_DEBUG_ENDPOINTS=1
+debug_endpoints.install(
+    app,
+    lambda: {"recipes": RECIPES_DATABASE, "fragments": RECIPE_FRAGMENTS, "ingredient_matcher": INGREDIENT_MATCHER},
+    lambda: {"ingredient_matches": INGREDIENT_MATCHER._matches}
+)
+
 def calculate_match_score(recipe, ingredients, leftovers, quiz_preferences, user_location):
     """Calculate match score for a recipe"""
     score = 0
     
     # Ingredient matching
-    recipe_ingredients = [ing.lower() for ing in recipe.get('ingredients', [])]
-    selected_items = [item.lower() for item in ingredients + leftovers]
+    recipe_ingredients = recipe.get('ingredients', [])
     
-    for item in selected_items:
-        for recipe_ing in recipe_ingredients:
-            if item in recipe_ing or recipe_ing in item:
-                score += 2
-                break
+    for item in ingredients + leftovers:
+        if INGREDIENT_MATCHER.match_any(item, recipe_ingredients):
+            score += 2
     
     # Quiz preferences matching
     if quiz_preferences:
@@ -177,7 +214,7 @@ def home():
     return jsonify({
         "message": "CookWise Simple ML API",
         "status": "running",
-        "endpoints": ["/health", "/recipes", "/recommend"]
+        "endpoints": ["/health", "/recipes", "/recommend", "/metrics"]
     })
 
 @app.route('/health')
@@ -190,11 +227,18 @@ def health():
 
 @app.route('/recipes')
 def get_recipes():
-    return jsonify({
-        "status": "success",
-        "recipes": RECIPES_DATABASE,
-        "count": len(RECIPES_DATABASE)
-    })
+    try:
+        return recipes_response(request, RECIPES_DATABASE, CATALOG_VERSION, RECIPE_FRAGMENTS)
+    except StaleCursorError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 410
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
 
 @app.route('/recommend', methods=['POST'])
 def get_recommendations():
@@ -205,49 +249,55 @@ def get_recommendations():
         leftovers = data.get('leftovers', [])
         quiz_preferences = data.get('quiz_preferences', {})
         user_location = data.get('user_location', {})
-        top_k = data.get('top_k', 10)
+        top_k = max(0, min(int(data.get('top_k', 10)), MAX_TOP_K))
         
-        # Calculate scores for all recipes
-        scored_recipes = []
-        for recipe in RECIPES_DATABASE:
-            score = calculate_match_score(recipe, ingredients, leftovers, quiz_preferences, user_location)
-            if score > 0:  # Only include recipes with some match
-                scored_recipes.append({
-                    **recipe,
-                    "matchScore": score,
-                    "matchPercentage": min(score * 20, 100),  # Convert score to percentage
-                    "quizMatch": score > 2,
-                    "locationMatch": user_location.get('region') == recipe.get('region'),
-                    "leftoverCompatibility": len([item for item in leftovers if any(item.lower() in ing.lower() for ing in recipe.get('ingredients', []))])
-                })
+        # Score all recipes, keeping only (score, position) pairs with some match
+        scores = []
+        with stage('score'):
+            for position, recipe in enumerate(RECIPES_DATABASE):
+                score = calculate_match_score(recipe, ingredients, leftovers, quiz_preferences, user_location)
+                if score > 0:  # Only include recipes with some match
+                    scores.append((score, position))
         
-        # Sort by score and take top_k
-        scored_recipes.sort(key=lambda x: x['matchScore'], reverse=True)
-        recommendations = scored_recipes[:top_k]
+        # Bounded top_k selection; nlargest keeps the order of a stable descending sort
+        with stage('select'):
+            winners = heapq.nlargest(top_k, scores, key=lambda item: item[0])
+        
+        # Only the match fields of the winners are built; recipes are pre-serialized
+        recommendations = []
+        for score, position in winners:
+            recipe = RECIPES_DATABASE[position]
+            recommendations.append((position, {
+                "matchScore": score,
+                "matchPercentage": min(score * 20, 100),  # Convert score to percentage
+                "quizMatch": score > 2,
+                "locationMatch": user_location.get('region') == recipe.get('region'),
+                "leftoverCompatibility": len([item for item in leftovers if INGREDIENT_MATCHER.match_any(item, recipe.get('ingredients', []))])
+            }))
         
         # If no matches, return random recipes
         if not recommendations:
-            recommendations = random.sample(RECIPES_DATABASE, min(top_k, len(RECIPES_DATABASE)))
-            for recipe in recommendations:
-                recipe.update({
-                    "matchScore": 1,
-                    "matchPercentage": 20,
-                    "quizMatch": False,
-                    "locationMatch": False,
-                    "leftoverCompatibility": 0
-                })
+            positions = random.sample(range(len(RECIPES_DATABASE)), min(top_k, len(RECIPES_DATABASE)))
+            recommendations = [(position, {
+                "matchScore": 1,
+                "matchPercentage": 20,
+                "quizMatch": False,
+                "locationMatch": False,
+                "leftoverCompatibility": 0
+            }) for position in positions]
         
-        return jsonify({
-            "status": "success",
-            "recommendations": recommendations,
-            "count": len(recommendations),
-            "query": {
-                "ingredients": ingredients,
-                "leftovers": leftovers,
-                "quiz_preferences": quiz_preferences,
-                "user_location": user_location
-            }
-        })
+        with stage('serialize'):
+            body = splice(to_json({
+                "status": "success",
+                "count": len(recommendations),
+                "query": {
+                    "ingredients": ingredients,
+                    "leftovers": leftovers,
+                    "quiz_preferences": quiz_preferences,
+                    "user_location": user_location
+                }
+            }), raw={"recommendations": RECIPE_FRAGMENTS.array(recommendations)})
+        return app.response_class(body, mimetype='application/json')
         
     except Exception as e:
         return jsonify({
@@ -0,0 +1,271 @@
+"""Benchmarks of the recommendation hot path on synthetic catalogs.
+
+For every catalog size, each stage reports its wall time and the peak memory
+it allocated (traced with tracemalloc, which counts numpy buffers too):
+
+    generate        build the synthetic catalog (time only)
+    fit             RecipeRecommender.fit: TF-IDF, encoders, numeric block
+    warmup          first query, which builds the lazy ingredient index and
+                    pre-serialized recipe JSON
+    recommend       RecipeRecommender.get_recommendations per query
+    recommend_json  RecipeRecommender.get_recommendations_json (the /recommend body)
+    match_score     api/simple_app.py's /recommend loop: calculate_match_score
+                    on every recipe, then top-k
+
+Query stages report latency percentiles and throughput instead of a wall
+time. Those timings run untraced; the peak comes from one extra traced query.
+pandas and scikit-learn are imported up front so fit is not charged for them.
+
+Usage:
+    python benchmarks/bench_recommend.py                       # 1k, 10k, 100k and 1M recipes
+    python benchmarks/bench_recommend.py --sizes 1000,10000 --output before.json
+    python benchmarks/bench_recommend.py --sizes 1000 --compare before.json   # exit 1 on regression
+"""
+import argparse
+import gc
+import heapq
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'api'))
+
+import numpy as np
+import pandas  # noqa: F401
+import sklearn.feature_extraction.text  # noqa: F401
+import sklearn.preprocessing  # noqa: F401
+
+from ingredient_matcher import IngredientMatcher
+from ml_recipe_recommender import RecipeRecommender
+from synthetic_catalog import CatalogProfile, generate
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Metrics compared by --compare; lower is better for all of them
+COMPARED_METRICS = ('seconds', 'p50_ms', 'p95_ms', 'peak_bytes')
+
+
+def make_queries(profile: CatalogProfile, count: int, seed: int = 1) -> List[Dict]:
+    """Quiz-style queries: a few popular ingredients, maybe a leftover, preferences and a location"""
+    rng = np.random.default_rng(seed)
+    names, cum_weights = profile.ingredients
+    probabilities = np.diff(cum_weights, prepend=0) / cum_weights[-1]
+    locations = [location for location in profile.locations[0] if location[0]]
+    queries = []
+    for _ in range(count):
+        picked = rng.choice(len(names), size=int(rng.integers(2, 5)), replace=False, p=probabilities)
+        ingredients = [names[i].split(',')[0].lower() for i in picked]
+        state, region, cuisine = locations[int(rng.integers(len(locations)))]
+        queries.append({
+            'selected_ingredients': ingredients[1:],
+            'selected_leftovers': ingredients[:1] if rng.random() < 0.3 else [],
+            'quiz_preferences': {
+                'diet': str(rng.choice(['Vegetarian', 'Non-Vegetarian', 'Vegan'])),
+                'spiceLevel': str(rng.choice(['Mild', 'Medium', 'Spicy'])),
+                'cookingTime': str(rng.choice(['Quick', 'Medium', 'Long'])),
+                'cuisine': region.lower()
+            },
+            'user_location': {'state': state, 'region': region}
+        })
+    return queries
+
+
+def simple_app_recommend(recipes: List[Dict], query: Dict, top_k: int = 10) -> List[Tuple[int, int]]:
+    """The scoring loop of api/simple_app.py's /recommend for one query"""
+    import simple_app
+
+    ingredients = query['selected_ingredients']
+    leftovers = query['selected_leftovers']
+    quiz_preferences = {
+        'spiceLevel': query['quiz_preferences']['spiceLevel'].lower(),
+        'cuisine': query['quiz_preferences']['cuisine'],
+        'dietType': 'Veg' if query['quiz_preferences']['diet'] == 'Vegetarian' else 'Non-Veg'
+    }
+    scores = []
+    for position, recipe in enumerate(recipes):
+        score = simple_app.calculate_match_score(recipe, ingredients, leftovers, quiz_preferences, query['user_location'])
+        if score > 0:
+            scores.append((score, position))
+    return heapq.nlargest(top_k, scores, key=lambda item: item[0])
+
+
+def traced(fn: Callable[[], Any], memory: bool = True) -> Tuple[Dict[str, Any], Any]:
+    """Run ``fn`` once; its wall time and, with ``memory``, the peak bytes it allocated"""
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        seconds = time.perf_counter() - start
+        stats = {'seconds': seconds}
+        if memory:
+            stats['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return stats, result
+
+
+def latency(fn: Callable[[Dict], Any], queries: List[Dict], max_seconds: float, memory: bool = True) -> Dict[str, Any]:
+    """Latency percentiles and throughput of ``fn`` over ``queries``, cycling them until ``max_seconds`` (at least 3 runs)"""
+    timings = []
+    deadline = time.perf_counter() + max_seconds
+    while len(timings) < 3 or (time.perf_counter() < deadline and len(timings) < 10 * len(queries)):
+        query = queries[len(timings) % len(queries)]
+        start = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    stats = {
+        'runs': len(timings),
+        'mean_ms': float(timings.mean()),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'throughput_qps': float(len(timings) / (timings.sum() / 1000))
+    }
+    if memory:
+        stats['peak_bytes'] = traced(lambda: fn(queries[0]))[0]['peak_bytes']
+    return stats
+
+
+def run_size(
+    n: int,
+    profile: CatalogProfile,
+    queries: List[Dict],
+    seed: int = 0,
+    max_seconds: float = 5.0,
+    memory: bool = True,
+    skip: Tuple[str, ...] = ()
+) -> Dict[str, Dict[str, Any]]:
+    """Every stage on an ``n``-recipe synthetic catalog"""
+    import simple_app
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    # Setup rather than hot path, and ten times slower traced: timed only
+    stages['generate'], recipes = traced(lambda: list(generate(n, seed=seed, profile=profile)), memory=False)
+    recommender = RecipeRecommender()
+    stages['fit'], _ = traced(lambda: recommender.fit(recipes), memory)
+    stages['warmup'], _ = traced(lambda: recommender.get_recommendations_json(**queries[0]), memory)
+    stages['recommend'] = latency(lambda query: recommender.get_recommendations(**query), queries, max_seconds, memory)
+    stages['recommend_json'] = latency(
+        lambda query: recommender.get_recommendations_json(**query), queries, max_seconds, memory
+    )
+    del recommender
+    if 'match_score' not in skip:
+        # As simple_app builds its matcher at startup, over this catalog's ingredients instead of its own
+        original = simple_app.INGREDIENT_MATCHER
+        simple_app.INGREDIENT_MATCHER = IngredientMatcher(
+            ingredient for recipe in recipes for ingredient in recipe.get('ingredients', [])
+        )
+        try:
+            stages['match_score'] = latency(
+                lambda query: simple_app_recommend(recipes, query), queries, max_seconds, memory
+            )
+        finally:
+            simple_app.INGREDIENT_MATCHER = original
+    return stages
+
+
+def environment() -> Dict[str, Any]:
+    """What a result was measured on, so runs on different commits or machines are told apart"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions of ``current`` against ``baseline``: metrics more than ``tolerance`` (a fraction) worse"""
+    regressions = []
+    for size, stages in current['results'].items():
+        for stage, stats in stages.items():
+            before = baseline.get('results', {}).get(size, {}).get(stage)
+            if not before:
+                continue
+            for metric in COMPARED_METRICS:
+                if metric in stats and before.get(metric):
+                    change = stats[metric] / before[metric] - 1
+                    if change > tolerance:
+                        regressions.append(
+                            f"{size} recipes, {stage}.{metric}: {before[metric]:.4g} -> {stats[metric]:.4g} (+{change:.0%})"
+                        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='comma-separated catalog sizes')
+    parser.add_argument('--queries', type=int, default=50, help='distinct queries per size')
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='time spent per query stage and size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc peak memory measurement')
+    parser.add_argument('--skip-match-score', action='store_true', help="skip simple_app's pure-Python loop")
+    parser.add_argument('--output', help='JSON results file (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='baseline JSON results to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown/growth before a regression')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    profile = CatalogProfile.from_catalog()
+    queries = make_queries(profile, args.queries, seed=args.seed + 1)
+    document = {'environment': environment(), 'settings': vars(args), 'results': {}}
+
+    for size in sizes:
+        print(f"Benchmarking {size} recipes...", flush=True)
+        stages = run_size(
+            size, profile, queries, seed=args.seed, max_seconds=args.max_seconds, memory=not args.no_memory,
+            skip=('match_score',) if args.skip_match_score else ()
+        )
+        document['results'][str(size)] = stages
+        for stage, stats in stages.items():
+            if 'p50_ms' in stats:
+                line = f"  {stage:<15} p50 {stats['p50_ms']:9.2f}ms  p95 {stats['p95_ms']:9.2f}ms  {stats['throughput_qps']:9.1f} q/s"
+            else:
+                line = f"  {stage:<15} {stats['seconds']:9.3f}s"
+            if 'peak_bytes' in stats:
+                line += f"  peak {stats['peak_bytes'] / 2 ** 20:9.1f} MiB"
+            print(line)
+        gc.collect()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{document['environment']['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(document, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
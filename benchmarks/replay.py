@@ -0,0 +1,198 @@
+"""Replay recorded requests (see request_log.py) against an app as a load test.
+
+Requests are sent through the Flask test client of an app loaded in this
+process, so no network is involved, or over HTTP to ``--url``. ``--rate``
+sends requests on an open-loop schedule of that many per second (evenly
+spaced, or ``--poisson`` arrivals) and measures latency from each request's
+scheduled time, so queueing behind a slow app counts. Without a rate, the
+``--concurrency`` workers send back to back.
+
+Usage:
+    python benchmarks/replay.py logs/requests.jsonl --app api/app.py --concurrency 8
+    python benchmarks/replay.py logs/requests.jsonl* --app api/simple_app.py --rate 200 --limit 5000
+    python benchmarks/replay.py logs/requests.jsonl --url http://localhost:5000 --rate 50 --output replay.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Optional
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sends one recorded request and returns the HTTP status
+Sender = Callable[[Dict[str, Any]], int]
+
+
+def load_entries(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Recorded requests from JSON-lines files, oldest first; malformed lines are skipped"""
+    entries = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and entry.get('path'):
+                    entries.append(entry)
+    entries.sort(key=lambda entry: entry.get('ts', 0))
+    return entries
+
+
+def _target(entry: Dict[str, Any]) -> str:
+    return entry['path'] + (f"?{entry['query']}" if entry.get('query') else '')
+
+
+def app_sender(app) -> Sender:
+    """Sender through ``app``'s test client, one client per worker thread"""
+    local = threading.local()
+
+    def send(entry: Dict[str, Any]) -> int:
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        return client.open(_target(entry), method=entry.get('method', 'GET'), json=entry.get('body')).status_code
+
+    return send
+
+
+def url_sender(base_url: str, timeout: float = 30.0) -> Sender:
+    """Sender over HTTP to a running app at ``base_url``"""
+    def send(entry: Dict[str, Any]) -> int:
+        body = entry.get('body')
+        http_request = urllib.request.Request(
+            base_url.rstrip('/') + _target(entry),
+            data=json.dumps(body).encode('utf-8') if body is not None else None,
+            headers={'Content-Type': 'application/json'},
+            method=entry.get('method', 'GET')
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    return send
+
+
+def load_app(path: str):
+    """The Flask ``app`` of a module file such as api/app.py, imported (and initialized) here"""
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def replay(
+    entries: List[Dict[str, Any]],
+    send: Sender,
+    concurrency: int = 4,
+    rate: float = None,
+    poisson: bool = False,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Send every entry and summarize latency, errors and throughput.
+
+    A request errs when sending raises or it answers with a 5xx status; 4xx
+    answers are counted by status but replayed client mistakes are not app errors.
+    """
+    latencies = np.zeros(len(entries))
+    statuses: List[Optional[int]] = [None] * len(entries)
+    scheduled = np.zeros(len(entries))
+    if rate:
+        gaps = np.random.default_rng(seed).exponential(1 / rate, len(entries)) if poisson else \
+            np.full(len(entries), 1 / rate)
+        scheduled = np.concatenate([[0.0], np.cumsum(gaps)[:-1]])
+
+    def run(i: int):
+        start = origin + scheduled[i] if rate else time.perf_counter()
+        try:
+            statuses[i] = send(entries[i])
+        except Exception:
+            statuses[i] = None
+        latencies[i] = time.perf_counter() - start
+
+    origin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(len(entries)):
+            if rate:
+                delay = origin + scheduled[i] - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, i)
+    elapsed = time.perf_counter() - origin
+
+    errors = sum(1 for status in statuses if status is None or status >= 500)
+    by_status: Dict[str, int] = {}
+    for status in statuses:
+        key = str(status) if status is not None else 'exception'
+        by_status[key] = by_status.get(key, 0) + 1
+    milliseconds = latencies * 1000
+    report = {
+        'requests': len(entries),
+        'errors': errors,
+        'error_rate': errors / len(entries) if entries else 0.0,
+        'duration_s': elapsed,
+        'throughput_rps': len(entries) / elapsed if elapsed > 0 else 0.0,
+        'by_status': by_status,
+        'concurrency': concurrency,
+        'rate': rate
+    }
+    if len(entries):
+        report.update({
+            'p50_ms': float(np.percentile(milliseconds, 50)),
+            'p95_ms': float(np.percentile(milliseconds, 95)),
+            'p99_ms': float(np.percentile(milliseconds, 99)),
+            'max_ms': float(milliseconds.max())
+        })
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('logs', nargs='+', help='request log files (rotated files too)')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--app', default=os.path.join(ROOT_DIR, 'api', 'app.py'),
+                        help='Flask app module to load in-process (default api/app.py)')
+    target.add_argument('--url', help='base URL of a running app instead of an in-process one')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, help='requests per second (open loop); default as fast as possible')
+    parser.add_argument('--poisson', action='store_true', help='exponential inter-arrival times at --rate')
+    parser.add_argument('--limit', type=int, help='replay at most this many requests (cycling the log)')
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args(argv)
+
+    entries = load_entries(args.logs)
+    if not entries:
+        print("No requests to replay")
+        return 1
+    if args.limit:
+        entries = [entries[i % len(entries)] for i in range(args.limit)]
+
+    send = url_sender(args.url) if args.url else app_sender(load_app(args.app))
+    report = replay(entries, send, concurrency=args.concurrency, rate=args.rate, poisson=args.poisson)
+
+    print(f"{report['requests']} requests in {report['duration_s']:.2f}s: {report['throughput_rps']:.1f} req/s, "
+          f"errors {report['error_rate']:.2%}")
+    if report['requests']:
+        print(f"latency p50 {report['p50_ms']:.2f}ms  p95 {report['p95_ms']:.2f}ms  p99 {report['p99_ms']:.2f}ms  "
+              f"max {report['max_ms']:.2f}ms")
+    print(f"by status: {report['by_status']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Synthetic recipe catalogs of any size, shaped like the real one.
+
+Recipes have the fields of the ``Recipe`` interface (src/data/mockData.ts).
+Categorical fields follow their frequencies in the compiled catalog, so
+states, regions and diets are as skewed as in production; state, region and
+cuisine are drawn together, and state is missing as often as in the catalog. Ingredient lines
+reuse the catalog's ingredient names, drawn by popularity, under a random
+quantity; like real data, the number of distinct lines keeps growing with
+the catalog.
+"""
+import os
+import random
+import re
+import sys
+from collections import Counter
+from itertools import accumulate
+from typing import List, Dict, Any, Iterator, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import load_catalog
+
+# Leading quantity of an ingredient line, e.g. "1 kg", "2 cups", "1/2 tsp", "750g"
+_QUANTITY = re.compile(r'^[\d/.\-½¼¾ ]+\s*(?:kg|g|gm|ml|l|cups?|tbsp|tsp|inch|pinch|cloves?|nos?|pieces?)?\b\s*', re.I)
+
+# Quantities put in front of sampled ingredient names, by unit
+QUANTITIES = {
+    'g': [50, 100, 250, 500],
+    'kg': [1, 2],
+    'ml': [100, 200, 500],
+    'cup': [1, 2, 3],
+    'tbsp': [1, 2, 3, 4],
+    'tsp': [1, 2],
+    'pieces': [2, 4, 6]
+}
+
+# Sampled together, so a recipe's region and cuisine fit its state
+LOCATION_FIELDS = ('state', 'region', 'cuisine')
+CATEGORICAL_FIELDS = ['spiceLevel', 'effort', 'mealType', 'difficulty']
+FLAG_FIELDS = ['isFestive', 'isHealthy', 'isStreetFood', 'isOfflineAvailable']
+
+
+class CatalogProfile:
+    """Empirical distributions of a recipe catalog, sampled by ``generate``"""
+
+    def __init__(self, recipes: Sequence[Dict]):
+        self.categorical = {
+            field: _weights(Counter(recipe.get(field) for recipe in recipes if recipe.get(field)))
+            for field in CATEGORICAL_FIELDS
+        }
+        self.locations = _weights(Counter(tuple(recipe.get(field) for field in LOCATION_FIELDS) for recipe in recipes))
+        self.diets = _weights(Counter(tuple(recipe.get('dietType') or []) for recipe in recipes))
+        self.ingredients = _weights(Counter(
+            ingredient_name(line) for recipe in recipes for line in recipe.get('ingredients', [])
+        ))
+        self.ingredient_counts = _weights(Counter(len(recipe.get('ingredients', [])) for recipe in recipes))
+        self.tags = _weights(Counter(tag for recipe in recipes for tag in recipe.get('tags', [])))
+        self.flags = {
+            field: sum(1 for recipe in recipes if recipe.get(field)) / max(len(recipes), 1) for field in FLAG_FIELDS
+        }
+        self.cooking_times = [recipe.get('cookingTime', 30) for recipe in recipes]
+        self.calories = [recipe.get('calories', 300) for recipe in recipes]
+        self.title_words = sorted({word for recipe in recipes for word in recipe.get('title', '').split()})
+
+    @classmethod
+    def from_catalog(cls) -> 'CatalogProfile':
+        return cls(load_catalog().recipes)
+
+
+def ingredient_name(line: str) -> str:
+    """Ingredient line without its leading quantity: "1 kg Basmati rice" -> "Basmati rice" """
+    return _QUANTITY.sub('', line).strip() or line.strip()
+
+
+def _weights(counter: Counter) -> Tuple[List[Any], List[int]]:
+    """Values, most frequent first, with their cumulative counts"""
+    values = sorted(counter, key=lambda value: (-counter[value], str(value)))
+    return values, list(accumulate(counter[value] for value in values))
+
+
+def _pick(rng: random.Random, weighted: Tuple[List[Any], List[int]], k: int = 1) -> List[Any]:
+    values, cum_weights = weighted
+    return rng.choices(values, cum_weights=cum_weights, k=k)
+
+
+def generate(n: int, seed: int = 0, profile: CatalogProfile = None) -> Iterator[Dict]:
+    """``n`` synthetic recipes with ids "syn-0" ... "syn-<n-1>", deterministic for a seed"""
+    profile = profile or CatalogProfile.from_catalog()
+    rng = random.Random(seed)
+    for i in range(n):
+        recipe: Dict[str, Any] = {'id': f'syn-{i}'}
+        for field, value in zip(LOCATION_FIELDS, _pick(rng, profile.locations)[0]):
+            if value is not None:
+                recipe[field] = value
+        for field, weighted in profile.categorical.items():
+            recipe[field] = _pick(rng, weighted)[0]
+
+        ingredients = []
+        for name in dict.fromkeys(_pick(rng, profile.ingredients, _pick(rng, profile.ingredient_counts)[0])):
+            if rng.random() < 0.6:
+                unit = rng.choice(list(QUANTITIES))
+                name = f'{rng.choice(QUANTITIES[unit])} {unit} {name}'
+            ingredients.append(name)
+
+        recipe.update(
+            title=' '.join(rng.sample(profile.title_words, k=min(3, len(profile.title_words)))),
+            image=f'/images/syn-{i}.jpg',
+            cookingTime=rng.choice(profile.cooking_times),
+            prepTime=rng.choice([5, 10, 15, 20, 30]),
+            dietType=list(_pick(rng, profile.diets)[0]),
+            ingredients=ingredients,
+            steps=[f'Step {step + 1}' for step in range(rng.randint(3, 8))],
+            calories=rng.choice(profile.calories),
+            macros={'protein': rng.randint(2, 40), 'carbs': rng.randint(5, 90), 'fat': rng.randint(1, 35)},
+            culturalFact='',
+            substitutions={},
+            tags=list(dict.fromkeys(_pick(rng, profile.tags, rng.randint(1, 4)))),
+            servings=rng.randint(1, 8),
+            **{field: rng.random() < share for field, share in profile.flags.items()}
+        )
+        yield recipe
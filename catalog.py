@@ -0,0 +1,374 @@
+"""Catalog compiler: turns src/data/mockData.ts into a fast-loading catalog artifact.
+
+The API cannot import TypeScript, so the recipe data is compiled ahead of time
+into ``api/catalog.json``: a versioned, columnar JSON document where every
+string is stored once in a string table. The artifact records the SHA-256 of the
+source file so a stale artifact is detected (and recompiled) at load time.
+
+Usage:
+    python catalog.py            # rebuild api/catalog.json from mockData.ts
+    python catalog.py --check    # exit 1 if the artifact is stale
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import List, Dict, Any, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(ROOT_DIR, 'src', 'data', 'mockData.ts')
+CATALOG_PATH = os.path.join(ROOT_DIR, 'api', 'catalog.json')
+
+CATALOG_FORMAT = 'cookwise-catalog'
+SCHEMA_VERSION = 1
+
+# Exports compiled into the artifact; all of them are plain literals in mockData.ts
+COLLECTIONS = [
+    'mockRecipes',
+    'leftoverRecipes',
+    'commonIngredients',
+    'indianStates',
+    'mockCategories',
+    'regionalCategories'
+]
+
+# Collections served as recipes by the API, in order
+RECIPE_COLLECTIONS = ['mockRecipes', 'leftoverRecipes']
+
+
+class CatalogError(Exception):
+    """Raised when mockData.ts or a catalog artifact cannot be parsed"""
+
+
+class TSLiteralParser:
+    """Minimal parser for the TypeScript object/array literals used in mockData.ts.
+
+    Supports strings (single, double and backtick quotes without interpolation),
+    numbers, booleans, null/undefined, unquoted or quoted keys, comments and
+    trailing commas. Anything else (function calls, references to other exports)
+    raises ``CatalogError``.
+    """
+
+    _NUMBER = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+    _IDENTIFIER = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*')
+    _ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+    _KEYWORDS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+    def __init__(self, text: str, pos: int = 0):
+        self.text = text
+        self.pos = pos
+
+    def parse_value(self) -> Any:
+        self._skip()
+        char = self._peek()
+        if char == '[':
+            return self._parse_array()
+        if char == '{':
+            return self._parse_object()
+        if char in ('"', "'", '`'):
+            return self._parse_string()
+        match = self._NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            literal = match.group(0)
+            return float(literal) if any(c in literal for c in '.eE') else int(literal)
+        match = self._IDENTIFIER.match(self.text, self.pos)
+        if match and match.group(0) in self._KEYWORDS:
+            self.pos = match.end()
+            return self._KEYWORDS[match.group(0)]
+        raise self._error('unsupported expression')
+
+    def _parse_array(self) -> List[Any]:
+        self.pos += 1
+        items = []
+        while True:
+            self._skip()
+            if self._peek() == ']':
+                self.pos += 1
+                return items
+            items.append(self.parse_value())
+            self._skip()
+            if self._peek() == ',':
+                self.pos += 1
+            elif self._peek() != ']':
+                raise self._error("expected ',' or ']'")
+
+    def _parse_object(self) -> Dict[str, Any]:
+        self.pos += 1
+        obj = {}
+        while True:
+            self._skip()
+            if self._peek() == '}':
+                self.pos += 1
+                return obj
+            if self._peek() in ('"', "'", '`'):
+                key = self._parse_string()
+            else:
+                match = self._IDENTIFIER.match(self.text, self.pos)
+                if not match:
+                    raise self._error('expected object key')
+                key = match.group(0)
+                self.pos = match.end()
+            self._skip()
+            if self._peek() != ':':
+                raise self._error("expected ':'")
+            self.pos += 1
+            obj[key] = self.parse_value()
+            self._skip()
+            if self._peek() == ',':
+                self.pos += 1
+            elif self._peek() != '}':
+                raise self._error("expected ',' or '}'")
+
+    def _parse_string(self) -> str:
+        quote = self.text[self.pos]
+        self.pos += 1
+        chunks = []
+        while True:
+            if self.pos >= len(self.text):
+                raise self._error('unterminated string')
+            char = self.text[self.pos]
+            if char == quote:
+                self.pos += 1
+                return ''.join(chunks)
+            if char == '\\':
+                escaped = self.text[self.pos + 1:self.pos + 2]
+                if escaped == 'u':
+                    chunks.append(chr(int(self.text[self.pos + 2:self.pos + 6], 16)))
+                    self.pos += 6
+                    continue
+                if escaped == '\n':
+                    self.pos += 2  # line continuation
+                    continue
+                chunks.append(self._ESCAPES.get(escaped, escaped))
+                self.pos += 2
+                continue
+            if quote == '`' and self.text.startswith('${', self.pos):
+                raise self._error('template interpolation is not supported')
+            chunks.append(char)
+            self.pos += 1
+
+    def _skip(self):
+        """Skip whitespace and comments"""
+        text = self.text
+        while self.pos < len(text):
+            if text[self.pos].isspace():
+                self.pos += 1
+            elif text.startswith('//', self.pos):
+                end = text.find('\n', self.pos)
+                self.pos = len(text) if end == -1 else end + 1
+            elif text.startswith('/*', self.pos):
+                end = text.find('*/', self.pos + 2)
+                if end == -1:
+                    raise self._error('unterminated comment')
+                self.pos = end + 2
+            else:
+                return
+
+    def _peek(self) -> str:
+        return self.text[self.pos] if self.pos < len(self.text) else ''
+
+    def _error(self, message: str) -> CatalogError:
+        line = self.text.count('\n', 0, self.pos) + 1
+        return CatalogError(f"{message} at line {line}")
+
+
+def extract_export(source: str, name: str) -> Any:
+    """Parse the literal value of ``export const <name>`` from TypeScript source"""
+    match = re.search(rf'export\s+const\s+{re.escape(name)}\s*(?::[^=]+)?=', source)
+    if not match:
+        raise CatalogError(f"export '{name}' not found")
+    return TSLiteralParser(source, match.end()).parse_value()
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+
+def _column_type(values: List[Any]) -> str:
+    """Pick the storage type for one column (missing values are None)"""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, str) for v in present):
+        return 'str'
+    if present and all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in present):
+        return 'str[]'
+    if present and all(isinstance(v, dict) and all(isinstance(x, str) for x in v.values()) for v in present):
+        return 'str{}'
+    return 'json'
+
+
+def _encode_column(values: List[Any], column_type: str, table: _StringTable) -> List[Any]:
+    if column_type == 'str':
+        return [None if v is None else table.intern(v) for v in values]
+    if column_type == 'str[]':
+        return [None if v is None else [table.intern(x) for x in v] for v in values]
+    if column_type == 'str{}':
+        return [None if v is None else [[table.intern(k), table.intern(x)] for k, x in v.items()] for v in values]
+    return values
+
+
+def _decode_column(values: List[Any], column_type: str, strings: List[str]) -> List[Any]:
+    if column_type == 'str':
+        return [None if v is None else strings[v] for v in values]
+    if column_type == 'str[]':
+        return [None if v is None else [strings[x] for x in v] for v in values]
+    if column_type == 'str{}':
+        return [None if v is None else {strings[k]: strings[x] for k, x in v} for v in values]
+    return values
+
+
+def compile_catalog(source: str) -> Dict[str, Any]:
+    """Compile mockData.ts source text into the columnar catalog document"""
+    table = _StringTable()
+    collections = {}
+    for name in COLLECTIONS:
+        records = extract_export(source, name)
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise CatalogError(f"export '{name}' is not an array of objects")
+
+        # Column order follows first appearance so decoded records keep their key order
+        fields: Dict[str, None] = {}
+        for record in records:
+            fields.update(dict.fromkeys(record))
+        columns = {}
+        for field in fields:
+            values = [record.get(field) for record in records]
+            column_type = _column_type(values)
+            columns[field] = {
+                'type': column_type,
+                'present': [int(field in record) for record in records] if None in values else None,
+                'values': _encode_column(values, column_type, table)
+            }
+        collections[name] = {'count': len(records), 'columns': columns}
+
+    document = {
+        'format': CATALOG_FORMAT,
+        'schema_version': SCHEMA_VERSION,
+        'source_sha256': source_hash(source),
+        'strings': table.strings,
+        'collections': collections
+    }
+    document['catalog_version'] = _content_hash(document)
+    return document
+
+
+def _content_hash(document: Dict[str, Any]) -> str:
+    """Version of the compiled content itself, independent of source formatting"""
+    payload = json.dumps([document['strings'], document['collections']], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def recipe_digest(recipe: Dict[str, Any]) -> bytes:
+    """SHA-256 digest of one recipe's canonical JSON"""
+    payload = json.dumps(recipe, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).digest()
+
+
+def recipes_hash(recipes: List[Dict[str, Any]], digests: List[bytes] = None) -> str:
+    """Content hash of a list of recipe dicts, used as the index/catalog version.
+
+    Hashes the ordered per-recipe digests, so a caller that already has the
+    digests of unchanged recipes (an incrementally updated index) can pass them.
+    """
+    if digests is None:
+        digests = [recipe_digest(recipe) for recipe in recipes]
+    return hashlib.sha256(b''.join(digests)).hexdigest()[:16]
+
+
+def decode_collection(document: Dict[str, Any], name: str) -> List[Dict[str, Any]]:
+    """Rebuild the list of records for one collection of a compiled catalog"""
+    collection = document['collections'][name]
+    strings = document['strings']
+    records = [{} for _ in range(collection['count'])]
+    for field, column in collection['columns'].items():
+        values = _decode_column(column['values'], column['type'], strings)
+        present = column['present']
+        for i, value in enumerate(values):
+            if present is None or present[i]:
+                records[i][field] = value
+    return records
+
+
+class Catalog:
+    """Decoded catalog: the compiled collections plus version information"""
+
+    def __init__(self, document: Dict[str, Any]):
+        if document.get('format') != CATALOG_FORMAT or document.get('schema_version') != SCHEMA_VERSION:
+            raise CatalogError("unsupported catalog artifact; rebuild it with 'python catalog.py'")
+        self.version: str = document['catalog_version']
+        self.source_sha256: str = document['source_sha256']
+        self.collections: Dict[str, List[Dict]] = {
+            name: decode_collection(document, name) for name in document['collections']
+        }
+
+    @property
+    def recipes(self) -> List[Dict]:
+        """All servable recipes: the main catalog followed by leftover recipes"""
+        recipes = []
+        for name in RECIPE_COLLECTIONS:
+            for record in self.collections.get(name, []):
+                # Leftover recipes call their cooking time 'time'
+                if 'cookingTime' not in record and 'time' in record:
+                    record = dict(record, cookingTime=record['time'])
+                recipes.append(record)
+        return recipes
+
+
+def build_catalog(source_path: str = SOURCE_PATH, catalog_path: str = CATALOG_PATH) -> Dict[str, Any]:
+    """Compile ``source_path`` and write the artifact to ``catalog_path``"""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        document = compile_catalog(f.read())
+    tmp_path = catalog_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, catalog_path)
+    return document
+
+
+def is_stale(document: Dict[str, Any], source_path: str = SOURCE_PATH) -> bool:
+    """True when the source file exists and no longer matches the artifact's hash"""
+    if not os.path.exists(source_path):
+        return False
+    with open(source_path, 'r', encoding='utf-8') as f:
+        return source_hash(f.read()) != document.get('source_sha256')
+
+
+def load_catalog(catalog_path: str = CATALOG_PATH, source_path: str = SOURCE_PATH) -> Catalog:
+    """Load the compiled catalog, recompiling in memory if the artifact is missing or stale"""
+    document = None
+    if os.path.exists(catalog_path):
+        with open(catalog_path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        if is_stale(document, source_path):
+            print(f"Catalog artifact {catalog_path} is stale; recompiling from {source_path}")
+            document = None
+    if document is None:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            document = compile_catalog(f.read())
+    return Catalog(document)
+
+
+if __name__ == "__main__":
+    if '--check' in sys.argv[1:]:
+        with open(CATALOG_PATH, 'r', encoding='utf-8') as f:
+            stale = is_stale(json.load(f))
+        print("Catalog artifact is stale" if stale else "Catalog artifact is up to date")
+        sys.exit(1 if stale else 0)
+
+    compiled = build_catalog()
+    counts = ', '.join(f"{name}={c['count']}" for name, c in compiled['collections'].items())
+    print(f"Wrote {CATALOG_PATH} (version {compiled['catalog_version']}): {counts}")
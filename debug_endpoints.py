@@ -0,0 +1,289 @@
+"""Flag-gated /debug/memory and /debug/profile endpoints for sizing workers.
+
+Installed only with COOKWISE_DEBUG_ENDPOINTS=1; otherwise the routes do not
+exist. With the flag on, tracemalloc runs from installation on (it slows
+allocation-heavy code noticeably), so keep it to staging or a canary worker.
+
+GET /debug/memory?top=N
+    Process RSS, the byte size of every named component (recipe data,
+    DataFrame, embeddings, vectorizer vocabulary, caches, ...) and the N
+    largest tracemalloc allocation sites. Memory-mapped array bytes are
+    reported apart: they live in the shared page cache, not in the worker.
+
+POST /debug/profile {"requests": N, "interval_ms": 1}
+    Sample the call stacks of the next N /recommend requests.
+GET /debug/profile
+    202 while sampling; then the profile as collapsed stacks, one
+    ``frame;frame;frame count`` line per stack, ready for flamegraph.pl or
+    speedscope.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+ENABLED = os.environ.get('COOKWISE_DEBUG_ENDPOINTS') == '1'
+
+# Frames kept per tracemalloc allocation (more frames cost more memory and time)
+TRACEMALLOC_FRAMES = int(os.environ.get('COOKWISE_TRACEMALLOC_FRAMES', 1))
+
+# Largest number of requests a single profile may cover
+MAX_PROFILE_REQUESTS = 1000
+
+
+def deep_sizeof(obj: Any) -> Tuple[int, int]:
+    """(heap bytes, memory-mapped bytes) reachable from ``obj``, each object counted once.
+
+    Follows containers, instance attributes, numpy buffers (a view counts its
+    base array once), scipy sparse matrices and pandas DataFrames (through
+    ``memory_usage(deep=True)``). Modules, classes and functions are not followed.
+    """
+    # numpy is looked up, not imported: simple_app runs without it, and then holds no arrays
+    np = sys.modules.get('numpy')
+    if np is not None:
+        from model_store import is_memory_mapped
+    seen = set()
+    heap = mapped = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if item is None or id(item) in seen:
+            continue
+        seen.add(id(item))
+        if np is not None and isinstance(item, np.ndarray):
+            root = item
+            while isinstance(root.base, np.ndarray):
+                root = root.base
+            if root is not item:
+                stack.append(root)
+            elif is_memory_mapped(item):
+                mapped += item.nbytes
+            else:
+                heap += item.nbytes
+            continue
+        if type(item).__name__ == 'DataFrame' and hasattr(item, 'memory_usage'):
+            heap += int(item.memory_usage(deep=True).sum())
+            continue
+        if isinstance(item, (type, type(sys), type(deep_sizeof), type(len))):
+            continue
+        heap += sys.getsizeof(item, 0)
+        if isinstance(item, (str, bytes, int, float, bool)):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            if hasattr(item, '__dict__'):
+                stack.append(vars(item))
+            for slot in getattr(type(item), '__slots__', ()):
+                stack.append(getattr(item, slot, None))
+    return heap, mapped
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """Current and peak resident set size of this process, in bytes (None where unavailable)"""
+    rss = None
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        peak = None
+    return {'rss_bytes': rss, 'peak_rss_bytes': peak}
+
+
+def memory_report(components: Dict[str, Any], top: int = 20, lru_caches: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Sizes of named components plus the ``top`` tracemalloc allocation sites.
+
+    Components are measured separately, so objects they share are counted
+    in each; a None component is reported as not built. ``lru_caches`` are
+    ``functools.lru_cache`` wrappers, whose contents cannot be walked; their
+    entry counts are reported instead.
+    """
+    sizes = {}
+    for name, component in components.items():
+        if component is None:
+            sizes[name] = None
+        else:
+            heap, mapped = deep_sizeof(component)
+            sizes[name] = {'bytes': heap, 'mapped_bytes': mapped}
+
+    allocations: Dict[str, Any] = {'tracing': tracemalloc.is_tracing()}
+    if tracemalloc.is_tracing():
+        traced, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics('lineno')
+        allocations.update(traced_bytes=traced, peak_traced_bytes=peak, top=[
+            {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+            for stat in statistics[:top]
+        ])
+    caches = {name: cache.cache_info()._asdict() for name, cache in (lru_caches or {}).items()}
+    return {'process': process_memory(), 'components': sizes, 'lru_caches': caches, 'tracemalloc': allocations}
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads serving selected requests at a fixed interval.
+
+    ``arm(n)`` starts a profile of the next ``n`` requests; the request hooks
+    call ``enter``/``exit`` around each one, and a sampler thread records the
+    stack of every thread inside a profiled request until ``n`` have finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = set()
+        self._stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._remaining = 0
+        self._running = False
+        self._interval = 0.001
+        self.requests = 0
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    def arm(self, requests: int, interval: float = 0.001):
+        """Profile the next ``requests`` requests; ValueError while a profile is running"""
+        with self._lock:
+            if self._running:
+                raise ValueError("A profile is already running")
+            previous = self._thread
+        # The previous sampler stops within one interval of its profile finishing
+        if previous is not None:
+            previous.join()
+        with self._lock:
+            self._stacks = Counter()
+            self._remaining = requests
+            self._interval = interval
+            self.requests = requests
+            self.samples = 0
+            self._running = True
+            self._thread = threading.Thread(target=self._sample, name='debug-profiler', daemon=True)
+            self._thread.start()
+
+    def enter(self) -> bool:
+        """Start profiling the current request if the profile still needs requests"""
+        with self._lock:
+            if not self._running or self._remaining - len(self._active) <= 0:
+                return False
+            self._active.add(threading.get_ident())
+            return True
+
+    def exit(self):
+        with self._lock:
+            if threading.get_ident() in self._active:
+                self._active.discard(threading.get_ident())
+                self._remaining -= 1
+                if self._remaining <= 0:
+                    self._running = False
+
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks (root frame first), most sampled first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+
+    def _sample(self):
+        own = threading.get_ident()
+        while self._running:
+            time.sleep(self._interval)
+            frames = sys._current_frames()
+            with self._lock:
+                threads = [tid for tid in self._active if tid != own]
+            for tid in threads:
+                frame = frames.get(tid)
+                if frame is not None:
+                    self._stacks[_collapse(frame)] += 1
+                    self.samples += 1
+
+
+def _collapse(frame) -> str:
+    names: List[str] = []
+    while frame is not None:
+        names.append(f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def install(
+    app,
+    components: Callable[[], Dict[str, Any]],
+    lru_caches: Callable[[], Dict[str, Any]] = None,
+    profiled_paths: Iterable[str] = ('/recommend',),
+    enabled: bool = None
+) -> Optional[SamplingProfiler]:
+    """Add /debug/memory and /debug/profile to ``app`` when enabled (COOKWISE_DEBUG_ENDPOINTS=1).
+
+    ``components`` (and ``lru_caches``) return the named objects /debug/memory
+    measures. Returns the profiler, or None when the endpoints are off.
+    """
+    if not (ENABLED if enabled is None else enabled):
+        return None
+    from flask import Response, jsonify, request
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    profiler = SamplingProfiler()
+    profiled_paths = frozenset(profiled_paths)
+
+    @app.before_request
+    def _enter_profile():
+        if profiler.running and request.path in profiled_paths:
+            profiler.enter()
+
+    @app.teardown_request
+    def _exit_profile(exc):
+        if profiler.running:
+            profiler.exit()
+
+    @app.route('/debug/memory')
+    def debug_memory():
+        try:
+            top = int(request.args.get('top', 20))
+        except ValueError:
+            return jsonify({"status": "error", "message": "'top' must be an integer"}), 400
+        caches = lru_caches() if lru_caches is not None else None
+        return jsonify(dict(memory_report(components(), top, caches), status="success"))
+
+    @app.route('/debug/profile', methods=['GET', 'POST'])
+    def debug_profile():
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            requests = data.get('requests', 10)
+            interval_ms = data.get('interval_ms', 1)
+            if isinstance(requests, bool) or not isinstance(requests, int) or not 1 <= requests <= MAX_PROFILE_REQUESTS:
+                return jsonify({
+                    "status": "error",
+                    "message": f"'requests' must be an integer between 1 and {MAX_PROFILE_REQUESTS}"
+                }), 400
+            if isinstance(interval_ms, bool) or not isinstance(interval_ms, (int, float)) or interval_ms <= 0:
+                return jsonify({"status": "error", "message": "'interval_ms' must be a positive number"}), 400
+            try:
+                profiler.arm(requests, interval_ms / 1000)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 409
+            return jsonify({"status": "armed", "requests": requests, "paths": sorted(profiled_paths)}), 202
+
+        if profiler.running:
+            return jsonify({"status": "running", "remaining": profiler.remaining}), 202
+        if not profiler.requests:
+            return jsonify({"status": "error", "message": "No profile; POST /debug/profile to start one"}), 404
+        response = Response(profiler.collapsed(), mimetype='text/plain')
+        response.headers['Content-Disposition'] = 'attachment; filename=profile.collapsed'
+        response.headers['X-Profile-Samples'] = str(profiler.samples)
+        return response
+
+    return profiler
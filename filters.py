@@ -0,0 +1,198 @@
+import json
+import numpy as np
+from typing import List, Dict, Any, Mapping, Sequence, TYPE_CHECKING
+
+from pantry import popcount
+
+if TYPE_CHECKING:
+    from recipe_index import EncodedColumns
+
+# Hard filters on categorical attributes: filter key -> recipe field
+CATEGORICAL_FILTERS = {
+    'dietType': 'dietType',
+    'mealType': 'mealType',
+    'spiceLevel': 'spiceLevel',
+    'region': 'region',
+    'state': 'state',
+    'cuisine': 'cuisine'
+}
+
+# Cooking time buckets as (exclusive lower, inclusive upper) minutes, the same
+# split as the quiz "cookingTime" answers in scoring.quiz_scores
+COOKING_TIME_BUCKETS = {
+    'quick': (-np.inf, 30),
+    'medium': (30, 60),
+    'long': (60, np.inf)
+}
+
+# Quiz diet answers accepted as dietType filter values
+DIET_ALIASES = {'vegetarian': 'veg', 'non-vegetarian': 'non-veg'}
+
+FILTER_KEYS = tuple(CATEGORICAL_FILTERS) + ('isHealthy', 'cookingTime', 'maxCookingTime')
+
+# Attributes counted by FilterIndex.facets, as shown on the Explore page
+FACET_KEYS = ('cuisine', 'region', 'state', 'dietType', 'mealType', 'spiceLevel', 'cookingTime')
+
+
+class FilterIndex:
+    """Packed per-value bitmaps of the hard-filterable recipe attributes.
+
+    ``bitmaps[key][value]`` has bit ``i`` set when recipe ``i`` has that value
+    (``np.packbits`` layout, string values lowercased). A filter ORs the bitmaps
+    of the values it accepts and different filters are ANDed, so the candidate
+    set costs a few byte-wise operations per 8 recipes before anything is scored.
+    """
+
+    def __init__(self, recipes: Sequence[Dict], columns: 'EncodedColumns'):
+        self.num_recipes = len(recipes)
+        self.bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        # Display name of every bitmap value: first spelling seen, or the bucket name
+        self.labels: Dict[str, Dict[Any, str]] = {}
+        for key, field in CATEGORICAL_FILTERS.items():
+            value_rows: Dict[str, List[int]] = {}
+            labels: Dict[str, str] = {}
+            for row, recipe in enumerate(recipes):
+                values = recipe.get(field)
+                for value in values if isinstance(values, list) else [values]:
+                    if isinstance(value, str) and value:
+                        value_rows.setdefault(value.lower(), []).append(row)
+                        labels.setdefault(value.lower(), value)
+            self.bitmaps[key] = {value: self._pack_rows(rows) for value, rows in value_rows.items()}
+            self.labels[key] = labels
+
+        self.bitmaps['isHealthy'] = {
+            True: np.packbits(columns.is_healthy),
+            False: np.packbits(~columns.is_healthy)
+        }
+        cooking_time = columns.cooking_time
+        self.bitmaps['cookingTime'] = {
+            bucket: np.packbits((cooking_time > low) & (cooking_time <= high))
+            for bucket, (low, high) in COOKING_TIME_BUCKETS.items()
+        }
+        self.labels['cookingTime'] = {bucket: bucket.capitalize() for bucket in COOKING_TIME_BUCKETS}
+        self._cooking_time = cooking_time
+        self._empty = np.zeros((self.num_recipes + 7) // 8, dtype=np.uint8)
+
+        # Each facet's bitmaps stacked into one (values x bytes) array, counted in one pass
+        self._facet_stacks = {}
+        for key in FACET_KEYS:
+            values = tuple(self.bitmaps[key])
+            stack = np.vstack([self.bitmaps[key][value] for value in values]) if values else \
+                np.zeros((0, len(self._empty)), dtype=np.uint8)
+            self._facet_stacks[key] = (tuple(self.labels[key][value] for value in values), stack)
+
+    def _pack_rows(self, rows: List[int]) -> np.ndarray:
+        mask = np.zeros(self.num_recipes, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bitmap.nbytes for bitmaps in self.bitmaps.values() for bitmap in bitmaps.values())
+
+    def candidates(self, filters: Dict) -> np.ndarray:
+        """Catalog rows passing every filter, ascending.
+
+        Categorical filters and ``cookingTime`` take one value or a list of
+        accepted values (case-insensitive); ``isHealthy`` takes a boolean and
+        ``maxCookingTime`` a number of minutes. Raises ValueError for unknown
+        keys or malformed values.
+        """
+        return np.flatnonzero(np.unpackbits(self.passing(filters), count=self.num_recipes))
+
+    def facets(self, filters: Dict = None) -> Dict:
+        """Number of recipes passing ``filters``, and per value of every FACET_KEYS attribute.
+
+        Values are listed most recipes first (then by name) and values with no
+        passing recipe are left out.
+        """
+        passing = self.passing(filters or {})
+        facets = {}
+        for key, (labels, stack) in self._facet_stacks.items():
+            counts = popcount(stack & passing)
+            facets[key] = [
+                {"value": label, "count": int(count)}
+                for count, label in sorted(zip(counts.tolist(), labels), key=lambda item: (-item[0], item[1]))
+                if count
+            ]
+        return {"total": int(popcount(passing[None])[0]), "facets": facets}
+
+    def passing(self, filters: Dict) -> np.ndarray:
+        """Packed bitmap of the recipes passing every filter (see ``candidates``)"""
+        if not isinstance(filters, dict):
+            raise ValueError("'filters' must be an object")
+        unknown = sorted(set(filters) - set(FILTER_KEYS))
+        if unknown:
+            raise ValueError(f"Unknown filters {unknown}, expected some of {list(FILTER_KEYS)}")
+
+        passing = np.packbits(np.ones(self.num_recipes, dtype=bool))
+        for key, accepted in filters.items():
+            if key == 'maxCookingTime':
+                if not _is_minutes(accepted):
+                    raise ValueError("'maxCookingTime' must be a number of minutes")
+                passing &= np.packbits(self._cooking_time <= accepted)
+            elif key == 'isHealthy':
+                if not isinstance(accepted, bool):
+                    raise ValueError("'isHealthy' must be true or false")
+                passing &= self.bitmaps[key][accepted]
+            else:
+                values = accepted if isinstance(accepted, list) else [accepted]
+                if not values or not all(isinstance(value, str) for value in values):
+                    raise ValueError(f"'{key}' must be a string or a non-empty list of strings")
+                bitmap = self._empty.copy()
+                for value in values:
+                    value = value.lower().strip()
+                    if key == 'dietType':
+                        value = DIET_ALIASES.get(value, value)
+                    bitmap |= self.bitmaps[key].get(value, self._empty)
+                passing &= bitmap
+        return passing
+
+
+def _is_minutes(value: Any) -> bool:
+    """Whether ``value`` is a finite, non-negative number (NaN fails every comparison)"""
+    return not isinstance(value, bool) and isinstance(value, (int, float)) and 0 <= value < float('inf')
+
+
+def parse_filter_args(args: Mapping[str, str]) -> Dict:
+    """Filters from URL query parameters, e.g. ``?dietType=Veg,Vegan&isHealthy=true&maxCookingTime=30``.
+
+    Lists are comma-separated. Parameters that are not filter keys are ignored;
+    a list parameter without any value (``?dietType=``) raises ValueError, as
+    an empty list does in a /recommend body.
+    """
+    filters: Dict[str, Any] = {}
+    for key in FILTER_KEYS:
+        raw = args.get(key)
+        if raw is None:
+            continue
+        if key == 'isHealthy':
+            if raw.lower() not in ('true', 'false'):
+                raise ValueError("'isHealthy' must be true or false")
+            filters[key] = raw.lower() == 'true'
+        elif key == 'maxCookingTime':
+            try:
+                minutes = float(raw)
+            except ValueError:
+                minutes = None
+            if not _is_minutes(minutes):
+                raise ValueError("'maxCookingTime' must be a number of minutes")
+            filters[key] = minutes
+        else:
+            values = [value.strip() for value in raw.split(',') if value.strip()]
+            if not values:
+                raise ValueError(f"'{key}' must list at least one value")
+            filters[key] = values
+    return filters
+
+
+def filter_signature(filters: Dict) -> str:
+    """Canonical form of a filter selection, equal for equivalent selections"""
+    canonical = {}
+    for key, value in (filters or {}).items():
+        if isinstance(value, list):
+            value = sorted({item.lower().strip() if isinstance(item, str) else item for item in value})
+        elif isinstance(value, str):
+            value = [value.lower().strip()]
+        canonical[key] = value
+    return json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
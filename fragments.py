@@ -0,0 +1,60 @@
+import json
+from typing import Dict, Any, Iterable, Optional, Sequence, Tuple
+
+# fields=list: what list views need to render a recipe card
+LIST_VIEW_FIELDS = ('id', 'title', 'image', 'cookingTime')
+
+
+def to_json(value: Any) -> str:
+    """Compact JSON text, as spliced into responses"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def project(recipe: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """The requested fields of a recipe (fields it lacks are left out); None keeps it whole"""
+    if fields is None:
+        return recipe
+    return {field: recipe[field] for field in fields if field in recipe}
+
+
+def splice(fragment: str, fields: Dict[str, Any] = None, raw: Dict[str, str] = None) -> str:
+    """JSON object text ``fragment`` with ``fields`` added, plus ``raw`` values that are already JSON text.
+
+    Keys are appended after the fragment's own, so on a clash the added value
+    is the one JSON parsers keep, as with ``dict.update``.
+    """
+    parts = [to_json(fields)[1:-1]] if fields else []
+    parts.extend(f'{to_json(key)}:{value}' for key, value in (raw or {}).items())
+    if not parts:
+        return fragment
+    separator = ',' if fragment != '{}' else ''
+    return fragment[:-1] + separator + ','.join(parts) + '}'
+
+
+class RecipeFragments:
+    """Every recipe serialized to JSON once, in full and as the list-view projection.
+
+    Recipes in an index snapshot never change, so responses are assembled by
+    joining these fragments, splicing in the few per-request match fields,
+    instead of copying recipe dicts and serializing them again.
+    """
+
+    def __init__(self, recipes: Sequence[Dict]):
+        self.full: Tuple[str, ...] = tuple(to_json(recipe) for recipe in recipes)
+        self.list_view: Tuple[str, ...] = tuple(to_json(project(recipe, LIST_VIEW_FIELDS)) for recipe in recipes)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(fragment) for fragment in self.full) + sum(len(fragment) for fragment in self.list_view)
+
+    def view(self, fields: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+        """Fragments for a projection, or None when that projection is not pre-serialized"""
+        if fields is None:
+            return self.full
+        if tuple(fields) == LIST_VIEW_FIELDS:
+            return self.list_view
+        return None
+
+    def array(self, rows_and_fields: Iterable[Tuple[int, Dict[str, Any]]]) -> str:
+        """JSON array of full recipes, each with its own extra fields spliced in"""
+        return '[' + ','.join(splice(self.full[row], fields) for row, fields in rows_and_fields) + ']'
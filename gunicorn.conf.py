@@ -0,0 +1,38 @@
+"""gunicorn settings for the ML API: one recommender index shared by every worker.
+
+    gunicorn -c gunicorn.conf.py
+
+``preload_app`` imports api/app.py (which builds or loads the recommender)
+once, in the master, and COOKWISE_PRELOAD makes it move the index's arrays
+into shared memory (see preload.py) before the workers are forked. Workers
+then read the master's copy instead of building their own, so each extra
+worker adds little more than its own Python objects to the total RSS.
+
+Set COOKWISE_MODEL_PATH as well to load a prebuilt artifact instead of
+fitting at startup. Restarted workers are forked from the same master and
+share the same index.
+"""
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'app:app'
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api')
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+preload_app = True
+os.environ.setdefault('COOKWISE_PRELOAD', '1')
+
+# No collections while the master builds the index: objects freed during the
+# build would leave holes that workers later fill, writing to shared pages
+gc.disable()
+
+
+def when_ready(server):
+    """Freeze everything the master built, then fork the workers with collection back on"""
+    gc.collect()
+    # Frozen objects are never visited by later collections, in the master or in workers
+    gc.freeze()
+    gc.enable()
@@ -0,0 +1,211 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import List, Dict, Iterable, Sequence, Set, Tuple
+
+_WORD = re.compile(r'[^\W_]+')
+
+# Irregular plurals and spelling variants, replaced word by word
+WORD_FORMS = {
+    'chilli': 'chili', 'chillies': 'chili', 'chilies': 'chili', 'chillis': 'chili', 'chiles': 'chili',
+    'leaves': 'leaf', 'halves': 'half', 'loaves': 'loaf', 'cookies': 'cookie',
+    'yoghurt': 'yogurt', 'yoghurts': 'yogurt'
+}
+
+# Regional and alternative names, mapped to one name after singularization
+SYNONYMS = {
+    'atta': 'wheat flour',
+    'whole wheat flour': 'wheat flour',
+    'curd': 'yogurt',
+    'dahi': 'yogurt',
+    'besan': 'gram flour',
+    'maida': 'refined flour',
+    'all purpose flour': 'refined flour',
+    'sooji': 'semolina',
+    'suji': 'semolina',
+    'rava': 'semolina',
+    'jeera': 'cumin',
+    'haldi': 'turmeric',
+    'dhania': 'coriander',
+    'cilantro': 'coriander',
+    'capsicum': 'bell pepper',
+    'aloo': 'potato',
+    'pyaz': 'onion',
+    'methi': 'fenugreek',
+    'palak': 'spinach',
+    'brinjal': 'eggplant',
+    'baingan': 'eggplant',
+    'aubergine': 'eggplant',
+    'bhindi': 'okra',
+    'lady finger': 'okra',
+    'scallion': 'spring onion',
+    'garbanzo bean': 'chickpea'
+}
+
+_SYNONYM_WORDS = {tuple(key.split()): tuple(value.split()) for key, value in SYNONYMS.items()}
+_MAX_SYNONYM_WORDS = max(len(key) for key in _SYNONYM_WORDS)
+
+
+def singular(word: str) -> str:
+    """Singular form of an English plural ("tomatoes" -> "tomato", "curries" -> "curry")"""
+    if word in WORD_FORMS:
+        return WORD_FORMS[word]
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('oes', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def normalize_ingredient(text: str) -> Tuple[str, ...]:
+    """Words of an ingredient name, lowercased, singular, with synonyms resolved.
+
+    "Curd" -> ("yogurt",), "Green Chillies" -> ("green", "chili"),
+    "2 cups Atta" -> ("2", "cup", "wheat", "flour").
+    """
+    words = [singular(word) for word in _WORD.findall(text.lower())]
+    normalized: List[str] = []
+    position = 0
+    while position < len(words):
+        for length in range(min(_MAX_SYNONYM_WORDS, len(words) - position), 0, -1):
+            replacement = _SYNONYM_WORDS.get(tuple(words[position:position + length]))
+            if replacement:
+                normalized.extend(replacement)
+                position += length
+                break
+        else:
+            normalized.append(words[position])
+            position += 1
+    return tuple(normalized)
+
+
+def _contains(words: Sequence[str], part: Sequence[str]) -> bool:
+    length = len(part)
+    return any(tuple(words[start:start + length]) == tuple(part) for start in range(len(words) - length + 1))
+
+
+def words_match(first: Sequence[str], second: Sequence[str]) -> bool:
+    """Whether either normalized ingredient occurs in the other as whole consecutive words"""
+    return bool(first) and bool(second) and (_contains(first, second) or _contains(second, first))
+
+
+class IngredientMatcher:
+    """Whole-word ingredient matching against a fixed vocabulary, compiled once.
+
+    Vocabulary entries are normalized (``normalize_ingredient``) and compiled
+    into an Aho-Corasick automaton over words, so one left-to-right pass over a
+    query's words finds every entry it contains. Entries that contain the query
+    are found through a word -> phrases index. Together these give the same
+    answer as ``words_match`` against every entry: "rice" matches "basmati rice"
+    but not "licorice", "oil" matches "mustard oil" but not "boiled".
+    """
+
+    def __init__(self, vocabulary: Iterable[str], cache_size: int = 4096):
+        self.vocabulary: Tuple[str, ...] = tuple(dict.fromkeys(vocabulary))
+        self.positions: Dict[str, int] = {entry: i for i, entry in enumerate(self.vocabulary)}
+
+        # Distinct normalized phrases; several entries may normalize to one phrase
+        phrase_ids: Dict[Tuple[str, ...], int] = {}
+        phrase_entries: List[List[int]] = []
+        for position, entry in enumerate(self.vocabulary):
+            words = normalize_ingredient(entry)
+            if words:
+                phrase = phrase_ids.setdefault(words, len(phrase_ids))
+                if phrase == len(phrase_entries):
+                    phrase_entries.append([])
+                phrase_entries[phrase].append(position)
+        self.phrases: Tuple[Tuple[str, ...], ...] = tuple(phrase_ids)
+        self._phrase_entries = tuple(tuple(entries) for entries in phrase_entries)
+
+        containing: Dict[str, Set[int]] = {}
+        for phrase, words in enumerate(self.phrases):
+            for word in words:
+                containing.setdefault(word, set()).add(phrase)
+        self._containing = containing
+
+        self._compile()
+        self._matches = lru_cache(maxsize=cache_size)(self._compute_matches)
+
+    def _compile(self):
+        """Trie of phrase words plus failure links (breadth first), merging outputs along them"""
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Set[int]] = [set()]
+        for phrase, words in enumerate(self.phrases):
+            state = 0
+            for word in words:
+                if word not in goto[state]:
+                    goto[state][word] = len(goto)
+                    goto.append({})
+                    output.append(set())
+                state = goto[state][word]
+            output[state].add(phrase)
+
+        # States one word deep fail to the root; deeper ones follow their parent's links
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in goto[state].items():
+                fallback = fail[state]
+                while fallback and word not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(word, 0)
+                output[child] |= output[fail[child]]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._output = tuple(frozenset(phrases) for phrases in output)
+
+    def phrases_in(self, words: Sequence[str]) -> Set[int]:
+        """Phrase ids occurring in ``words``, in a single pass over them"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Set[int] = set()
+        state = 0
+        for word in words:
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            found |= output[state]
+        return found
+
+    def phrases_containing(self, words: Sequence[str]) -> Set[int]:
+        """Phrase ids that contain ``words`` as consecutive words"""
+        postings = sorted((self._containing.get(word, set()) for word in set(words)), key=len)
+        if not postings:
+            return set()
+        candidates = set.intersection(*postings)
+        return {phrase for phrase in candidates if _contains(self.phrases[phrase], words)}
+
+    def _compute_matches(self, text: str) -> Tuple[int, ...]:
+        words = normalize_ingredient(text)
+        if not words:
+            return ()
+        phrases = self.phrases_in(words) | self.phrases_containing(words)
+        return tuple(sorted(entry for phrase in phrases for entry in self._phrase_entries[phrase]))
+
+    def matches(self, text: str) -> Tuple[int, ...]:
+        """Vocabulary positions of the entries matching ``text``, ascending"""
+        return self._matches(text)
+
+    def match_any(self, text: str, ingredients: Iterable[str]) -> bool:
+        """Whether ``text`` matches any of ``ingredients``.
+
+        Ingredients from the vocabulary are resolved through the compiled
+        matches; anything else falls back to comparing words directly.
+        """
+        matched = None
+        for ingredient in ingredients:
+            position = self.positions.get(ingredient)
+            if position is None:
+                if words_match(normalize_ingredient(text), normalize_ingredient(ingredient)):
+                    return True
+                continue
+            if matched is None:
+                matched = set(self.matches(text))
+            if position in matched:
+                return True
+        return False
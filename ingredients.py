@@ -0,0 +1,133 @@
+import re
+from bisect import bisect_left
+from typing import List, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ingredient_matcher import normalize_ingredient
+from scoring import select_top_k
+
+# Leading quantities and units ("1 cup", "1/2 tsp", "500g", "2-3 cups of")
+_QUANTITY = re.compile(
+    r'^(?:[\d½¼¾⅓⅔/.\-]+\s*'
+    r'(?:cups?|tbsps?|tsps?|tablespoons?|teaspoons?|kgs?|g|grams?|ml|l|litres?|liters?|'
+    r'pinch(?:es)?|inch(?:es)?|pieces?|nos?|handfuls?)?\b\.?\s*(?:of\s+)?)+'
+)
+# "For tempering: ..." style group labels
+_GROUP_LABEL = re.compile(r'^for [^:]*:')
+_PARENTHETICAL = re.compile(r'\(([^)]*)\)')
+# Trailing usage notes and cut descriptions ("salt to taste", "sev for garnish", "fish pieces")
+_USAGE_NOTE = re.compile(r'\s+(?:to taste|for \w+(?: \w+)?|pieces)$')
+# Words that only describe preparation; a comma-separated part made of them is dropped
+_PREPARATION_WORDS = {
+    'finely', 'roughly', 'chopped', 'sliced', 'grated', 'roasted', 'boiled', 'cut', 'crushed',
+    'mashed', 'diced', 'minced', 'and', 'optional'
+}
+
+
+def ingredient_names(text: str) -> List[str]:
+    """Ingredient names given by one free-text ingredient line, as written.
+
+    Strips quantities, units, preparation notes and parenthetical aliases, and
+    splits comma-separated lists: "1 cup Onions, chopped" -> ["onions"],
+    "For tempering: Oil, mustard seeds" -> ["oil", "mustard seeds"].
+    """
+    line = _PARENTHETICAL.sub(' ', text.lower())
+    line = _GROUP_LABEL.sub('', line.strip())
+    names = []
+    for part in line.split(','):
+        name = ' '.join(_QUANTITY.sub('', part.strip()).split())
+        name = _USAGE_NOTE.sub('', name)
+        if name and not set(name.split()) <= _PREPARATION_WORDS and name not in names:
+            names.append(name)
+    return names
+
+
+def ingredient_id(name: str) -> str:
+    """Canonical id of an ingredient name: its normalized words ("Green chillies" -> "green chili", "Curd" -> "yogurt")"""
+    return ' '.join(normalize_ingredient(name))
+
+
+def canonical_ingredients(text: str) -> List[str]:
+    """Canonical ingredient ids named by one free-text ingredient line.
+
+    "1 cup Onions, chopped" -> ["onion"], "Curd, Green chillies" -> ["yogurt", "green chili"].
+    """
+    ids = []
+    for name in ingredient_names(text):
+        key = ingredient_id(name)
+        if key and key not in ids:
+            ids.append(key)
+    return ids
+
+
+def ingredient_aliases(text: str) -> List[str]:
+    """Alternative names given in parentheses, e.g. "Maida (Refined Flour)" -> ["refined flour"]"""
+    return [' '.join(alias.lower().split()) for alias in _PARENTHETICAL.findall(text) if alias.strip()]
+
+
+class IngredientVocabulary:
+    """Canonical ingredient ids used by the catalog, with display names, ranked by recipe count.
+
+    Curated common ingredients give display names, categories and aliases to
+    the ids they normalize to. Curated ingredients no recipe uses are left
+    out, so every suggested id matches at least one recipe. Typeahead matches the
+    start of any word of an ingredient's id, name or alias, using one sorted
+    key array (every prefix is a contiguous range).
+    """
+
+    def __init__(
+        self,
+        recipe_counts: Dict[str, int],
+        common_ingredients: Sequence[Dict] = (),
+        recipe_names: Optional[Dict[str, Sequence[str]]] = None
+    ):
+        recipe_names = recipe_names or {}
+        entries: Dict[str, Dict] = {}
+        aliases: Dict[str, List[str]] = {}
+        for item in common_ingredients:
+            names = ingredient_names(item.get('name', ''))
+            key = ingredient_id(names[0]) if names else ''
+            if not recipe_counts.get(key):
+                continue
+            entries.setdefault(key, {"id": key, "name": item['name'], "category": item.get('category')})
+            aliases.setdefault(key, []).extend(names + ingredient_aliases(item['name']))
+        for key in recipe_counts:
+            names = recipe_names.get(key, [])
+            entries.setdefault(
+                key, {"id": key, "name": (names[0] if names else key).capitalize(), "category": None}
+            )
+            aliases.setdefault(key, []).extend(names)
+
+        self.entries: Tuple[Dict, ...] = tuple(entries[key] for key in sorted(entries))
+        self.counts = np.array([recipe_counts[entry['id']] for entry in self.entries], dtype=np.int64)
+        self.positions = {entry['id']: i for i, entry in enumerate(self.entries)}
+
+        keys = set()
+        for position, entry in enumerate(self.entries):
+            for name in [entry['id']] + aliases[entry['id']]:
+                words = name.split()
+                keys.update((' '.join(words[start:]), position) for start in range(len(words)))
+        keys = sorted(keys)
+        self._keys = [key for key, _ in keys]
+        self._key_positions = np.array([position for _, position in keys], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Ingredients with a word starting with ``prefix``, most used first.
+
+        An empty prefix returns the most used ingredients overall.
+        """
+        prefix = ' '.join(prefix.lower().split())
+        if prefix:
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + '\U0010ffff')
+            positions = np.unique(self._key_positions[start:end])
+        else:
+            positions = np.arange(len(self.entries))
+
+        # Ties are broken by id (the entry order), so results are stable
+        order = positions[select_top_k(self.counts[positions].astype(np.float64), limit)]
+        return [dict(self.entries[i], recipes=int(self.counts[i])) for i in order.tolist()]
@@ -0,0 +1,199 @@
+"""Lightweight timing instrumentation: stage timers, latency histograms and counters.
+
+``stage(name)`` times a block of work into the ``cookwise_stage_seconds``
+histogram and, during a request of an instrumented Flask app, into that
+response's ``Server-Timing`` header. ``instrument(app, name)`` also times
+every request and serves all metrics in the Prometheus text format at
+``/metrics``.
+
+COOKWISE_METRICS=0 turns it off: ``stage`` then returns a shared no-op
+context manager, requests are not timed and /metrics is empty.
+"""
+import contextlib
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ENABLED = os.environ.get('COOKWISE_METRICS', '1') != '0'
+
+# Latency histogram bucket bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRIC_HELP = {
+    'cookwise_stage_seconds': 'Time spent in each recommender and handler stage',
+    'cookwise_http_request_duration_seconds': 'Time to handle a request, by endpoint and status',
+    'cookwise_http_requests_total': 'Requests handled, by endpoint and status',
+    'cookwise_recommend_cache_total': 'Recommendation cache lookups, by result'
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Stage durations of the request being handled, summed per stage; None outside requests
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar('cookwise_request_stages', default=None)
+
+
+class Histogram:
+    """Counts of observations per bucket (upper bound inclusive), plus their sum"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs as exposed to Prometheus, ending with +Inf"""
+        pairs, total = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return pairs
+
+
+class MetricsRegistry:
+    """Process-wide histograms and counters keyed by metric name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.extend(_header(name, 'counter'))
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{name}{_format_labels(labels)} {value:g}')
+            for name, series in sorted(self._histograms.items()):
+                lines.extend(_header(name, 'histogram'))
+                for labels, histogram in sorted(series.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {count}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum!r}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _header(name: str, kind: str) -> List[str]:
+    return [f'# HELP {name} {METRIC_HELP.get(name, name)}', f'# TYPE {name} {kind}']
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        REGISTRY.observe('cookwise_stage_seconds', elapsed, stage=self.name)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages[self.name] = stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+_DISABLED_STAGE = contextlib.nullcontext()
+
+
+def stage(name: str):
+    """Context manager timing one stage of work (a shared no-op when instrumentation is off)"""
+    return _Stage(name) if ENABLED else _DISABLED_STAGE
+
+
+def server_timing(stages: Dict[str, float], total: float = None) -> str:
+    """``Server-Timing`` header value for stage durations in seconds"""
+    entries = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in stages.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.3f}')
+    return ', '.join(entries)
+
+
+def instrument(app, name: str):
+    """Time ``app``'s requests, add Server-Timing headers and serve ``/metrics``"""
+    # Flask is only needed here, so the recommender can use stage() without it
+    from flask import Response, g, request
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def _start_request_timing():
+        g.request_timing_start = time.perf_counter()
+        _request_stages.set({})
+
+    @app.after_request
+    def _finish_request_timing(response):
+        start = g.pop('request_timing_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        labels = dict(app=name, method=request.method, endpoint=endpoint, status=str(response.status_code))
+        REGISTRY.observe('cookwise_http_request_duration_seconds', elapsed, **labels)
+        REGISTRY.increment('cookwise_http_requests_total', **labels)
+        response.headers['Server-Timing'] = server_timing(_request_stages.get() or {}, elapsed)
+        return response
+
+    @app.teardown_request
+    def _clear_request_timing(exc):
+        _request_stages.set(None)
@@ -1,28 +1,244 @@
 import numpy as np
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestRegressor
-import json
-import pickle
-from typing import List, Dict, Any, Tuple
-import re
+from scipy import sparse
+import threading
+import traceback
+from typing import List, Dict, Tuple, TYPE_CHECKING
+
+from ingredient_matcher import normalize_ingredient, words_match
+from ingredients import ingredient_id
+from instrumentation import stage
+from recipe_index import RecipeIndex, NumericFeatures
+from model_store import save_index, load_index
+from scoring import score_recipes, score_batch, select_top_k, clamp_top_k
+
+# pandas and scikit-learn are only needed to fit (the offline build step) and to
+# encode incremental updates; they are imported there, so a process serving a
+# saved artifact never loads them
+if TYPE_CHECKING:
+    import pandas as pd
 
 class RecipeRecommender:
-    def __init__(self):
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.scaler = StandardScaler()
+    # Upper bound on queries x recipes cells scored at once by get_batch_recommendations
+    BATCH_CELL_BUDGET = 2_000_000
+    
+    # Query fields that must be strings when present
+    QUIZ_TEXT_FIELDS = ('diet', 'spiceLevel', 'cookingTime', 'cuisine', 'healthFocus')
+    LOCATION_FIELDS = ('state', 'region')
+    
+    def __init__(self, feature_dtype: str = 'float32'):
+        # Storage dtype of the numeric feature block: 'float32', 'float16' or 'int8'
+        self.feature_dtype = feature_dtype
+        self.tfidf_vectorizer = None
         self.label_encoders = {}
-        self.rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.recipes_data = None
-        self.recipe_features = None
         self.recipe_embeddings = None
+        self.numeric_features = None
+        self.normalization = {}
+        # Curated ingredient list offered by ingredient typeahead alongside the catalog's own
+        self.common_ingredients = []
+        self.index = None
+        self._fitted_source = None
+        # Serializes writers (fit, incremental updates, refits); readers just take self.index
+        self._write_lock = threading.RLock()
+        self._changes_since_fit = 0
+        self._refit_stop = None
+        
+    def fit(self, recipes_data: List[Dict], common_ingredients: List[Dict] = None) -> RecipeIndex:
+        """Fit encoders and TF-IDF once and build the immutable index used for queries"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        with self._write_lock:
+            if common_ingredients is not None:
+                self.common_ingredients = list(common_ingredients)
+
+            # Fresh estimators so a previously built index never sees its vectorizer refit
+            self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+            self.label_encoders = {}
+            self.normalization = {}
+            
+            with stage('preprocess'):
+                df = self.preprocess_recipe_data(recipes_data)
+            self.recipes_data = df
+            with stage('tfidf_fit'):
+                self.create_recipe_embeddings(df)
+            
+            with stage('index_build'):
+                self.index = RecipeIndex(
+                    recipes=recipes_data,
+                    df=df,
+                    tfidf_vectorizer=self.tfidf_vectorizer,
+                    label_encoders=self.label_encoders,
+                    recipe_embeddings=self.recipe_embeddings,
+                    numeric_features=self.numeric_features,
+                    normalization=self.normalization,
+                    common_ingredients=self.common_ingredients
+                )
+            self._fitted_source = recipes_data
+            self._changes_since_fit = 0
+            return self.index
+    
+    def add_recipes(self, recipes: List[Dict]) -> RecipeIndex:
+        """Append new recipes to the index without refitting"""
+        return self._apply_changes(additions=recipes)
+    
+    def update_recipes(self, recipes: List[Dict]) -> RecipeIndex:
+        """Replace existing recipes (matched by id) in place without refitting"""
+        return self._apply_changes(replacements=recipes)
+    
+    def remove_recipes(self, recipe_ids: List[str]) -> RecipeIndex:
+        """Drop recipes by id without refitting"""
+        return self._apply_changes(removals=recipe_ids)
+    
+    def _apply_changes(
+        self,
+        additions: List[Dict] = None,
+        replacements: List[Dict] = None,
+        removals: List[str] = None
+    ) -> RecipeIndex:
+        """Build the next index snapshot from the current one and swap it in atomically.
+        
+        Only the added/replaced recipes are encoded, with the current vocabulary,
+        label encoders and normalization; every other row is gathered from the
+        current snapshot. Requests already holding the old snapshot finish on it.
+        """
+        additions = list(additions or [])
+        replacements = list(replacements or [])
+        removals = list(removals or [])
+        
+        with self._write_lock:
+            index = self.index
+            if index is None:
+                raise ValueError("Recommender has no index; call fit() first")
+            
+            positions = index.positions
+            fresh = replacements + additions
+            ids = [recipe.get('id') if isinstance(recipe, dict) else None for recipe in fresh]
+            if any(recipe_id is None for recipe_id in ids):
+                raise ValueError("Every recipe must be an object with an 'id'")
+            if len(set(ids)) != len(ids) or len(set(removals)) != len(removals):
+                raise ValueError("Duplicate recipe ids in update")
+            for recipe_id in [recipe.get('id') for recipe in replacements] + removals:
+                if recipe_id not in positions:
+                    raise ValueError(f"Unknown recipe id '{recipe_id}'")
+            for recipe in additions:
+                if recipe['id'] in positions:
+                    raise ValueError(f"Recipe id '{recipe['id']}' already exists")
+            
+            # Replacements keep their catalog position, additions go to the end,
+            # removed rows are dropped; rows >= len(index) refer to fresh recipes
+            num_old = len(index)
+            rows = np.arange(num_old + len(additions), dtype=np.int64)
+            for j, recipe in enumerate(replacements):
+                rows[positions[recipe['id']]] = num_old + j
+            rows[num_old:] = num_old + len(replacements) + np.arange(len(additions))
+            if removals:
+                keep = np.ones(len(rows), dtype=bool)
+                keep[[positions[recipe_id] for recipe_id in removals]] = False
+                rows = rows[keep]
+            
+            embeddings, numeric = self._encode_new_rows(index, fresh)
+            self._publish(index.updated(rows, fresh, embeddings, numeric))
+            self._fitted_source = None
+            self._changes_since_fit += len(fresh) + len(removals)
+            return self.index
+    
+    def _encode_new_rows(self, index: RecipeIndex, recipes: List[Dict]) -> Tuple[sparse.csr_matrix, np.ndarray]:
+        """TF-IDF and numeric feature rows for recipes, using the index's fitted state.
+        
+        Terms outside the fitted vocabulary are ignored and unseen categorical
+        values are encoded as -1 until the next full fit.
+        """
+        if not recipes:
+            embeddings = sparse.csr_matrix((0, index.recipe_embeddings.shape[1]), dtype=np.float32)
+            return embeddings, np.zeros((0, len(index.numeric_features.columns)), dtype=np.float32)
+        
+        df = self._prepare_frame(recipes)
+        embeddings = sparse.csr_matrix(index.tfidf_vectorizer.transform(df['combined_text']), dtype=np.float32)
+        
+        for feature, encoder in index.label_encoders.items():
+            codes = {label: code for code, label in enumerate(encoder.classes_.tolist())}
+            values = df[feature].fillna('Unknown') if feature in df.columns else ['Unknown'] * len(df)
+            df[f'{feature}_encoded'] = [codes.get(value, -1) for value in values]
+        for feature, (mean, std) in index.normalization.items():
+            if feature in df.columns:
+                df[f'{feature}_normalized'] = (df[feature] - mean) / std
+        
+        numeric = df.reindex(columns=index.numeric_features.columns).fillna(0).to_numpy(dtype=np.float32)
+        return embeddings, numeric
+    
+    def refit(self) -> RecipeIndex:
+        """Full refit of vocabulary, encoders and index on the current snapshot's recipes.
+        
+        The fit runs without holding the write lock, so incremental updates keep
+        landing meanwhile; if one does, the refit is redone on the newer snapshot.
+        """
+        for _ in range(3):
+            base = self.index
+            if base is None:
+                raise ValueError("Recommender has no index; call fit() first")
+            builder = RecipeRecommender(feature_dtype=self.feature_dtype)
+            index = builder.fit(list(base.recipes), base.common_ingredients)
+            with self._write_lock:
+                if self.index is base:
+                    self._publish(index)
+                    self._changes_since_fit = 0
+                    return index
+        # Still racing with writers: refit while holding the lock
+        with self._write_lock:
+            return self.fit(list(self.index.recipes))
+    
+    def start_background_refit(self, interval_seconds: float) -> threading.Thread:
+        """Refit every ``interval_seconds`` in a daemon thread whenever incremental changes are pending"""
+        self.stop_background_refit()
+        stop = threading.Event()
+        self._refit_stop = stop
+        
+        def run():
+            while not stop.wait(interval_seconds):
+                if not self._changes_since_fit:
+                    continue
+                try:
+                    self.refit()
+                except Exception as e:
+                    print(f"Background refit failed: {e}")
+                    traceback.print_exc()
+        
+        thread = threading.Thread(target=run, name='recipe-index-refit', daemon=True)
+        thread.start()
+        return thread
+    
+    def stop_background_refit(self):
+        if self._refit_stop is not None:
+            self._refit_stop.set()
+            self._refit_stop = None
+    
+    def _publish(self, index: RecipeIndex):
+        """Make ``index`` the current snapshot; the attribute swap is what readers see"""
+        self.tfidf_vectorizer = index.tfidf_vectorizer
+        self.label_encoders = index.label_encoders
+        self.normalization = index.normalization
+        self.recipe_embeddings = index.recipe_embeddings
+        self.numeric_features = index.numeric_features
+        self.recipes_data = index.df
+        self.common_ingredients = list(index.common_ingredients)
+        self.index = index
+    
+    def _prepare_frame(self, recipes_data: List[Dict]) -> 'pd.DataFrame':
+        """DataFrame with missing fields filled and the combined text/diet columns, no fitting"""
+        import pandas as pd
         
-    def preprocess_recipe_data(self, recipes_data: List[Dict]) -> pd.DataFrame:
-        """Preprocess recipe data for ML features"""
         df = pd.DataFrame(recipes_data)
         
+        # Not every catalog collection has every field (leftover recipes have no
+        # state or description, main recipes have no description)
+        for column in ['title', 'description', 'cuisine', 'region', 'state']:
+            df[column] = df[column].fillna('') if column in df.columns else ''
+        for column in ['ingredients', 'tags', 'dietType']:
+            if column not in df.columns:
+                df[column] = [[] for _ in range(len(df))]
+        for column in ['isHealthy', 'isFestive', 'isStreetFood']:
+            df[column] = df[column].fillna(False) if column in df.columns else False
+        
         # Create comprehensive feature set
         df['ingredients_text'] = df['ingredients'].apply(lambda x: ' '.join(x) if isinstance(x, list) else str(x))
         df['tags_text'] = df['tags'].apply(lambda x: ' '.join(x) if isinstance(x, list) else str(x))
@@ -41,6 +257,22 @@ class RecipeRecommender:
             df['description']
         )
         
+        # Create diet type features
+        df['is_veg'] = df['dietType'].apply(lambda x: 1 if isinstance(x, list) and 'Veg' in x else 0)
+        df['is_vegan'] = df['dietType'].apply(lambda x: 1 if isinstance(x, list) and 'Vegan' in x else 0)
+        df['is_gluten_free'] = df['dietType'].apply(lambda x: 1 if isinstance(x, list) and 'Gluten-Free' in x else 0)
+        df['is_healthy'] = df['isHealthy'].apply(lambda x: 1 if x else 0)
+        df['is_festive'] = df['isFestive'].apply(lambda x: 1 if x else 0)
+        df['is_street_food'] = df['isStreetFood'].apply(lambda x: 1 if x else 0)
+        
+        return df
+    
+    def preprocess_recipe_data(self, recipes_data: List[Dict]) -> 'pd.DataFrame':
+        """Preprocess recipe data for ML features"""
+        from sklearn.preprocessing import LabelEncoder
+        
+        df = self._prepare_frame(recipes_data)
+        
         # Encode categorical features
         categorical_features = ['cuisine', 'region', 'state', 'difficulty', 'mealType', 'spiceLevel']
         for feature in categorical_features:
@@ -53,23 +285,17 @@ class RecipeRecommender:
         numerical_features = ['cookingTime', 'calories', 'servings']
         for feature in numerical_features:
             if feature in df.columns:
-                df[f'{feature}_normalized'] = (df[feature] - df[feature].mean()) / df[feature].std()
-        
-        # Create diet type features
-        df['is_veg'] = df['dietType'].apply(lambda x: 1 if isinstance(x, list) and 'Veg' in x else 0)
-        df['is_vegan'] = df['dietType'].apply(lambda x: 1 if isinstance(x, list) and 'Vegan' in x else 0)
-        df['is_gluten_free'] = df['dietType'].apply(lambda x: 1 if isinstance(x, list) and 'Gluten-Free' in x else 0)
-        df['is_healthy'] = df['isHealthy'].apply(lambda x: 1 if x else 0)
-        df['is_festive'] = df['isFestive'].apply(lambda x: 1 if x else 0)
-        df['is_street_food'] = df['isStreetFood'].apply(lambda x: 1 if x else 0)
+                mean, std = df[feature].mean(), df[feature].std()
+                df[f'{feature}_normalized'] = (df[feature] - mean) / std
+                self.normalization[feature] = (float(mean), float(std))
         
         return df
     
-    def create_recipe_embeddings(self, df: pd.DataFrame):
+    def create_recipe_embeddings(self, df: 'pd.DataFrame'):
         """Create TF-IDF embeddings for recipe text"""
-        # Create TF-IDF embeddings
+        # Create TF-IDF embeddings, kept sparse (CSR) since most of the vocabulary is absent per recipe
         text_features = self.tfidf_vectorizer.fit_transform(df['combined_text'])
-        self.recipe_embeddings = text_features.toarray()
+        self.recipe_embeddings = sparse.csr_matrix(text_features, dtype=np.float32)
         
         # Create numerical feature matrix
         feature_columns = [
@@ -80,27 +306,32 @@ class RecipeRecommender:
         ]
         
         available_features = [col for col in feature_columns if col in df.columns]
-        numerical_features = df[available_features].fillna(0).values
-        
-        # Combine TF-IDF and numerical features
-        self.recipe_features = np.hstack([self.recipe_embeddings, numerical_features])
+        numerical_features = df[available_features].fillna(0).to_numpy(dtype=np.float32)
+        self.numeric_features = NumericFeatures(numerical_features, available_features, dtype=self.feature_dtype)
         
         return self.recipe_features
     
+    @property
+    def recipe_features(self):
+        """Combined sparse TF-IDF + numeric feature matrix, assembled on demand"""
+        if self.recipe_embeddings is None or self.numeric_features is None:
+            return None
+        return sparse.hstack([self.recipe_embeddings, self.numeric_features.to_float32()], format='csr')
+    
     def calculate_ingredient_similarity(self, selected_ingredients: List[str], recipe_ingredients: List[str]) -> float:
         """Calculate similarity between selected ingredients and recipe ingredients"""
         if not selected_ingredients or not recipe_ingredients:
             return 0.0
         
-        # Normalize ingredients
-        selected_norm = [ing.lower().strip() for ing in selected_ingredients]
-        recipe_norm = [ing.lower().strip() for ing in recipe_ingredients]
+        # Normalize ingredients (case, plurals, synonyms) into words
+        selected_norm = [normalize_ingredient(ing) for ing in selected_ingredients]
+        recipe_norm = [normalize_ingredient(ing) for ing in recipe_ingredients]
         
-        # Calculate intersection
+        # Calculate intersection, matching whole words in either direction
         matches = 0
         for sel_ing in selected_norm:
             for rec_ing in recipe_norm:
-                if sel_ing in rec_ing or rec_ing in sel_ing:
+                if words_match(sel_ing, rec_ing):
                     matches += 1
                     break
         
@@ -167,105 +398,350 @@ class RecipeRecommender:
     
     def get_recommendations(
         self, 
-        recipes_data: List[Dict],
-        selected_ingredients: List[str],
-        selected_leftovers: List[str],
+        recipes_data: List[Dict] = None,
+        selected_ingredients: List[str] = None,
+        selected_leftovers: List[str] = None,
         quiz_preferences: Dict = None,
         user_location: Dict = None,
-        top_k: int = 10
+        top_k: int = 10,
+        ingredient_ids: List[str] = None,
+        filters: Dict = None
     ) -> List[Dict]:
-        """Get personalized recipe recommendations"""
-        
-        # Preprocess recipe data
-        df = self.preprocess_recipe_data(recipes_data)
-        self.recipes_data = df
-        
-        # Create recipe embeddings
-        recipe_features = self.create_recipe_embeddings(df)
-        
-        # Calculate scores for each recipe
-        recipe_scores = []
+        """Get personalized recipe recommendations.
+        
+        ``ingredient_ids`` are canonical ids from ingredient typeahead; they are
+        matched exactly, while free-text ingredients use whole-word matching.
+        ``filters`` are hard constraints (see ``FilterIndex.candidates``): only
+        recipes passing all of them are scored and returned.
+        """
+        index, details = self._rank(
+            recipes_data, selected_ingredients, selected_leftovers, quiz_preferences,
+            user_location, top_k, ingredient_ids, filters
+        )
+        return [{**index.recipes[row], **fields} for row, fields in details]
+    
+    def get_recommendations_json(self, *args, **kwargs) -> Tuple[str, int]:
+        """``get_recommendations`` as a JSON array, spliced from pre-serialized recipes.
+        
+        Takes the same arguments and returns the array text and the number of
+        recommendations in it. Only the per-request match fields are
+        serialized; the recipes come from the index's ``RecipeFragments``.
+        """
+        index, details = self._rank(*args, **kwargs)
+        with stage('serialize'):
+            return index.fragments.array(details), len(details)
+    
+    def _rank(
+        self,
+        recipes_data: List[Dict] = None,
+        selected_ingredients: List[str] = None,
+        selected_leftovers: List[str] = None,
+        quiz_preferences: Dict = None,
+        user_location: Dict = None,
+        top_k: int = 10,
+        ingredient_ids: List[str] = None,
+        filters: Dict = None
+    ) -> Tuple[RecipeIndex, List[Tuple[int, Dict]]]:
+        """Score a query and return the index used with (catalog row, match fields) of the winners"""
+        
+        # Only fit when there is no index yet or a different catalog is passed in
+        index = self.index
+        if index is None or (recipes_data is not None and recipes_data is not self._fitted_source):
+            if recipes_data is None:
+                raise ValueError("Recommender has no index; call fit() or pass recipes_data")
+            index = self.fit(recipes_data)
+        
+        selected_ingredients = selected_ingredients or []
+        selected_leftovers = selected_leftovers or []
+        
+        # Hard filters narrow the catalog to candidate rows through bitmaps first
+        with stage('filter'):
+            rows = index.filters.candidates(filters) if filters else None
+        
+        # Score the whole catalog (or the candidates) at once, one array per component
         all_selected = selected_ingredients + selected_leftovers
-        
-        for idx, recipe in enumerate(recipes_data):
-            score = 0.0
-            
-            # 1. Ingredient similarity (40% weight)
-            ingredient_sim = self.calculate_ingredient_similarity(all_selected, recipe.get('ingredients', []))
-            score += ingredient_sim * 0.4
-            
-            # 2. Quiz preferences (25% weight)
-            if quiz_preferences:
-                quiz_score = self.calculate_quiz_preference_score(quiz_preferences, recipe)
-                score += (quiz_score / 10.0) * 0.25  # Normalize to 0-1
-            
-            # 3. Location preferences (20% weight)
-            if user_location:
-                location_score = self.calculate_location_score(user_location, recipe)
-                score += (location_score / 5.0) * 0.20  # Normalize to 0-1
-            
-            # 4. Recipe popularity/quality (15% weight)
-            popularity_score = 0.0
-            if recipe.get('isHealthy', False):
-                popularity_score += 0.3
-            if recipe.get('isFestive', False):
-                popularity_score += 0.2
-            if recipe.get('rating', 0) > 4.0:
-                popularity_score += 0.3
-            if recipe.get('cookingTime', 0) <= 30:
-                popularity_score += 0.2
-            
-            score += popularity_score * 0.15
-            
-            recipe_scores.append({
-                'recipe': recipe,
-                'score': score,
-                'ingredient_match': ingredient_sim,
-                'quiz_match': self.calculate_quiz_preference_score(quiz_preferences, recipe) if quiz_preferences else 0,
-                'location_match': self.calculate_location_score(user_location, recipe) if user_location else 0,
-                'match_percentage': score * 100
-            })
-        
-        # Sort by score and return top recommendations
-        recipe_scores.sort(key=lambda x: x['score'], reverse=True)
-        
-        # Add match details to recipes
-        recommendations = []
-        for item in recipe_scores[:top_k]:
-            recipe = item['recipe'].copy()
-            recipe['matchScore'] = item['ingredient_match']
-            recipe['matchPercentage'] = item['match_percentage']
-            recipe['quizMatch'] = item['quiz_match']
-            recipe['locationMatch'] = item['location_match']
-            recipe['leftoverCompatibility'] = len([l for l in selected_leftovers if any(l.lower() in ing.lower() for ing in recipe.get('ingredients', []))])
-            recommendations.append(recipe)
-        
-        return recommendations
+        scores = score_recipes(index, all_selected, quiz_preferences, user_location, ingredient_ids, rows)
+        
+        # Select the top recommendations without sorting the whole catalog
+        with stage('select'):
+            order = select_top_k(scores['total'], clamp_top_k(top_k))
+        with stage('match_details'):
+            return index, self._match_details(
+                index, order, scores, selected_leftovers,
+                has_quiz=bool(quiz_preferences), has_location=bool(user_location), rows=rows
+            )
     
-    def save_model(self, filepath: str):
-        """Save the trained model"""
-        model_data = {
-            'tfidf_vectorizer': self.tfidf_vectorizer,
-            'scaler': self.scaler,
-            'label_encoders': self.label_encoders,
-            'rf_model': self.rf_model,
-            'recipe_features': self.recipe_features,
-            'recipe_embeddings': self.recipe_embeddings
+    def get_batch_recommendations(self, queries: List[Dict], top_k: int = 10) -> List[Dict]:
+        """Get recommendations for many queries, scoring them together as a queries x recipes matrix.
+        
+        Each query uses the same keys as the ``/recommend`` payload (``ingredients``,
+        ``leftovers``, ``ingredient_ids``, ``quiz_preferences``, ``user_location``
+        and optionally ``top_k``).
+        Returns one result per query, in order; a query that fails validation or
+        scoring gets an error result without failing the rest of the batch.
+        """
+        index = self.index
+        if index is None:
+            raise ValueError("Recommender has no index; call fit() first")
+        
+        results: List[Dict] = [None] * len(queries)
+        parsed = []
+        for position, query in enumerate(queries):
+            try:
+                parsed.append((position, self._parse_query(query, top_k)))
+            except ValueError as e:
+                results[position] = {"status": "error", "message": str(e)}
+        
+        # Bound the size of the per-chunk score matrices
+        chunk_size = max(1, self.BATCH_CELL_BUDGET // max(1, len(index)))
+        for start in range(0, len(parsed), chunk_size):
+            chunk = parsed[start:start + chunk_size]
+            try:
+                self._score_chunk(index, chunk, results)
+            except Exception:
+                # Isolate the failing query by scoring the chunk one query at a time
+                for item in chunk:
+                    try:
+                        self._score_chunk(index, [item], results)
+                    except Exception as e:
+                        results[item[0]] = {"status": "error", "message": str(e)}
+        
+        return results
+    
+    def _score_chunk(self, index: RecipeIndex, chunk: List[Tuple[int, Dict]], results: List[Dict]):
+        """Score one chunk of parsed batch queries and store their results by position"""
+        queries = [query for _, query in chunk]
+        scores = score_batch(
+            index,
+            [q['ingredients'] + q['leftovers'] for q in queries],
+            [q['quiz_preferences'] for q in queries],
+            [q['user_location'] for q in queries],
+            [q['ingredient_ids'] for q in queries]
+        )
+        for row, (position, query) in enumerate(chunk):
+            row_scores = {name: values if name == 'popularity' else values[row] for name, values in scores.items()}
+            order = select_top_k(row_scores['total'], query['top_k'])
+            recommendations = self._format_recommendations(
+                index, order, row_scores, query['leftovers'],
+                has_quiz=bool(query['quiz_preferences']), has_location=bool(query['user_location'])
+            )
+            results[position] = {
+                "status": "success",
+                "recommendations": recommendations,
+                "count": len(recommendations)
+            }
+    
+    def _parse_query(self, query: Dict, default_top_k: int) -> Dict:
+        """Validate one /recommend or batch query and fill in defaults"""
+        if not isinstance(query, dict):
+            raise ValueError("Query must be an object")
+        
+        ingredients = self._string_list(query, 'ingredients')
+        leftovers = self._string_list(query, 'leftovers')
+        ingredient_ids = self._string_list(query, 'ingredient_ids')
+        if not ingredients and not leftovers and not ingredient_ids:
+            raise ValueError("At least one ingredient or leftover must be selected")
+        
+        quiz_preferences = query.get('quiz_preferences') or {}
+        user_location = query.get('user_location') or {}
+        for name, value in (('quiz_preferences', quiz_preferences), ('user_location', user_location)):
+            if not isinstance(value, dict):
+                raise ValueError(f"'{name}' must be an object")
+        for name, value, fields in (('quiz_preferences', quiz_preferences, self.QUIZ_TEXT_FIELDS),
+                                    ('user_location', user_location, self.LOCATION_FIELDS)):
+            for field in fields:
+                if field in value and not isinstance(value[field], str):
+                    raise ValueError(f"'{name}.{field}' must be a string")
+        
+        return {
+            'ingredients': ingredients,
+            'leftovers': leftovers,
+            'ingredient_ids': ingredient_ids,
+            'quiz_preferences': quiz_preferences,
+            'user_location': user_location,
+            'top_k': clamp_top_k(self._count(query, 'top_k', default_top_k))
         }
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
-    
-    def load_model(self, filepath: str):
-        """Load a trained model"""
-        with open(filepath, 'rb') as f:
-            model_data = pickle.load(f)
-        
-        self.tfidf_vectorizer = model_data['tfidf_vectorizer']
-        self.scaler = model_data['scaler']
-        self.label_encoders = model_data['label_encoders']
-        self.rf_model = model_data['rf_model']
-        self.recipe_features = model_data['recipe_features']
-        self.recipe_embeddings = model_data['recipe_embeddings']
+    
+    def _parse_cook_now_query(self, query: Dict) -> Dict:
+        """Validate one /recommend/cook-now query and fill in defaults"""
+        if not isinstance(query, dict):
+            raise ValueError("Query must be an object")
+        
+        # Ingredients and leftovers together make up the pantry
+        pantry = self._string_list(query, 'ingredients') + self._string_list(query, 'leftovers')
+        ingredient_ids = self._string_list(query, 'ingredient_ids')
+        if not pantry and not ingredient_ids:
+            raise ValueError("At least one ingredient or leftover must be selected")
+        
+        return {
+            'pantry': pantry,
+            'ingredient_ids': ingredient_ids,
+            'max_missing': self._count(query, 'max_missing', 2),
+            'top_k': clamp_top_k(self._count(query, 'top_k', 10))
+        }
+    
+    @staticmethod
+    def _string_list(query: Dict, name: str) -> List[str]:
+        """``query[name]`` as a list of strings; missing or null is empty"""
+        values = query.get(name) or []
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"'{name}' must be a list of strings")
+        return values
+    
+    @staticmethod
+    def _count(query: Dict, name: str, default: int) -> int:
+        """``query[name]`` as a non-negative integer, ``default`` when missing"""
+        value = query.get(name, default)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"'{name}' must be a non-negative integer")
+        return value
+    
+    def suggest_ingredients(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Canonical ingredients whose name has a word starting with ``prefix``, most used first"""
+        index = self.index
+        if index is None:
+            raise ValueError("Recommender has no index; call fit() first")
+        return index.ingredient_vocabulary.suggest(prefix, limit)
+    
+    def similar(self, recipe_id: str, k: int = 10) -> List[Dict]:
+        """Recipes most similar to ``recipe_id``, read from the precomputed neighbor table"""
+        index = self.index
+        if index is None:
+            raise ValueError("Recommender has no index; call fit() first")
+        row = index.positions.get(recipe_id)
+        if row is None:
+            raise KeyError(f"Unknown recipe id '{recipe_id}'")
+        
+        rows, similarities = index.neighbors.lookup(row, clamp_top_k(k))
+        results = []
+        for neighbor, similarity in zip(rows.tolist(), similarities.tolist()):
+            recipe = index.recipes[neighbor].copy()
+            recipe['similarity'] = similarity
+            results.append(recipe)
+        return results
+    
+    def cook_now(
+        self,
+        pantry: List[str] = None,
+        ingredient_ids: List[str] = None,
+        max_missing: int = 2,
+        top_k: int = 10
+    ) -> List[Dict]:
+        """Recipes missing at most ``max_missing`` of their ingredients, best pantry coverage first.
+        
+        Pantry items cover a recipe's ingredient lines the same way free-text
+        ingredients match them in ``get_recommendations``; ``ingredient_ids``
+        match exactly. Ties in coverage go to the recipe missing fewer lines.
+        Each result carries ``coverage``, ``missingCount`` and ``missingIngredients``.
+        """
+        index = self.index
+        if index is None:
+            raise ValueError("Recommender has no index; call fit() first")
+        if isinstance(max_missing, bool) or not isinstance(max_missing, int) or max_missing < 0:
+            raise ValueError("'max_missing' must be a non-negative integer")
+        
+        ingredient_index = index.ingredient_index
+        term_ids = set()
+        for item in pantry or []:
+            term_ids.update(ingredient_index.matching_terms(item))
+        for item in ingredient_ids or []:
+            term_ids.update(ingredient_index.id_terms.get(ingredient_id(item), []))
+        
+        # One popcount pass over every recipe's ingredient bitset
+        coverage, missing = index.pantry.coverage(sorted(term_ids))
+        candidates = np.flatnonzero((missing <= max_missing) & (coverage > 0))
+        ranked = candidates[np.lexsort((missing[candidates], -coverage[candidates]))]
+        
+        results = []
+        for row in ranked[:clamp_top_k(top_k)].tolist():
+            recipe = index.recipes[row].copy()
+            ingredients = recipe.get('ingredients', [])
+            absent = dict.fromkeys(
+                ingredient for ingredient, term in zip(ingredients, ingredient_index.recipe_terms(ingredients))
+                if term not in term_ids
+            )
+            recipe['coverage'] = float(coverage[row])
+            recipe['missingCount'] = int(missing[row])
+            recipe['missingIngredients'] = list(absent)
+            results.append(recipe)
+        return results
+    
+    def search(self, query: str, limit: int = 20, offset: int = 0, prefix: bool = True) -> Tuple[List[Dict], int]:
+        """Full-text search over titles, descriptions, tags, cuisines and states.
+        
+        Returns one page of matching recipes (best BM25 score first, with a
+        ``searchScore``) and the total number of matches.
+        """
+        index = self.index
+        if index is None:
+            raise ValueError("Recommender has no index; call fit() first")
+        
+        rows, scores, total = index.search_index.search(query, limit, offset, prefix)
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            recipe = index.recipes[row].copy()
+            recipe['searchScore'] = score
+            results.append(recipe)
+        return results, total
+    
+    def _format_recommendations(
+        self,
+        index: RecipeIndex,
+        order: np.ndarray,
+        scores: Dict[str, np.ndarray],
+        selected_leftovers: List[str],
+        has_quiz: bool,
+        has_location: bool,
+        rows: np.ndarray = None
+    ) -> List[Dict]:
+        """Turn ranked recipe rows into response dicts with match details"""
+        details = self._match_details(index, order, scores, selected_leftovers, has_quiz, has_location, rows)
+        return [{**index.recipes[row], **fields} for row, fields in details]
+    
+    def _match_details(
+        self,
+        index: RecipeIndex,
+        order: np.ndarray,
+        scores: Dict[str, np.ndarray],
+        selected_leftovers: List[str],
+        has_quiz: bool,
+        has_location: bool,
+        rows: np.ndarray = None
+    ) -> List[Tuple[int, Dict]]:
+        """Catalog row and per-request match fields of each ranked recipe.
+        
+        ``order`` indexes the score arrays; with ``rows`` those were scored for
+        a candidate subset and ``rows`` maps them back to catalog rows.
+        """
+        details = []
+        for idx in order:
+            row = int(idx if rows is None else rows[idx])
+            score = float(scores['total'][idx])
+            details.append((row, {
+                'matchScore': float(scores['ingredient'][idx]),
+                'matchPercentage': score * 100,
+                'quizMatch': float(scores['quiz'][idx]) if has_quiz else 0,
+                'locationMatch': float(scores['location'][idx]) if has_location else 0,
+                'leftoverCompatibility': len([l for l in selected_leftovers if index.ingredient_index.token_mask(l)[row]])
+            }))
+        
+        return details
+    
+    def save_model(self, filepath: str):
+        """Save the fitted index as a memory-mappable model artifact directory"""
+        if self.index is None:
+            raise ValueError("Recommender has no index; call fit() before save_model()")
+        save_index(self.index, filepath)
+    
+    def load_model(self, filepath: str, expected_catalog_hash: str = None):
+        """Load a model artifact; its matrices are memory-mapped read-only, not copied"""
+        index = load_index(filepath, expected_catalog_hash)
+        
+        with self._write_lock:
+            self.feature_dtype = index.numeric_features.dtype
+            self._publish(index)
+            self._fitted_source = None
+            self._changes_since_fit = 0
 
 # Example usage and testing
 if __name__ == "__main__":
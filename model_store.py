@@ -0,0 +1,269 @@
+"""On-disk model artifact for RecipeIndex, designed to be memory-mapped.
+
+An artifact is a directory:
+
+    meta.json       schema version, catalog hash, TF-IDF vocabulary and settings,
+                    label encoder classes, common ingredient list, numeric column
+                    names and normalization statistics, and an array manifest
+    recipes.json    the catalog the index was built from
+    <name>.npy      one raw array per matrix component (CSR parts, numeric block, idf,
+                    item-item neighbor table)
+
+Arrays are opened with ``np.load(mmap_mode='r')``, so loading does not copy the
+matrices and every process that loads the same artifact shares the same
+page-cache pages. Load time is independent of matrix size.
+
+Loading needs only numpy and scipy: the fitted TF-IDF vectorizer and label
+encoders are rebuilt (importing scikit-learn) the first time an incremental
+update needs them, which queries never do.
+
+Usage (the offline build step):
+    python model_store.py <path>    # fit the compiled catalog and write an artifact
+"""
+import json
+import mmap
+import os
+import shutil
+import sys
+import threading
+import numpy as np
+from scipy import sparse
+from typing import Dict, Any, Callable
+
+from neighbors import NeighborTable
+from recipe_index import RecipeIndex, NumericFeatures
+
+ARTIFACT_FORMAT = 'cookwise-model'
+SCHEMA_VERSION = 4
+
+META_FILE = 'meta.json'
+RECIPES_FILE = 'recipes.json'
+
+
+class ModelArtifactError(Exception):
+    """Raised when a model artifact is missing, corrupt or from another schema version"""
+
+
+def is_memory_mapped(array: np.ndarray) -> bool:
+    """True when ``array``'s buffer is a mapping (a loaded artifact, the shared index of preload.py), not process heap"""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        # np.frombuffer over a mapping keeps a memoryview of it as base
+        array = array.obj if isinstance(array, memoryview) else getattr(array, 'base', None)
+    return False
+
+
+class DeferredEstimator:
+    """A fitted scikit-learn estimator of a loaded artifact, rebuilt on first use.
+
+    ``fitted`` holds the attributes saved in the artifact, which are read
+    without building the estimator (``save_index`` needs nothing else); any
+    other attribute builds it once with ``build(**fitted)``.
+    """
+
+    def __init__(self, build: Callable[..., Any], **fitted: Any):
+        self._build = build
+        self._fitted = fitted
+        self._estimator = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        fitted = self.__dict__.get('_fitted', {})
+        if name in fitted:
+            return fitted[name]
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.estimator, name)
+
+    @property
+    def estimator(self) -> Any:
+        with self._lock:
+            if self._estimator is None:
+                self._estimator = self._build(**self._fitted)
+            return self._estimator
+
+
+def _build_vectorizer(max_features, stop_words, vocabulary_, idf_):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(max_features=max_features, stop_words=stop_words)
+    vectorizer.vocabulary_ = vocabulary_
+    vectorizer.idf_ = idf_
+    return vectorizer
+
+
+def _build_label_encoder(classes_):
+    from sklearn.preprocessing import LabelEncoder
+
+    encoder = LabelEncoder()
+    encoder.classes_ = classes_
+    return encoder
+
+
+def save_index(index: RecipeIndex, path: str):
+    """Write ``index`` as a model artifact directory, replacing any previous one atomically"""
+    arrays = {
+        'embeddings_data': index.recipe_embeddings.data,
+        'embeddings_indices': index.recipe_embeddings.indices,
+        'embeddings_indptr': index.recipe_embeddings.indptr,
+        'numeric_values': index.numeric_features.values,
+        'idf': index.tfidf_vectorizer.idf_,
+        'neighbor_indices': index.neighbors.indices,
+        'neighbor_scores': index.neighbors.scores
+    }
+    if index.numeric_features.scale is not None:
+        arrays['numeric_scale'] = index.numeric_features.scale
+        arrays['numeric_offset'] = index.numeric_features.offset
+
+    vectorizer = index.tfidf_vectorizer
+    meta = {
+        'format': ARTIFACT_FORMAT,
+        'schema_version': SCHEMA_VERSION,
+        'catalog_hash': index.version,
+        'num_recipes': len(index),
+        'embeddings_shape': list(index.recipe_embeddings.shape),
+        'tfidf': {
+            'params': {'max_features': vectorizer.max_features, 'stop_words': vectorizer.stop_words},
+            'vocabulary': {term: int(column) for term, column in vectorizer.vocabulary_.items()}
+        },
+        'label_encoders': {
+            feature: encoder.classes_.tolist() for feature, encoder in index.label_encoders.items()
+        },
+        'common_ingredients': list(index.common_ingredients),
+        'numeric_features': {
+            'columns': index.numeric_features.columns,
+            'dtype': index.numeric_features.dtype,
+            'normalization': {feature: list(stats) for feature, stats in index.normalization.items()}
+        },
+        'arrays': {
+            name: {'dtype': str(array.dtype), 'shape': list(array.shape)} for name, array in arrays.items()
+        }
+    }
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_path, RECIPES_FILE), 'w', encoding='utf-8') as f:
+        json.dump(list(index.recipes), f, ensure_ascii=False, separators=(',', ':'))
+    # meta.json is written last: its presence marks a complete artifact
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def read_meta(path: str) -> Dict[str, Any]:
+    """Read and validate the metadata header of an artifact"""
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        raise ModelArtifactError(f"no model artifact at {path}")
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ModelArtifactError(f"unreadable model artifact metadata at {meta_path}: {e}") from e
+    if not isinstance(meta, dict):
+        raise ModelArtifactError(f"malformed model artifact metadata at {meta_path}")
+    if meta.get('format') != ARTIFACT_FORMAT or meta.get('schema_version') != SCHEMA_VERSION:
+        raise ModelArtifactError(
+            f"unsupported model artifact schema {meta.get('schema_version')!r} (expected {SCHEMA_VERSION})"
+        )
+    return meta
+
+
+def load_arrays(path: str, meta: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Memory-map every array listed in the manifest, read-only"""
+    arrays = {}
+    for name, spec in meta['arrays'].items():
+        array = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+        if str(array.dtype) != spec['dtype'] or list(array.shape) != spec['shape']:
+            raise ModelArtifactError(f"array '{name}' does not match the artifact manifest")
+        arrays[name] = array
+    return arrays
+
+
+def load_index(path: str, expected_catalog_hash: str = None) -> RecipeIndex:
+    """Load an artifact written by ``save_index`` without copying its matrices.
+
+    Any missing, truncated or malformed part of the artifact raises
+    ModelArtifactError, so callers can fall back to fitting.
+    """
+    try:
+        return _load_index(path, expected_catalog_hash)
+    except ModelArtifactError:
+        raise
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise ModelArtifactError(f"corrupt model artifact at {path}: {e}") from e
+
+
+def _load_index(path: str, expected_catalog_hash: str = None) -> RecipeIndex:
+    meta = read_meta(path)
+    if expected_catalog_hash is not None and meta['catalog_hash'] != expected_catalog_hash:
+        raise ModelArtifactError(
+            f"artifact was built for catalog {meta['catalog_hash']}, expected {expected_catalog_hash}"
+        )
+    arrays = load_arrays(path, meta)
+
+    with open(os.path.join(path, RECIPES_FILE), 'r', encoding='utf-8') as f:
+        recipes = json.load(f)
+
+    tfidf = meta['tfidf']
+    vectorizer = DeferredEstimator(
+        _build_vectorizer, vocabulary_=tfidf['vocabulary'], idf_=arrays['idf'], **tfidf['params']
+    )
+    label_encoders = {
+        feature: DeferredEstimator(_build_label_encoder, classes_=np.array(classes))
+        for feature, classes in meta['label_encoders'].items()
+    }
+
+    embeddings = sparse.csr_matrix(
+        (arrays['embeddings_data'], arrays['embeddings_indices'], arrays['embeddings_indptr']),
+        shape=tuple(meta['embeddings_shape']),
+        copy=False
+    )
+    numeric = NumericFeatures.from_arrays(
+        arrays['numeric_values'],
+        meta['numeric_features']['columns'],
+        meta['numeric_features']['dtype'],
+        scale=arrays.get('numeric_scale'),
+        offset=arrays.get('numeric_offset')
+    )
+
+    index = RecipeIndex(
+        recipes=recipes,
+        df=None,
+        tfidf_vectorizer=vectorizer,
+        label_encoders=label_encoders,
+        recipe_embeddings=embeddings,
+        numeric_features=numeric,
+        normalization={
+            feature: tuple(stats) for feature, stats in meta['numeric_features']['normalization'].items()
+        },
+        neighbors=NeighborTable(arrays['neighbor_indices'], arrays['neighbor_scores']),
+        common_ingredients=meta['common_ingredients']
+    )
+    if index.version != meta['catalog_hash']:
+        raise ModelArtifactError("recipes.json does not match the artifact's catalog hash")
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python model_store.py <artifact path>")
+        sys.exit(2)
+
+    from catalog import load_catalog
+    from ml_recipe_recommender import RecipeRecommender
+
+    catalog = load_catalog()
+    recommender = RecipeRecommender()
+    recommender.fit(catalog.recipes, common_ingredients=catalog.collections.get('commonIngredients', []))
+    save_index(recommender.index, sys.argv[1])
+    print(f"Wrote {sys.argv[1]} (catalog {recommender.index.version}, {len(catalog.recipes)} recipes)")
@@ -0,0 +1,140 @@
+import numpy as np
+from scipy import sparse
+from typing import Tuple
+
+# Neighbors kept per recipe, i.e. the largest k served by RecipeRecommender.similar
+NEIGHBOR_COUNT = 20
+
+# Upper bound on rows x recipes similarity cells held at once while building
+BLOCK_CELL_BUDGET = 2_000_000
+
+
+class NeighborTable:
+    """Top-N most similar recipes of every recipe, computed once per index.
+
+    Similarity is the cosine of the TF-IDF embeddings, which the vectorizer
+    L2-normalizes, so it is a plain dot product. Row ``i`` holds neighbor rows
+    best first (ties broken by catalog position), padded with -1 and a score of
+    0 when a recipe shares terms with fewer than ``num_neighbors`` others.
+    """
+
+    def __init__(self, indices: np.ndarray, scores: np.ndarray):
+        self.indices = indices
+        self.scores = scores
+        for array in (self.indices, self.scores):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+    @property
+    def num_neighbors(self) -> int:
+        return self.indices.shape[1]
+
+    @classmethod
+    def build(cls, embeddings: sparse.csr_matrix, num_neighbors: int = NEIGHBOR_COUNT) -> 'NeighborTable':
+        """Blocked all-pairs computation; never materializes the recipes x recipes matrix"""
+        num_recipes = embeddings.shape[0]
+        indices = np.full((num_recipes, num_neighbors), -1, dtype=np.int32)
+        scores = np.zeros((num_recipes, num_neighbors), dtype=np.float32)
+        _fill_rows(embeddings, np.arange(num_recipes), indices, scores)
+        return cls(indices, scores)
+
+    def lookup(self, row: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and scores of the ``k`` nearest neighbors of ``row``, best first"""
+        neighbors = self.indices[row, :k]
+        valid = neighbors >= 0
+        return neighbors[valid], self.scores[row, :k][valid]
+
+    def updated(self, embeddings: sparse.csr_matrix, row_map: np.ndarray, fresh_rows: np.ndarray) -> 'NeighborTable':
+        """Table for an incrementally updated index (see ``RecipeIndex.updated``).
+
+        Gives the same result as ``build`` on the new embeddings. Fresh rows, and
+        rows that lost a listed neighbor to a removal or replacement, are
+        recomputed; every other row only merges in its similarity to the fresh rows.
+        """
+        num_recipes = embeddings.shape[0]
+        num_neighbors = self.num_neighbors
+        indices = np.full((num_recipes, num_neighbors), -1, dtype=np.int32)
+        scores = np.zeros((num_recipes, num_neighbors), dtype=np.float32)
+
+        surviving = np.flatnonzero(row_map >= 0)
+        old_lists = np.asarray(self.indices[surviving])
+        remapped = np.where(old_lists >= 0, row_map[np.maximum(old_lists, 0)], -1)
+        lost = ((old_lists >= 0) & (remapped < 0)).any(axis=1)
+        destinations = row_map[surviving]
+        indices[destinations] = remapped
+        scores[destinations] = self.scores[surviving]
+
+        if len(fresh_rows):
+            fresh = embeddings[fresh_rows]
+            merge_rows = destinations[~lost]
+            block_rows = _block_rows(len(fresh_rows) + num_neighbors)
+            for start in range(0, len(merge_rows), block_rows):
+                block = merge_rows[start:start + block_rows]
+                # Same product orientation as _fill_rows, so scores are bit-identical
+                similarity = np.asarray(fresh @ embeddings[block].toarray().T).T
+                candidates = np.hstack([indices[block], np.broadcast_to(fresh_rows, similarity.shape)])
+                candidate_scores = np.hstack([scores[block], similarity])
+                order = np.argsort(candidates, axis=1, kind='stable')
+                _select(
+                    block,
+                    np.take_along_axis(candidate_scores, order, axis=1),
+                    np.take_along_axis(candidates, order, axis=1),
+                    indices,
+                    scores
+                )
+
+        _fill_rows(embeddings, np.union1d(fresh_rows, destinations[lost]).astype(np.int64), indices, scores)
+        return NeighborTable(indices, scores)
+
+
+def _block_rows(num_columns: int) -> int:
+    return max(1, BLOCK_CELL_BUDGET // max(1, num_columns))
+
+
+def _fill_rows(embeddings: sparse.csr_matrix, rows: np.ndarray, indices: np.ndarray, scores: np.ndarray):
+    """Compute the neighbor lists of ``rows`` in blocks, writing into ``indices``/``scores``"""
+    num_recipes = embeddings.shape[0]
+    block_rows = _block_rows(num_recipes)
+    columns = np.arange(num_recipes)
+    for start in range(0, len(rows), block_rows):
+        block = rows[start:start + block_rows]
+        # (recipes x vocabulary) sparse @ dense (vocabulary x block), transposed to block x recipes
+        similarity = np.asarray(embeddings @ embeddings[block].toarray().T).T
+        similarity[np.arange(len(block)), block] = 0.0
+        _select(block, similarity, columns, indices, scores)
+
+
+def _select(rows: np.ndarray, similarity: np.ndarray, candidates: np.ndarray, indices: np.ndarray, scores: np.ndarray):
+    """Keep each row's best positive candidates: score descending, then position ascending.
+
+    ``candidates`` gives the recipe row of every column of ``similarity`` (one
+    vector shared by all rows, or one row each) and must be ascending along
+    each row, so the first tied columns are the lowest positions.
+    """
+    num_neighbors = min(indices.shape[1], similarity.shape[1])
+    if num_neighbors == 0 or not len(rows):
+        return
+
+    # Exactly num_neighbors columns per row: everything above the k-th largest
+    # score, then as many of the ties at the k-th score as fit, leftmost first
+    kth = -np.partition(-similarity, num_neighbors - 1, axis=1)[:, num_neighbors - 1, None]
+    above = similarity > kth
+    ties = similarity == kth
+    room = num_neighbors - above.sum(axis=1)
+    crowded = np.flatnonzero(ties.sum(axis=1) > room)
+    if len(crowded):
+        ties[crowded] &= np.cumsum(ties[crowded], axis=1, dtype=np.int32) <= room[crowded, None]
+    chosen = (above | ties) & (similarity > 0)
+
+    block_row, column = np.nonzero(chosen)
+    values = similarity[block_row, column]
+    neighbor = candidates[column] if candidates.ndim == 1 else candidates[block_row, column]
+    order = np.lexsort((neighbor, -values, block_row))
+    block_row, neighbor, values = block_row[order], neighbor[order], values[order]
+    counts = np.bincount(block_row, minlength=len(rows))
+    slot = np.arange(len(block_row)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    indices[rows] = -1
+    scores[rows] = 0.0
+    indices[rows[block_row], slot] = neighbor
+    scores[rows[block_row], slot] = values
@@ -0,0 +1,63 @@
+import numpy as np
+from typing import Iterable, List, Sequence, Tuple
+
+# Set bits of every byte value, for popcount over words viewed as bytes
+_POPCOUNT8 = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Number of set bits in each row of a 2-D unsigned integer array (uint64 words, packed uint8 bitmaps)"""
+    return _POPCOUNT8[np.ascontiguousarray(words).view(np.uint8)].sum(axis=1, dtype=np.int64)
+
+
+class PantryIndex:
+    """Per-recipe ingredient bitsets for "what can I cook with what I have?".
+
+    Bit ``j`` of a recipe's bitset stands for its ``j``-th distinct ingredient
+    line (an ``IngredientIndex`` term), so a recipe needs ``ceil(lines / 64)``
+    uint64 words. Bits are stored term-major: a pantry sets the bits of the
+    terms it matches across the catalog, and one popcount pass gives every
+    recipe's covered line count.
+    """
+
+    def __init__(self, term_lists: Sequence[Sequence[int]], num_terms: int):
+        self.sizes = np.zeros(len(term_lists), dtype=np.int64)
+        terms: List[int] = []
+        rows: List[int] = []
+        slots: List[int] = []
+        for row, term_ids in enumerate(term_lists):
+            recipe_terms = list(dict.fromkeys(term_ids))
+            self.sizes[row] = len(recipe_terms)
+            terms.extend(recipe_terms)
+            rows.extend([row] * len(recipe_terms))
+            slots.extend(range(len(recipe_terms)))
+
+        self.num_words = max(1, -(-int(self.sizes.max(initial=0)) // 64))
+        terms = np.array(terms, dtype=np.int64)
+        order = np.argsort(terms, kind='stable')
+        slots = np.array(slots, dtype=np.int64)[order]
+        self.rows = np.array(rows, dtype=np.int32)[order]
+        self.words = (slots // 64).astype(np.int32)
+        self.bits = np.left_shift(np.uint64(1), (slots % 64).astype(np.uint64))
+        self.offsets = np.zeros(num_terms + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum(np.bincount(terms, minlength=num_terms))
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.words.nbytes + self.bits.nbytes + self.offsets.nbytes
+
+    def covered(self, term_ids: Iterable[int]) -> np.ndarray:
+        """Distinct ingredient lines of every recipe covered by the pantry ``term_ids``"""
+        term_ids = np.fromiter(term_ids, dtype=np.int64)
+        have = np.zeros((len(self.sizes), self.num_words), dtype=np.uint64)
+        if len(term_ids):
+            starts, ends = self.offsets[term_ids], self.offsets[term_ids + 1]
+            postings = np.concatenate([np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist())])
+            np.bitwise_or.at(have, (self.rows[postings], self.words[postings]), self.bits[postings])
+        return popcount(have)
+
+    def coverage(self, term_ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(fraction of lines covered, number of lines missing) for every recipe"""
+        covered = self.covered(term_ids)
+        return covered / np.maximum(self.sizes, 1), self.sizes - covered
+
@@ -0,0 +1,130 @@
+"""Share one RecipeIndex between pre-forked server workers (gunicorn preload).
+
+With ``preload_app`` the gunicorn master imports the app, so the index is
+built once and forked workers inherit it copy-on-write. Two things would
+still give every worker its own copy:
+
+- structures the index builds on first use (neighbor table, search index,
+  filter bitmaps, JSON fragments, ...) would be built again by each worker;
+- arrays allocated on the Python heap share pages with objects whose
+  reference counts change on every request, and each write copies the page.
+
+``share_index`` builds the lazy structures in the master and moves every
+array of the index into a single read-only shared mapping, which workers
+read without ever writing to it. gunicorn.conf.py then freezes the
+remaining Python objects (``gc.freeze``), so collections in the workers do
+not write to them either. Arrays already memory-mapped from a model
+artifact (COOKWISE_MODEL_PATH) are shared through the page cache and left
+as they are.
+"""
+import mmap
+import os
+import tempfile
+from typing import Dict, Any, Callable, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from model_store import is_memory_mapped
+from recipe_index import RecipeIndex
+
+# Modules whose objects are searched for arrays to share
+INDEX_MODULES = frozenset({
+    'recipe_index', 'neighbors', 'search_index', 'pantry', 'filters', 'ingredients', 'model_store'
+})
+
+# Arrays in the shared mapping start on cache-line boundaries
+ALIGNMENT = 64
+
+
+def share_index(index: RecipeIndex) -> Dict[str, int]:
+    """Build every lazy structure of ``index`` and move its arrays into shared memory.
+
+    Arrays are replaced in place (the index stays the same object) by
+    read-only views of one anonymous shared mapping. Returns the number of
+    arrays moved and the size of the mapping in bytes.
+    """
+    for name in ('neighbors', 'search_index', 'ingredient_vocabulary', 'pantry', 'filters', 'fragments'):
+        getattr(index, name)
+
+    arrays: Dict[int, np.ndarray] = {}
+    _replace_arrays(index, lambda array: arrays.setdefault(id(array), array), {})
+    arrays = {key: array for key, array in arrays.items() if _shareable(array)}
+
+    offsets, size = {}, 0
+    for key, array in arrays.items():
+        offsets[key] = size
+        size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    if not arrays:
+        return {'arrays': 0, 'bytes': 0}
+
+    fd = _anonymous_file(size)
+    try:
+        with mmap.mmap(fd, size, access=mmap.ACCESS_WRITE) as target:
+            for key, array in arrays.items():
+                start = offsets[key]
+                target[start:start + array.nbytes] = np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+        # Mapped again without write permission: workers can only read it
+        buffer = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    shared = {
+        key: np.frombuffer(buffer, dtype=array.dtype, count=array.size, offset=offsets[key]).reshape(array.shape)
+        for key, array in arrays.items()
+    }
+    _replace_arrays(index, lambda array: shared.get(id(array), array), {})
+    return {'arrays': len(shared), 'bytes': size}
+
+
+def _shareable(array: np.ndarray) -> bool:
+    return array.nbytes > 0 and not array.dtype.hasobject and not is_memory_mapped(array)
+
+
+def _anonymous_file(size: int) -> int:
+    """Descriptor of an unnamed ``size``-byte file in memory (or in the temp directory)"""
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('cookwise-index')
+    else:
+        with tempfile.TemporaryFile() as f:
+            fd = os.dup(f.fileno())
+    os.ftruncate(fd, size)
+    return fd
+
+
+def _replace_arrays(value: Any, replace: Callable[[np.ndarray], np.ndarray], seen: Dict[int, Tuple[Any, Any]]) -> Any:
+    """``value`` with every reachable array passed through ``replace``.
+
+    Dicts, lists, sparse matrices and index objects are updated in place
+    and tuples rebuilt, each only where an item changed. ``seen`` maps the
+    id of every visited object to (object, result), keeping both alive.
+    """
+    if isinstance(value, np.ndarray):
+        return replace(value)
+    if id(value) in seen:
+        return seen[id(value)][1]
+    seen[id(value)] = (value, value)
+    if sparse.issparse(value):
+        for name in ('data', 'indices', 'indptr'):
+            if hasattr(value, name):
+                setattr(value, name, replace(getattr(value, name)))
+    elif isinstance(value, dict):
+        for key, item in list(value.items()):
+            new = _replace_arrays(item, replace, seen)
+            if new is not item:
+                value[key] = new
+    elif isinstance(value, list):
+        for position, item in enumerate(value):
+            new = _replace_arrays(item, replace, seen)
+            if new is not item:
+                value[position] = new
+    elif type(value) is tuple:
+        items = [_replace_arrays(item, replace, seen) for item in value]
+        if any(new is not old for new, old in zip(items, value)):
+            seen[id(value)] = (value, tuple(items))
+            return seen[id(value)][1]
+    elif type(value).__module__ in INDEX_MODULES and hasattr(value, '__dict__'):
+        for name, item in list(vars(value).items()):
+            new = _replace_arrays(item, replace, seen)
+            if new is not item:
+                setattr(value, name, new)
+    return value
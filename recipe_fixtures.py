@@ -0,0 +1,110 @@
+"""Synthetic catalog and queries shared by the recommender tests"""
+import random
+
+from ml_recipe_recommender import RecipeRecommender
+
+
+INGREDIENTS = [
+    'rice', 'basmati rice', 'dal', 'urad dal', 'onion', 'tomato', 'potato',
+    'chicken', 'mutton', 'paneer', 'yogurt', 'ghee', 'wheat flour', 'spices',
+    'coconut', 'curry leaves', 'mustard seeds', 'green chillies', 'fish', 'oil'
+]
+STATES = [
+    ('Punjab', 'North'), ('Gujarat', 'West'), ('Maharashtra', 'West'),
+    ('Karnataka', 'South'), ('Kerala', 'South'), ('West Bengal', 'East')
+]
+CUISINES = ['North Indian', 'South Indian', 'Gujarati', 'Bengali', 'Maharashtrian']
+
+QUERIES = [
+    {
+        'selected_ingredients': ['rice', 'tomato', 'onion'],
+        'selected_leftovers': ['dal'],
+        'quiz_preferences': {
+            'diet': 'Vegetarian',
+            'spiceLevel': 'Medium',
+            'cookingTime': 'Quick',
+            'cuisine': 'Indian',
+            'healthFocus': 'Healthy'
+        },
+        'user_location': {'state': 'Maharashtra', 'region': 'West'},
+        'top_k': 5
+    },
+    {
+        'selected_ingredients': ['Chicken', ' spices '],
+        'selected_leftovers': [],
+        'quiz_preferences': {'diet': 'Non-Vegetarian', 'cookingTime': 'Long'},
+        'user_location': {'region': 'South'},
+        'top_k': 10
+    },
+    {
+        'selected_ingredients': ['paneer'],
+        'selected_leftovers': ['leftover rice'],
+        'quiz_preferences': {},
+        'user_location': {},
+        'top_k': 3
+    }
+]
+
+
+def make_catalog(n=60, seed=7):
+    """Deterministic synthetic catalog following the Recipe schema"""
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(n):
+        state, region = rng.choice(STATES)
+        diet = rng.choice([['Veg'], ['Veg', 'Vegan'], ['Non-Veg'], ['Veg', 'Gluten-Free']])
+        recipes.append({
+            'id': str(i + 1),
+            'title': f'Recipe {i + 1}',
+            'description': f'Test recipe number {i + 1}',
+            'ingredients': rng.sample(INGREDIENTS, rng.randint(3, 8)),
+            'cuisine': rng.choice(CUISINES),
+            'region': region,
+            'state': state,
+            'difficulty': rng.choice(['Quick', 'Medium', 'Long']),
+            'cookingTime': rng.choice([15, 20, 30, 45, 60, 90]),
+            'calories': rng.randint(150, 700),
+            'servings': rng.randint(1, 6),
+            'dietType': diet,
+            'spiceLevel': rng.choice(['Mild', 'Medium', 'Spicy']),
+            'mealType': rng.choice(['Breakfast', 'Lunch', 'Dinner', 'Snacks']),
+            'isHealthy': rng.random() < 0.5,
+            'isFestive': rng.random() < 0.3,
+            'isStreetFood': rng.random() < 0.2,
+            'tags': rng.sample(['curry', 'comfort', 'quick', 'festive', 'spicy'], 2),
+            'rating': rng.choice([3.8, 4.0, 4.2, 4.5, 4.7])
+        })
+    return recipes
+
+
+def reference_recommendations(recipes, selected_ingredients, selected_leftovers,
+                              quiz_preferences=None, user_location=None, top_k=10):
+    """The original per-request scoring loop, kept here as the ranking oracle"""
+    scorer = RecipeRecommender()
+    all_selected = selected_ingredients + selected_leftovers
+    scored = []
+    for recipe in recipes:
+        score = 0.0
+        ingredient_sim = scorer.calculate_ingredient_similarity(all_selected, recipe.get('ingredients', []))
+        score += ingredient_sim * 0.4
+        if quiz_preferences:
+            score += (scorer.calculate_quiz_preference_score(quiz_preferences, recipe) / 10.0) * 0.25
+        if user_location:
+            score += (scorer.calculate_location_score(user_location, recipe) / 5.0) * 0.20
+        popularity_score = 0.0
+        if recipe.get('isHealthy', False):
+            popularity_score += 0.3
+        if recipe.get('isFestive', False):
+            popularity_score += 0.2
+        if recipe.get('rating', 0) > 4.0:
+            popularity_score += 0.3
+        if recipe.get('cookingTime', 0) <= 30:
+            popularity_score += 0.2
+        score += popularity_score * 0.15
+        scored.append((score, recipe))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [(recipe['id'], score) for score, recipe in scored[:top_k]]
+
+
+def ranking(recommendations):
+    return [(r['id'], r['matchPercentage'] / 100) for r in recommendations]
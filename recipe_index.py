@@ -0,0 +1,596 @@
+import threading
+import numpy as np
+from scipy import sparse
+from collections import OrderedDict, namedtuple
+from typing import List, Dict, Any, Callable, Tuple, Sequence, TYPE_CHECKING
+
+from catalog import recipe_digest, recipes_hash
+from filters import FilterIndex
+from fragments import RecipeFragments
+from ingredient_matcher import IngredientMatcher
+from ingredients import IngredientVocabulary, ingredient_id, ingredient_names
+from neighbors import NeighborTable
+from pantry import PantryIndex
+from scoring import popularity_scores
+from search_index import SearchIndex, recipe_text
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class RecipeIndex:
+    """Immutable, precomputed view of a recipe catalog used to answer queries.
+
+    Built once by ``RecipeRecommender.fit`` (at startup or after loading a saved
+    model) so that requests only run scoring against these structures instead of
+    rebuilding the DataFrame, encoders and TF-IDF matrix every time.
+    """
+
+    def __init__(
+        self,
+        recipes: List[Dict],
+        df: 'pd.DataFrame',
+        tfidf_vectorizer: Any,
+        label_encoders: Dict[str, Any],
+        recipe_embeddings: sparse.csr_matrix,
+        numeric_features: 'NumericFeatures',
+        normalization: Dict[str, Tuple[float, float]] = None,
+        ingredient_index: 'IngredientIndex' = None,
+        columns: 'EncodedColumns' = None,
+        digests: Sequence[bytes] = None,
+        neighbors: NeighborTable = None,
+        common_ingredients: Sequence[Dict] = ()
+    ):
+        self.recipes: Tuple[Dict, ...] = tuple(recipes)
+        # Content hash of the catalog; changes whenever any recipe changes
+        self.digests: Tuple[bytes, ...] = tuple(digests or [recipe_digest(recipe) for recipe in self.recipes])
+        self.version = recipes_hash(self.recipes, self.digests)
+        self.df = df
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.label_encoders = dict(label_encoders)
+        # (mean, std) of each normalized numeric feature at fit time
+        self.normalization = dict(normalization or {})
+        self.recipe_embeddings = _readonly_csr(recipe_embeddings)
+        self.numeric_features = numeric_features
+        # Prebuilt structures are passed in by ``updated``; otherwise built from the recipes
+        self.ingredient_index = ingredient_index or IngredientIndex(
+            [recipe.get('ingredients', []) for recipe in self.recipes]
+        )
+        self.columns = columns or EncodedColumns(self.recipes)
+        self.popularity = _readonly(popularity_scores(self.columns))
+        self.positions: Dict[Any, int] = {recipe.get('id'): row for row, recipe in enumerate(self.recipes)}
+        # Curated ingredient list (catalog commonIngredients) offered by typeahead
+        self.common_ingredients: Tuple[Dict, ...] = tuple(common_ingredients)
+        # Item-item neighbor table, full-text index, ingredient vocabulary,
+        # pantry bitsets, filter bitmaps and JSON fragments, built on first use
+        self._neighbors = neighbors
+        self._search_index = None
+        self._ingredient_vocabulary = None
+        self._pantry = None
+        self._filters = None
+        self._fragments = None
+        self._lazy_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    @property
+    def recipe_features(self) -> sparse.csr_matrix:
+        """Combined sparse TF-IDF + numeric feature matrix, assembled on demand"""
+        return sparse.hstack([self.recipe_embeddings, self.numeric_features.to_float32()], format='csr')
+
+    @property
+    def neighbors(self) -> NeighborTable:
+        """Precomputed top-N similar recipes of every recipe, built once on first access"""
+        if self._neighbors is None:
+            with self._lazy_lock:
+                if self._neighbors is None:
+                    self._neighbors = NeighborTable.build(self.recipe_embeddings)
+        return self._neighbors
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """BM25 full-text index over the recipe text fields, built once on first access"""
+        if self._search_index is None:
+            with self._lazy_lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex([recipe_text(recipe) for recipe in self.recipes])
+        return self._search_index
+
+    @property
+    def ingredient_vocabulary(self) -> IngredientVocabulary:
+        """Canonical ingredient ids for typeahead, ranked by recipe count, built once on first access"""
+        if self._ingredient_vocabulary is None:
+            with self._lazy_lock:
+                if self._ingredient_vocabulary is None:
+                    counts = {key: len(rows) for key, rows in self.ingredient_index.id_postings.items()}
+                    self._ingredient_vocabulary = IngredientVocabulary(
+                        counts, self.common_ingredients, self.ingredient_index.id_names
+                    )
+        return self._ingredient_vocabulary
+
+    @property
+    def pantry(self) -> PantryIndex:
+        """Per-recipe ingredient bitsets for cook-now queries, built once on first access"""
+        if self._pantry is None:
+            with self._lazy_lock:
+                if self._pantry is None:
+                    self._pantry = PantryIndex(
+                        [self.ingredient_index.recipe_terms(recipe.get('ingredients', [])) for recipe in self.recipes],
+                        len(self.ingredient_index.vocabulary)
+                    )
+        return self._pantry
+
+    @property
+    def filters(self) -> FilterIndex:
+        """Per-attribute value bitmaps for hard filters, built once on first access"""
+        if self._filters is None:
+            with self._lazy_lock:
+                if self._filters is None:
+                    self._filters = FilterIndex(self.recipes, self.columns)
+        return self._filters
+
+    @property
+    def fragments(self) -> RecipeFragments:
+        """Every recipe pre-serialized to JSON (full and list view), built once on first access"""
+        if self._fragments is None:
+            with self._lazy_lock:
+                if self._fragments is None:
+                    self._fragments = RecipeFragments(self.recipes)
+        return self._fragments
+
+    def updated(
+        self,
+        rows: np.ndarray,
+        fresh_recipes: Sequence[Dict],
+        fresh_embeddings: sparse.csr_matrix,
+        fresh_numeric: np.ndarray
+    ) -> 'RecipeIndex':
+        """New index with rows rearranged, dropped or replaced, leaving this one untouched.
+
+        ``rows[i]`` is the source of row ``i`` of the new index: a row of this index
+        when below ``len(self)``, otherwise ``len(self) + j`` for ``fresh_recipes[j]``.
+        Fresh rows come pre-encoded with this index's fitted vectorizer, encoders
+        and normalization; only they are encoded, everything else is gathered.
+        """
+        num_old = len(self)
+        rows = np.asarray(rows, dtype=np.int64)
+        from_old = rows < num_old
+
+        # Old row -> new row (-1 when dropped or replaced), fresh recipe -> new row
+        row_map = np.full(num_old, -1, dtype=np.int64)
+        row_map[rows[from_old]] = np.flatnonzero(from_old)
+        fresh_rows = np.empty(len(fresh_recipes), dtype=np.int64)
+        fresh_rows[rows[~from_old] - num_old] = np.flatnonzero(~from_old)
+
+        recipes = []
+        digests = []
+        for row in rows.tolist():
+            if row < num_old:
+                recipes.append(self.recipes[row])
+                digests.append(self.digests[row])
+            else:
+                recipes.append(fresh_recipes[row - num_old])
+                digests.append(recipe_digest(recipes[-1]))
+        fresh_embeddings = sparse.csr_matrix(fresh_embeddings, dtype=np.float32)
+        embeddings = sparse.vstack([self.recipe_embeddings, fresh_embeddings], format='csr')[rows]
+        # Carry a built neighbor table over, recomputing only the rows the change touches
+        neighbors = self._neighbors.updated(embeddings, row_map, fresh_rows) if self._neighbors else None
+
+        return RecipeIndex(
+            recipes=recipes,
+            df=None,
+            tfidf_vectorizer=self.tfidf_vectorizer,
+            label_encoders=self.label_encoders,
+            recipe_embeddings=embeddings,
+            numeric_features=self.numeric_features.updated(rows, fresh_numeric),
+            normalization=self.normalization,
+            ingredient_index=self.ingredient_index.updated(
+                row_map, [recipe.get('ingredients', []) for recipe in fresh_recipes], fresh_rows, len(rows)
+            ),
+            columns=self.columns.updated(rows, fresh_recipes),
+            digests=digests,
+            neighbors=neighbors,
+            common_ingredients=self.common_ingredients
+        )
+
+
+class NumericFeatures:
+    """Compact storage for the dense numeric feature block.
+
+    Values are kept as float32 by default. ``float16`` halves that again, and
+    ``int8`` stores each column affinely quantized to 256 levels with a float32
+    per-column scale and offset. Consumers read through ``to_float32``.
+    """
+
+    DTYPES = ('float32', 'float16', 'int8')
+
+    def __init__(self, values: np.ndarray, columns: List[str], dtype: str = 'float32'):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported feature dtype '{dtype}', expected one of {self.DTYPES}")
+        values = np.asarray(values, dtype=np.float32)
+        self.columns = list(columns)
+        self.dtype = dtype
+        self.scale = None
+        self.offset = None
+
+        if dtype == 'int8':
+            low = values.min(axis=0) if len(values) else np.zeros(values.shape[1], dtype=np.float32)
+            high = values.max(axis=0) if len(values) else low
+            scale = (high - low) / 255.0
+            scale[scale == 0] = 1.0
+            self.offset = _readonly(low.astype(np.float32))
+            self.scale = _readonly(scale.astype(np.float32))
+        self.values = _readonly(self.encode(values))
+
+    def encode(self, values: np.ndarray) -> np.ndarray:
+        """Convert float rows to the storage dtype (int8 uses the fitted scale and offset)"""
+        values = np.asarray(values, dtype=np.float32)
+        if self.dtype == 'int8':
+            quantized = np.rint((values - self.offset) / self.scale) - 128
+            return np.clip(quantized, -128, 127).astype(np.int8)
+        return values.astype(self.dtype)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        values: np.ndarray,
+        columns: List[str],
+        dtype: str,
+        scale: np.ndarray = None,
+        offset: np.ndarray = None
+    ) -> 'NumericFeatures':
+        """Wrap already-encoded arrays (e.g. memory-mapped from disk) without copying"""
+        features = cls.__new__(cls)
+        features.columns = list(columns)
+        features.dtype = dtype
+        features.values = _readonly(values)
+        features.scale = _readonly(scale) if scale is not None else None
+        features.offset = _readonly(offset) if offset is not None else None
+        return features
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        extra = 0 if self.scale is None else self.scale.nbytes + self.offset.nbytes
+        return self.values.nbytes + extra
+
+    def updated(self, rows: np.ndarray, fresh_values: np.ndarray) -> 'NumericFeatures':
+        """Rows gathered from this block and ``fresh_values`` (see ``RecipeIndex.updated``)"""
+        fresh = self.encode(np.asarray(fresh_values, dtype=np.float32).reshape(-1, self.values.shape[1]))
+        values = np.concatenate([self.values, fresh])[rows]
+        return NumericFeatures.from_arrays(values, self.columns, self.dtype, self.scale, self.offset)
+
+    def to_float32(self) -> np.ndarray:
+        """Dequantized float32 view of the block"""
+        if self.dtype == 'int8':
+            return (self.values.astype(np.float32) + 128) * self.scale + self.offset
+        return self.values.astype(np.float32, copy=False)
+
+
+class EncodedColumns:
+    """Column-wise encoding of the recipe attributes used by the scoring engine.
+
+    Every flag is computed with the same expression the scalar scoring methods use
+    on a recipe dict, so vectorized scores are identical to the per-recipe ones.
+    Categorical attributes are stored as integer codes into a tuple of values.
+    """
+
+    def __init__(self, recipes: Sequence[Dict]):
+        self.num_recipes = len(recipes)
+
+        # Diet flags
+        self.is_veg = _flags('Veg' in r.get('dietType', []) for r in recipes)
+        self.is_vegan = _flags('Vegan' in r.get('dietType', []) for r in recipes)
+        self.is_non_veg = _flags('Non-Veg' in r.get('dietType', []) for r in recipes)
+
+        # Categorical attributes (spice compared verbatim, the rest case-insensitively)
+        self.spice_levels, self.spice_codes = _encode(r.get('spiceLevel', '') for r in recipes)
+        self.cuisines, self.cuisine_codes = _encode(r.get('cuisine', '').lower() for r in recipes)
+        self.states, self.state_codes = _encode(r.get('state', '').lower() for r in recipes)
+        self.regions, self.region_codes = _encode(r.get('region', '').lower() for r in recipes)
+
+        # Numeric attributes and quality flags
+        self.cooking_time = _readonly(np.array([r.get('cookingTime', 0) for r in recipes], dtype=np.float64))
+        self.rating = _readonly(np.array([r.get('rating', 0) for r in recipes], dtype=np.float64))
+        self.is_healthy = _flags(r.get('isHealthy', False) for r in recipes)
+        self.is_festive = _flags(r.get('isFestive', False) for r in recipes)
+
+    # Per-row arrays, and (value table, codes) pairs of the categorical attributes
+    _ROW_ARRAYS = ('is_veg', 'is_vegan', 'is_non_veg', 'cooking_time', 'rating', 'is_healthy', 'is_festive')
+    _CATEGORICAL = (
+        ('spice_levels', 'spice_codes'), ('cuisines', 'cuisine_codes'),
+        ('states', 'state_codes'), ('regions', 'region_codes')
+    )
+
+    def updated(self, rows: np.ndarray, fresh_recipes: Sequence[Dict]) -> 'EncodedColumns':
+        """Columns with rows gathered from these and ``fresh_recipes`` (see ``RecipeIndex.updated``).
+
+        Only the fresh recipes are encoded. Value tables keep their existing codes
+        and grow with unseen values; values no longer used stay until the next fit.
+        """
+        fresh = EncodedColumns(fresh_recipes)
+        columns = EncodedColumns.__new__(EncodedColumns)
+        columns.num_recipes = len(rows)
+        for name in self._ROW_ARRAYS:
+            setattr(columns, name, _readonly(np.concatenate([getattr(self, name), getattr(fresh, name)])[rows]))
+        for values_name, codes_name in self._CATEGORICAL:
+            table = {value: code for code, value in enumerate(getattr(self, values_name))}
+            remap = np.array(
+                [table.setdefault(value, len(table)) for value in getattr(fresh, values_name)], dtype=np.int32
+            )
+            fresh_codes = remap[getattr(fresh, codes_name)] if len(remap) else getattr(fresh, codes_name)
+            codes = np.concatenate([getattr(self, codes_name), fresh_codes])[rows]
+            setattr(columns, values_name, tuple(table))
+            setattr(columns, codes_name, _readonly(codes.astype(np.int32)))
+        return columns
+
+    def subset(self, rows: np.ndarray) -> 'EncodedColumns':
+        """Columns of just ``rows``, sharing the value tables, for scoring a candidate set"""
+        columns = EncodedColumns.__new__(EncodedColumns)
+        columns.num_recipes = len(rows)
+        for name in self._ROW_ARRAYS:
+            setattr(columns, name, getattr(self, name)[rows])
+        for values_name, codes_name in self._CATEGORICAL:
+            setattr(columns, values_name, getattr(self, values_name))
+            setattr(columns, codes_name, getattr(self, codes_name)[rows])
+        return columns
+
+    def code_of(self, values: Tuple, value: Any) -> int:
+        """Code of ``value`` in one of the categorical value tables, or -1 if unseen"""
+        try:
+            return values.index(value)
+        except ValueError:
+            return -1
+
+
+class IngredientIndex:
+    """Inverted index from normalized ingredient strings to the recipes that use them.
+
+    A query token matches a recipe when its words occur, whole, in one of the
+    recipe's ingredients or one of the ingredients occurs in it, after
+    lowercasing, singularizing and resolving synonyms, exactly like
+    ``RecipeRecommender.calculate_ingredient_similarity``. Matching is resolved
+    once per token by an ``IngredientMatcher`` compiled over the (small)
+    ingredient vocabulary instead of against every ingredient of every recipe.
+    Canonical ingredient ids (see ``ingredients.canonical_ingredients``) are
+    matched exactly instead; ids are normalized the same way, so "curd" and
+    "yogurt" lines share the id "yogurt".
+    """
+
+    def __init__(self, ingredient_lists: Sequence[Sequence[str]], token_cache_bytes: int = 64 * 2 ** 20):
+        postings: Dict[str, set] = {}
+        for recipe_id, ingredients in enumerate(ingredient_lists):
+            for term in self._terms(ingredients):
+                postings.setdefault(term, set()).add(recipe_id)
+        self._build(
+            {term: np.fromiter(sorted(ids), dtype=np.int32) for term, ids in postings.items()},
+            len(ingredient_lists),
+            token_cache_bytes
+        )
+
+    def _build(self, postings: Dict[str, np.ndarray], num_recipes: int, token_cache_bytes: int):
+        self.num_recipes = num_recipes
+        self.token_cache_bytes = token_cache_bytes
+
+        self.vocabulary: Tuple[str, ...] = tuple(sorted(postings))
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(self.vocabulary)}
+        self.postings: Tuple[np.ndarray, ...] = tuple(_readonly(postings[term]) for term in self.vocabulary)
+        # Term ids are matcher positions, since the vocabulary is already distinct
+        self.matcher = IngredientMatcher(self.vocabulary)
+
+        # Canonical ingredient id -> recipes (terms, names as written), for exact lookups of typeahead ids
+        id_postings: Dict[str, List[np.ndarray]] = {}
+        self.id_terms: Dict[str, List[int]] = {}
+        self.id_names: Dict[str, List[str]] = {}
+        for term in self.vocabulary:
+            for name in ingredient_names(term):
+                key = ingredient_id(name)
+                if not key:
+                    continue
+                if self.term_ids[term] not in self.id_terms.get(key, ()):
+                    id_postings.setdefault(key, []).append(postings[term])
+                    self.id_terms.setdefault(key, []).append(self.term_ids[term])
+                if name not in self.id_names.setdefault(key, []):
+                    self.id_names[key].append(name)
+        self.id_postings: Dict[str, np.ndarray] = {
+            key: _readonly(np.unique(np.concatenate(arrays)).astype(np.int32)) for key, arrays in id_postings.items()
+        }
+
+        # Matching rows per query token; sized by bytes, since a common token matches most of the catalog
+        self._token_rows = RowCache(self._compute_token_rows, token_cache_bytes)
+
+    @staticmethod
+    def _terms(ingredients: Sequence[str]):
+        return (ingredient.lower().strip() for ingredient in ingredients)
+
+    def updated(
+        self,
+        row_map: np.ndarray,
+        fresh_lists: Sequence[Sequence[str]],
+        fresh_rows: np.ndarray,
+        num_recipes: int
+    ) -> 'IngredientIndex':
+        """Index after renumbering rows and adding fresh ones, without rescanning unchanged recipes.
+
+        ``row_map[old_row]`` is the row's new id (-1 if dropped or replaced) and
+        ``fresh_rows[j]`` the new id of the recipe with ingredients ``fresh_lists[j]``.
+        Work is proportional to the vocabulary plus the fresh ingredients.
+        """
+        postings: Dict[str, np.ndarray] = {}
+        for term, ids in zip(self.vocabulary, self.postings):
+            moved = row_map[ids]
+            moved = moved[moved >= 0]
+            if len(moved):
+                postings[term] = moved
+
+        fresh: Dict[str, set] = {}
+        for row, ingredients in zip(fresh_rows.tolist(), fresh_lists):
+            for term in self._terms(ingredients):
+                fresh.setdefault(term, set()).add(row)
+        for term, ids in fresh.items():
+            added = np.fromiter(ids, dtype=np.int64)
+            postings[term] = np.concatenate([postings[term], added]) if term in postings else added
+
+        index = IngredientIndex.__new__(IngredientIndex)
+        index._build(
+            {term: np.unique(ids).astype(np.int32) for term, ids in postings.items()},
+            num_recipes,
+            self.token_cache_bytes
+        )
+        return index
+
+    def recipe_terms(self, ingredients: Sequence[str]) -> List[int]:
+        """Vocabulary ids of a recipe's ingredient lines, in order"""
+        return [self.term_ids[term] for term in self._terms(ingredients)]
+
+    def matching_terms(self, token: str) -> List[int]:
+        """Vocabulary ids of terms that contain ``token`` or are contained in it, as whole words"""
+        return list(self.matcher.matches(token))
+
+    def _compute_token_rows(self, token: str) -> np.ndarray:
+        term_ids = self.matching_terms(token)
+        if not term_ids:
+            return _NO_ROWS
+        if len(term_ids) == 1:
+            return self.postings[term_ids[0]]
+        return _readonly(np.unique(np.concatenate([self.postings[i] for i in term_ids])))
+
+    def token_rows(self, token: str) -> np.ndarray:
+        """Ascending rows of the recipes with at least one ingredient matching ``token``"""
+        return self._token_rows(token.lower().strip())
+
+    def id_rows(self, ingredient: str) -> np.ndarray:
+        """Ascending rows of the recipes using the canonical ingredient ``ingredient`` (an id or a name)"""
+        return self.id_postings.get(ingredient_id(ingredient), _NO_ROWS)
+
+    def token_mask(self, token: str) -> np.ndarray:
+        """Boolean mask of recipes with at least one ingredient matching ``token``"""
+        mask = np.zeros(self.num_recipes, dtype=bool)
+        mask[self.token_rows(token)] = True
+        return mask
+
+    def similarity_matrix(
+        self,
+        selected_lists: Sequence[List[str]],
+        id_lists: Sequence[List[str]] = None,
+        rows: np.ndarray = None
+    ) -> np.ndarray:
+        """Ingredient similarity for many queries at once, as a queries x recipes matrix.
+
+        ``id_lists`` optionally adds canonical ingredient ids to each query; they
+        count like free-text ingredients but match exactly. Distinct tokens across
+        the whole batch are resolved once; the per-query match counts are then a
+        single (queries x tokens) @ (tokens x recipes) product. With ``rows`` only
+        those recipes are scored, one column each.
+        """
+        id_lists = id_lists or [[] for _ in selected_lists]
+        token_columns: Dict[Any, int] = {}
+        query_tokens = []
+        for selected, ids in zip(selected_lists, id_lists):
+            query_tokens.append([
+                token_columns.setdefault(ingredient.lower().strip(), len(token_columns))
+                for ingredient in selected
+            ] + [
+                token_columns.setdefault(('id', ingredient_id(item)), len(token_columns))
+                for item in ids
+            ])
+
+        num_columns = self.num_recipes if rows is None else len(rows)
+        similarities = np.zeros((len(selected_lists), num_columns))
+        if not token_columns:
+            return similarities
+
+        token_counts = np.zeros((len(selected_lists), len(token_columns)), dtype=np.float32)
+        for row, columns in enumerate(query_tokens):
+            np.add.at(token_counts[row], columns, 1.0)
+        token_masks = np.zeros((len(token_columns), num_columns), dtype=np.float32)
+        for token, column in token_columns.items():
+            matched = self.id_postings.get(token[1], _NO_ROWS) if isinstance(token, tuple) else self._token_rows(token)
+            if rows is None:
+                token_masks[column, matched] = 1.0
+            elif len(matched):
+                # Both sides are row ids; matched is sorted, so each row is one binary search
+                positions = np.minimum(np.searchsorted(matched, rows), len(matched) - 1)
+                token_masks[column] = matched[positions] == rows
+
+        # Counts are small integers, so the float32 product is exact
+        counts = (token_counts @ token_masks).astype(np.float64)
+        lengths = np.array([len(columns) for columns in query_tokens], dtype=np.float64)
+        nonempty = lengths > 0
+        similarities[nonempty] = counts[nonempty] / lengths[nonempty, None]
+        return similarities
+
+
+RowCacheInfo = namedtuple('RowCacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'bytes', 'max_bytes'])
+
+
+class RowCache:
+    """Thread-safe LRU cache of row arrays, bounded by the bytes of the arrays it holds.
+
+    ``cache_info()`` reports like ``functools.lru_cache``, plus the bytes held.
+    """
+
+    def __init__(self, compute: Callable[[str], np.ndarray], max_bytes: int):
+        self._compute = compute
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, key: str) -> np.ndarray:
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return rows
+            self._misses += 1
+        rows = self._compute(key)
+        with self._lock:
+            if key not in self._entries and rows.nbytes <= self.max_bytes:
+                self._entries[key] = rows
+                self._bytes += rows.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return rows
+
+    def cache_info(self) -> RowCacheInfo:
+        with self._lock:
+            return RowCacheInfo(self._hits, self._misses, None, len(self._entries), self._bytes, self.max_bytes)
+
+
+def _flags(values) -> np.ndarray:
+    return _readonly(np.fromiter((bool(v) for v in values), dtype=bool))
+
+
+def _encode(values) -> Tuple[Tuple, np.ndarray]:
+    """Factorize values into (unique values in first-seen order, int32 codes)"""
+    table: Dict[Any, int] = {}
+    codes = [table.setdefault(value, len(table)) for value in values]
+    return tuple(table), _readonly(np.array(codes, dtype=np.int32))
+
+
+def _readonly_csr(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Read-only CSR matrix: the underlying data/indices/indptr arrays cannot be written"""
+    matrix = sparse.csr_matrix(matrix)
+    for array in (matrix.data, matrix.indices, matrix.indptr):
+        _readonly(array)
+    return matrix
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    """Mark an array as read-only so a shared index cannot be mutated by a request"""
+    if isinstance(array, np.ndarray):
+        array.flags.writeable = False
+    return array
+
+
+# Shared result of lookups that match no recipe
+_NO_ROWS = _readonly(np.zeros(0, dtype=np.int32))
@@ -0,0 +1,150 @@
+"""Paging, field projection, NDJSON streaming and ETags for the /recipes endpoints.
+
+Shared by ``api/app.py`` and ``api/simple_app.py``; needs nothing beyond Flask.
+"""
+import base64
+import hashlib
+import json
+from typing import Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from flask import Response, jsonify
+
+from fragments import LIST_VIEW_FIELDS, RecipeFragments, project, splice, to_json
+
+# Page size of /recipes when no limit is given, and the largest page served
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+class StaleCursorError(ValueError):
+    """A cursor was issued for a catalog version that is no longer served"""
+
+
+def parse_fields(raw: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Projection from a ``fields=`` parameter; None means whole recipes.
+
+    ``fields=list`` is shorthand for LIST_VIEW_FIELDS; ``id`` is always included.
+    """
+    if not raw:
+        return None
+    if raw == 'list':
+        return LIST_VIEW_FIELDS
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    return tuple(dict.fromkeys(['id'] + fields))
+
+
+def encode_cursor(version: str, offset: int) -> str:
+    """Opaque cursor for the page starting at ``offset`` of catalog ``version``"""
+    return base64.urlsafe_b64encode(f'{version}:{offset}'.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], version: str) -> int:
+    """Offset encoded in ``cursor`` (0 without one).
+
+    Raises StaleCursorError when the catalog changed since the cursor was
+    issued, and ValueError when it is malformed.
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_version, offset = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8').rsplit(':', 1)
+        offset = int(offset)
+    except (ValueError, UnicodeError):
+        raise ValueError("Malformed cursor")
+    if offset < 0:
+        raise ValueError("Malformed cursor")
+    if cursor_version != version:
+        raise StaleCursorError("The catalog changed since this cursor was issued; start again without a cursor")
+    return offset
+
+
+def page(recipes: Sequence[Dict], version: str, cursor: Optional[str], limit: int) -> Tuple[Sequence[Dict], Optional[str]]:
+    """One page of ``recipes`` and the cursor of the next page (None on the last page)"""
+    offset = decode_cursor(cursor, version)
+    end = offset + limit
+    next_cursor = encode_cursor(version, end) if end < len(recipes) else None
+    return recipes[offset:end], next_cursor
+
+
+def listing_etag(version: str, *params: Any) -> str:
+    """Strong ETag of a listing: the catalog version plus the parameters shaping the body"""
+    digest = hashlib.sha256(json.dumps([version, *params], default=str).encode('utf-8')).hexdigest()[:16]
+    return f'{version}-{digest}'
+
+
+def ndjson_lines(recipes: Iterable[Dict], fields: Optional[Sequence[str]]) -> Iterator[str]:
+    """One JSON document per line per recipe, for streaming bulk exports"""
+    for recipe in recipes:
+        yield to_json(project(recipe, fields)) + '\n'
+
+
+def parse_limit(raw: Optional[str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Page size from a ``limit=`` parameter, clamped to [1, MAX_PAGE_SIZE]"""
+    if raw is None or raw == '':
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("'limit' must be a positive integer")
+    if limit < 1:
+        raise ValueError("'limit' must be a positive integer")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def recipes_response(
+    request,
+    recipes: Sequence[Dict],
+    version: str,
+    fragments: RecipeFragments = None
+) -> Response:
+    """GET /recipes for a catalog snapshot identified by ``version``.
+
+    Query parameters: ``cursor`` (from a previous page's ``next_cursor``),
+    ``limit``, ``fields`` (comma-separated or ``list``) and ``format=ndjson``
+    (or ``Accept: application/x-ndjson``), which streams every recipe from the
+    cursor on, one per line, unless a limit is given. Answers 304 when the
+    client's If-None-Match holds the current ETag. Raises ValueError for bad
+    parameters and StaleCursorError for a cursor of an older catalog.
+
+    With ``fragments`` of ``recipes``, full and list-view bodies are joined
+    from the pre-serialized recipes instead of serializing them again.
+    """
+    fields = parse_fields(request.args.get('fields'))
+    cursor = request.args.get('cursor')
+    ndjson = request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+    limit = parse_limit(request.args.get('limit'), default=len(recipes) if ndjson else DEFAULT_PAGE_SIZE)
+    offset = decode_cursor(cursor, version)
+
+    etag = listing_etag(version, fields, offset, limit, ndjson)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    serialized = fragments.view(fields) if fragments is not None else None
+    if ndjson:
+        if serialized is not None:
+            lines = (fragment + '\n' for fragment in serialized[offset:offset + limit])
+        else:
+            lines = ndjson_lines(recipes[offset:offset + limit], fields)
+        response = Response(lines, mimetype=NDJSON_MIMETYPE)
+    else:
+        items, next_cursor = page(recipes, version, cursor, limit)
+        envelope = {
+            "status": "success",
+            "count": len(items),
+            "total": len(recipes),
+            "next_cursor": next_cursor,
+            "version": version
+        }
+        if serialized is not None:
+            body = splice(to_json(envelope), raw={"recipes": '[' + ','.join(serialized[offset:offset + limit]) + ']'})
+            response = Response(body, mimetype='application/json')
+        else:
+            response = jsonify(dict(envelope, recipes=[project(recipe, fields) for recipe in items]))
+    response.set_etag(etag)
+    return response
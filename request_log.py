@@ -0,0 +1,183 @@
+"""Opt-in request log: samples API requests into rotating JSON-lines files.
+
+Each line records one request (method, path, query string, JSON body) with
+its status and duration, which is what ``benchmarks/replay.py`` needs to
+replay production-shaped traffic against a local app.
+
+Enabled per process with environment variables:
+
+    COOKWISE_REQUEST_LOG          1 for logs/requests.jsonl, or a file path
+    COOKWISE_REQUEST_LOG_SAMPLE   fraction of requests recorded (default 1.0)
+
+The request thread only draws the sampling decision and enqueues the entry.
+A daemon thread batches the writes and rotates files by size; when its queue
+is full, entries are dropped (and counted) rather than slowing requests down.
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Dict, Any, Iterable, Optional
+
+from flask import g, request
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LOG_PATH = os.path.join(ROOT_DIR, 'logs', 'requests.jsonl')
+
+# Paths recorded by default by install()
+DEFAULT_PATHS = ('/recommend',)
+
+
+class RequestLogger:
+    """Background, batched, size-rotated JSON-lines writer with rate sampling.
+
+    ``path`` is rotated to ``path.1`` (and ``path.1`` to ``path.2``, keeping
+    ``backup_count`` files) once it reaches ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_LOG_PATH,
+        sample_rate: float = 1.0,
+        max_bytes: int = 50 * 2 ** 20,
+        backup_count: int = 5,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        queue_size: int = 10_000,
+        seed: int = None
+    ):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._random = random.Random(seed)
+        self._queue: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue(maxsize=queue_size)
+        self._counts = {'recorded': 0, 'written': 0, 'dropped': 0, 'sampled_out': 0, 'rotations': 0}
+        self._closed = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='request-log-writer', daemon=True)
+        self._thread.start()
+        # Entries still queued at interpreter exit are written, not lost with the daemon thread
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls) -> Optional['RequestLogger']:
+        """Logger configured by COOKWISE_REQUEST_LOG*, or None when request logging is off"""
+        target = os.environ.get('COOKWISE_REQUEST_LOG', '')
+        if target in ('', '0'):
+            return None
+        return cls(
+            path=DEFAULT_LOG_PATH if target == '1' else target,
+            sample_rate=float(os.environ.get('COOKWISE_REQUEST_LOG_SAMPLE', 1.0))
+        )
+
+    def sampled(self) -> bool:
+        """Draw whether the current request is recorded"""
+        if self.sample_rate >= 1 or self._random.random() < self.sample_rate:
+            return True
+        self._counts['sampled_out'] += 1
+        return False
+
+    def record(self, entry: Dict[str, Any]) -> bool:
+        """Queue ``entry`` for writing; False when it was dropped because the writer is behind"""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._counts['dropped'] += 1
+            return False
+        self._counts['recorded'] += 1
+        return True
+
+    def flush(self):
+        """Block until every queued entry is written"""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._counts, path=self.path, sample_rate=self.sample_rate, queued=self._queue.qsize())
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [entry for entry in batch if entry is not None]
+            try:
+                if entries:
+                    self._write(entries)
+            except OSError as e:
+                print(f"Request log write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(entries) < len(batch):
+                return
+
+    def _write(self, entries: Iterable[Dict[str, Any]]):
+        lines = ''.join(json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str) + '\n'
+                        for entry in entries)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            size = f.tell()
+        self._counts['written'] += lines.count('\n')
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for n in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{n}'):
+                os.replace(f'{self.path}.{n}', f'{self.path}.{n + 1}')
+        os.replace(self.path, f'{self.path}.1')
+        self._counts['rotations'] += 1
+
+
+def install(app, logger: Optional[RequestLogger], paths: Iterable[str] = DEFAULT_PATHS):
+    """Record the requests of ``app`` to ``paths`` with ``logger`` (a no-op without one)"""
+    if logger is None:
+        return
+    paths = frozenset(paths)
+
+    @app.before_request
+    def _start_request_log():
+        if request.path in paths and logger.sampled():
+            g.request_log_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request_log(response):
+        start = g.pop('request_log_start', None)
+        if start is not None:
+            logger.record({
+                'ts': time.time(),
+                'method': request.method,
+                'path': request.path,
+                'query': request.query_string.decode('utf-8', 'replace'),
+                'body': request.get_json(silent=True),
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 3)
+            })
+        return response
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from ingredient_matcher import normalize_ingredient
+
+
+class ResponseCache:
+    """Thread-safe in-process cache with bounded size, LRU eviction and a per-entry TTL.
+
+    Every lookup passes the current index/catalog version; when it differs from
+    the version the cached entries were computed against, the whole cache is
+    dropped, so a catalog change can never serve stale recommendations.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        """Cached value for ``key`` or None; counts a hit or a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Hashable):
+        """Store ``value`` computed against ``version``, evicting the least recently used entry"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+    def _check_version(self, version: Hashable):
+        # Caller holds the lock
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+
+def recommendation_cache_key(
+    selected_ingredients: List[str],
+    selected_leftovers: List[str],
+    quiz_preferences: Dict,
+    user_location: Dict,
+    top_k: int,
+    ingredient_ids: List[str] = (),
+    filters: Dict = None
+) -> Hashable:
+    """Canonical cache key for a /recommend query.
+
+    Only normalizations the scorer itself applies are folded together:
+    ingredient, id and leftover order and case, ingredient whitespace, ids that
+    normalize to the same canonical id ("Curd" and "yogurt"), and the case of the location
+    state/region. Whether quiz/location were provided at all is kept, since it
+    changes the type of the quizMatch/locationMatch fields in the response.
+    Hard filters are kept verbatim.
+    """
+    location = user_location or {}
+    return (
+        tuple(sorted(ingredient.lower().strip() for ingredient in selected_ingredients)),
+        tuple(sorted(leftover.lower() for leftover in selected_leftovers)),
+        tuple(sorted(' '.join(normalize_ingredient(ingredient_id)) for ingredient_id in ingredient_ids)),
+        bool(quiz_preferences),
+        json.dumps(quiz_preferences or {}, sort_keys=True, separators=(',', ':'), default=str),
+        bool(user_location),
+        str(location.get('state', '')).lower(),
+        str(location.get('region', '')).lower(),
+        top_k,
+        json.dumps(filters or {}, sort_keys=True, separators=(',', ':'), default=str)
+    )
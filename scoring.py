@@ -0,0 +1,190 @@
+import numpy as np
+from typing import List, Dict, Sequence, TYPE_CHECKING
+
+from instrumentation import stage
+
+if TYPE_CHECKING:
+    from recipe_index import RecipeIndex, EncodedColumns
+
+# Weight of each normalized component in the final recommendation score
+INGREDIENT_WEIGHT = 0.4
+QUIZ_WEIGHT = 0.25
+LOCATION_WEIGHT = 0.20
+POPULARITY_WEIGHT = 0.15
+
+# Raw component maxima used to normalize quiz and location scores to 0-1
+QUIZ_SCALE = 10.0
+LOCATION_SCALE = 5.0
+
+# Quiz answers that map onto diet flag rows / cooking time bucket rows
+DIET_CHOICES = ('Vegetarian', 'Vegan', 'Non-Vegetarian')
+TIME_CHOICES = ('Quick', 'Medium', 'Long')
+
+# Largest number of recommendations returned for a single query, by both APIs
+MAX_TOP_K = 100
+
+
+def quiz_scores(columns: 'EncodedColumns', quiz_preferences_list: Sequence[Dict]) -> np.ndarray:
+    """Vectorized ``RecipeRecommender.calculate_quiz_preference_score``.
+
+    Returns a queries x recipes matrix; rows for empty preferences are zero.
+    """
+    num_queries = len(quiz_preferences_list)
+    prefs = [quiz or {} for quiz in quiz_preferences_list]
+
+    # Encode each query's answers as row/column codes (-1 = no bonus)
+    diet_codes = np.array([_choice_code(DIET_CHOICES, p.get('diet')) for p in prefs], dtype=np.int64)
+    spice_codes = np.array(
+        [columns.code_of(columns.spice_levels, p.get('spiceLevel', '')) if p else -1 for p in prefs],
+        dtype=np.int64
+    )
+    time_codes = np.array([_choice_code(TIME_CHOICES, p.get('cookingTime', '')) for p in prefs], dtype=np.int64)
+    healthy = np.array([p.get('healthFocus') == 'Healthy' for p in prefs], dtype=bool)
+
+    # Cuisine is a substring match, resolved once per distinct catalog cuisine
+    cuisine_match = np.zeros((num_queries, len(columns.cuisines)), dtype=bool)
+    for row, p in enumerate(prefs):
+        quiz_cuisine = p.get('cuisine', '')
+        if quiz_cuisine:
+            needle = quiz_cuisine.lower()
+            cuisine_match[row] = [needle in cuisine for cuisine in columns.cuisines]
+
+    # Lookup tables with a trailing all-False row for the -1 code
+    diet_table = np.vstack([columns.is_veg, columns.is_vegan, columns.is_non_veg,
+                            np.zeros(columns.num_recipes, dtype=bool)])
+    cooking_time = columns.cooking_time
+    time_table = np.vstack([cooking_time <= 30, (cooking_time > 30) & (cooking_time <= 60),
+                            cooking_time > 60, np.zeros(columns.num_recipes, dtype=bool)])
+
+    score = np.zeros((num_queries, columns.num_recipes))
+    score += np.where(diet_table[diet_codes], 2.0, 0.0)
+    score += np.where((columns.spice_codes[None, :] == spice_codes[:, None]) & (spice_codes[:, None] >= 0), 1.5, 0.0)
+    score += np.where(time_table[time_codes], 1.0, 0.0)
+    score += np.where(cuisine_match[:, columns.cuisine_codes], 1.5, 0.0)
+    score += np.where(healthy[:, None] & columns.is_healthy[None, :], 1.0, 0.0)
+    return score
+
+
+def location_scores(columns: 'EncodedColumns', user_locations: Sequence[Dict]) -> np.ndarray:
+    """Vectorized ``RecipeRecommender.calculate_location_score`` as a queries x recipes matrix"""
+    state_codes = []
+    region_codes = []
+    for location in user_locations:
+        location = location or {}
+        user_state = location.get('state', '').lower()
+        user_region = location.get('region', '').lower()
+        state_codes.append(columns.code_of(columns.states, user_state) if user_state else -1)
+        region_codes.append(columns.code_of(columns.regions, user_region) if user_region else -1)
+    state_codes = np.array(state_codes, dtype=np.int64)[:, None]
+    region_codes = np.array(region_codes, dtype=np.int64)[:, None]
+
+    state_match = (columns.state_codes[None, :] == state_codes) & (state_codes >= 0)
+    region_match = (columns.region_codes[None, :] == region_codes) & (region_codes >= 0)
+
+    # State match takes priority over region match
+    return np.where(state_match, 3.0, np.where(region_match, 2.0, 0.0))
+
+
+def popularity_scores(columns: 'EncodedColumns') -> np.ndarray:
+    """Query-independent recipe popularity/quality score"""
+    score = np.zeros(columns.num_recipes)
+    score += np.where(columns.is_healthy, 0.3, 0.0)
+    score += np.where(columns.is_festive, 0.2, 0.0)
+    score += np.where(columns.rating > 4.0, 0.3, 0.0)
+    score += np.where(columns.cooking_time <= 30, 0.2, 0.0)
+    return score
+
+
+def score_batch(
+    index: 'RecipeIndex',
+    selected_lists: Sequence[List[str]],
+    quiz_preferences_list: Sequence[Dict],
+    user_locations: Sequence[Dict],
+    ingredient_id_lists: Sequence[List[str]] = None,
+    rows: np.ndarray = None
+) -> Dict[str, np.ndarray]:
+    """Score every recipe for a batch of queries, one queries x recipes matrix per component.
+
+    Returns ``ingredient``, ``quiz`` and ``location`` matrices with the raw component
+    scores, the shared ``popularity`` vector, and the weighted ``total`` matrix.
+    Quiz and location rows are all zeros when that query's input is empty.
+    ``ingredient_id_lists`` adds canonical ingredient ids, matched exactly.
+    With ``rows`` (e.g. the survivors of hard filters) only those catalog rows
+    are scored and column ``j`` stands for recipe ``rows[j]``.
+    """
+    with stage('ingredient_match'):
+        ingredient = index.ingredient_index.similarity_matrix(selected_lists, ingredient_id_lists, rows)
+
+    with stage('score'):
+        columns = index.columns if rows is None else index.columns.subset(rows)
+        quiz = quiz_scores(columns, quiz_preferences_list)
+        location = location_scores(columns, user_locations)
+        popularity = index.popularity if rows is None else index.popularity[rows]
+
+        # Same accumulation order as the scalar scorer so totals are bit-identical;
+        # empty inputs contribute exact zeros, which leaves the sum unchanged
+        total = ingredient * INGREDIENT_WEIGHT
+        total += (quiz / QUIZ_SCALE) * QUIZ_WEIGHT
+        total += (location / LOCATION_SCALE) * LOCATION_WEIGHT
+        total += popularity * POPULARITY_WEIGHT
+
+    return {
+        'ingredient': ingredient,
+        'quiz': quiz,
+        'location': location,
+        'popularity': popularity,
+        'total': total
+    }
+
+
+def score_recipes(
+    index: 'RecipeIndex',
+    selected_ingredients: List[str],
+    quiz_preferences: Dict = None,
+    user_location: Dict = None,
+    ingredient_ids: List[str] = None,
+    rows: np.ndarray = None
+) -> Dict[str, np.ndarray]:
+    """Score every recipe in the index for one query, computing each component exactly once.
+
+    Returns one array per component (``ingredient``, ``quiz``, ``location``,
+    ``popularity``) holding the raw component scores, plus the weighted ``total``.
+    ``rows`` restricts scoring to those catalog rows, as in ``score_batch``.
+    """
+    scores = score_batch(
+        index, [selected_ingredients], [quiz_preferences], [user_location], [ingredient_ids or []], rows
+    )
+    return {name: values if name == 'popularity' else values[0] for name, values in scores.items()}
+
+
+def clamp_top_k(top_k: int) -> int:
+    """Clamp a requested result count to [0, MAX_TOP_K]"""
+    return max(0, min(int(top_k), MAX_TOP_K))
+
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row indices of the ``k`` highest scores, best first.
+
+    Uses ``argpartition`` so only the winners are sorted. Ties are broken by
+    catalog position, which is the order a stable descending sort would give.
+    """
+    num_scores = len(scores)
+    k = max(0, min(k, num_scores))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < num_scores:
+        kth_largest = scores[np.argpartition(scores, num_scores - k)[num_scores - k]]
+        above = np.flatnonzero(scores > kth_largest)
+        ties = np.flatnonzero(scores == kth_largest)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(num_scores)
+
+    # Primary key: score descending; secondary: position ascending
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def _choice_code(choices: Sequence[str], value) -> int:
+    """Row of ``value`` in a fixed choice table, or -1 (the all-False row)"""
+    return choices.index(value) if isinstance(value, str) and value in choices else -1
@@ -0,0 +1,133 @@
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import List, Dict, Tuple, Sequence
+
+import numpy as np
+
+from scoring import select_top_k
+
+# Recipe fields indexed for full-text search
+SEARCH_FIELDS = ('title', 'description', 'tags', 'cuisine', 'state')
+
+# BM25 parameters (term frequency saturation and document length normalization)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Most terms a typeahead prefix expands to, most frequent first
+MAX_PREFIX_TERMS = 64
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens of ``text``"""
+    return _TOKEN.findall(text.lower())
+
+
+def recipe_text(recipe: Dict) -> str:
+    """The searchable text of a recipe: its SEARCH_FIELDS joined together"""
+    parts = []
+    for field in SEARCH_FIELDS:
+        value = recipe.get(field)
+        if isinstance(value, list):
+            parts.extend(str(v) for v in value)
+        elif value:
+            parts.append(str(value))
+    return ' '.join(parts)
+
+
+class SearchIndex:
+    """Inverted index with BM25 ranking over the recipe text fields.
+
+    Postings are stored column-wise: the sorted term array gives each term's
+    slice of one int32 document-id array and one uint16 term-frequency array.
+    The sorted term array doubles as the prefix index for typeahead, since all
+    terms starting with a prefix form one contiguous range.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc_id] = sum(counts.values())
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((doc_id, count))
+
+        self.num_docs = len(texts)
+        self.terms: List[str] = sorted(postings)
+        offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in self.terms])
+        self.offsets = offsets
+        self.doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        self.term_freqs = np.empty(offsets[-1], dtype=np.uint16)
+        for i, term in enumerate(self.terms):
+            docs, freqs = zip(*postings[term])
+            self.doc_ids[offsets[i]:offsets[i + 1]] = docs
+            self.term_freqs[offsets[i]:offsets[i + 1]] = np.minimum(freqs, np.iinfo(np.uint16).max)
+
+        self.doc_freqs = np.diff(offsets)
+        self.idf = np.log1p((self.num_docs - self.doc_freqs + 0.5) / (self.doc_freqs + 0.5)).astype(np.float32)
+        average = lengths.mean() if self.num_docs else 0.0
+        # Per-document BM25 length normalization, k1 * (1 - b + b * length / average)
+        self._length_norm = (BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(average, 1e-9))).astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.doc_ids.nbytes + self.term_freqs.nbytes + self.idf.nbytes
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Range of term ids starting with ``prefix`` in the sorted term array"""
+        return bisect_left(self.terms, prefix), bisect_left(self.terms, prefix + '\U0010ffff')
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Indexed terms starting with ``prefix``, by number of matching recipes"""
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+        start, end = self.prefix_range(prefix)
+        term_ids = start + select_top_k(self.doc_freqs[start:end].astype(np.float64), limit)
+        return [{"term": self.terms[i], "recipes": int(self.doc_freqs[i])} for i in term_ids.tolist()]
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, prefix: bool = True) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Rank documents matching any query token: more matched tokens first, then BM25.
+
+        With ``prefix`` the last token also matches longer terms (typeahead); a
+        document scores its best-matching expansion. Returns the document ids and
+        BM25 scores of the requested page, best first, and the total number of matches.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return np.empty(0, dtype=np.intp), np.empty(0), 0
+
+        total = np.zeros(self.num_docs, dtype=np.float32)
+        matched = np.zeros(self.num_docs, dtype=np.int32)
+        for position, token in enumerate(tokens):
+            if prefix and position == len(tokens) - 1:
+                start, end = self.prefix_range(token)
+                term_ids = start + select_top_k(self.doc_freqs[start:end].astype(np.float64), MAX_PREFIX_TERMS)
+            else:
+                term_id = bisect_left(self.terms, token)
+                term_ids = [term_id] if term_id < len(self.terms) and self.terms[term_id] == token else []
+
+            token_scores = np.zeros(self.num_docs, dtype=np.float32)
+            for term_id in term_ids:
+                docs, weights = self._term_scores(int(term_id))
+                token_scores[docs] = np.maximum(token_scores[docs], weights)
+            matched += token_scores > 0
+            total += token_scores
+
+        candidates = np.flatnonzero(matched)
+        scores = total[candidates].astype(np.float64)
+        # BM25 scaled into [0, 1) only breaks ties between equal matched-token counts
+        ranking = matched[candidates] + scores / (scores.max() + 1.0) if len(candidates) else scores
+        order = select_top_k(ranking, offset + limit)[offset:]
+        return candidates[order], total[candidates[order]], len(candidates)
+
+    def _term_scores(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        docs = self.doc_ids[start:end]
+        freqs = self.term_freqs[start:end].astype(np.float32)
+        weights = self.idf[term_id] * freqs * (BM25_K1 + 1) / (freqs + self._length_norm[docs])
+        return docs, weights
@@ -0,0 +1,66 @@
+import os
+import sys
+
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog, ranking
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+
+def test_batch_recommendations_match_single_queries():
+    recipes = make_catalog(50)
+    recommender = RecipeRecommender()
+    recommender.fit(recipes)
+    # Force several chunks to exercise the chunked matrix path
+    recommender.BATCH_CELL_BUDGET = 2 * len(recipes)
+
+    queries = [
+        {
+            'ingredients': q['selected_ingredients'],
+            'leftovers': q['selected_leftovers'],
+            'quiz_preferences': q['quiz_preferences'],
+            'user_location': q['user_location'],
+            'top_k': q['top_k']
+        }
+        for q in QUERIES
+    ]
+    queries.insert(1, {'ingredients': []})
+    queries.append('not a query')
+    queries.append({'ingredients': ['rice'], 'user_location': {'state': 5}})
+    queries.append({'ingredients': ['rice'], 'user_location': {'region': None}})
+    queries.append({'ingredients': ['rice'], 'quiz_preferences': {'cuisine': ['Kerala']}})
+
+    results = recommender.get_batch_recommendations(queries)
+    assert [r['status'] for r in results] == ['success', 'error', 'success', 'success'] + ['error'] * 4
+    assert [r['message'] for r in results[-3:]] == [
+        "'user_location.state' must be a string",
+        "'user_location.region' must be a string",
+        "'quiz_preferences.cuisine' must be a string"
+    ]
+
+    successes = [r for r in results if r['status'] == 'success']
+    for query, result in zip(QUERIES, successes):
+        assert ranking(result['recommendations']) == ranking(recommender.get_recommendations(**query))
+
+
+def test_recommend_endpoint_validates_like_batch_queries():
+    import app
+
+    client = app.app.test_client()
+    for payload, message in [
+        ({'ingredients': 'rice'}, "'ingredients' must be a list of strings"),
+        ({'ingredient_ids': 'rice'}, "'ingredient_ids' must be a list of strings"),
+        ({'ingredients': ['rice'], 'top_k': 'abc'}, "'top_k' must be a non-negative integer"),
+        ({'ingredients': ['rice'], 'top_k': None}, "'top_k' must be a non-negative integer"),
+        ({'ingredients': ['rice'], 'quiz_preferences': ['Vegan']}, "'quiz_preferences' must be an object"),
+        ({'ingredients': ['rice'], 'user_location': {'state': None}}, "'user_location.state' must be a string"),
+        ({'ingredients': ['rice'], 'filters': ['Veg']}, "'filters' must be an object"),
+        ({'leftovers': []}, "At least one ingredient or leftover must be selected"),
+        (['rice'], "Query must be an object")
+    ]:
+        response = client.post('/recommend', json=payload)
+        assert response.status_code == 400, payload
+        assert response.get_json() == {'status': 'error', 'message': message}
+
+    response = client.post('/recommend', json={'ingredients': ['rice'], 'top_k': 500})
+    assert response.status_code == 200 and response.get_json()['count'] <= 100
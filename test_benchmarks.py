@@ -0,0 +1,50 @@
+import os
+import sys
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from catalog import load_catalog
+from bench_recommend import compare, make_queries, run_size
+from synthetic_catalog import CatalogProfile, generate, ingredient_name
+
+# Recipe interface fields always present; state, region and cuisine are missing as often as in the catalog
+RECIPE_FIELDS = {
+    'id', 'title', 'image', 'cookingTime', 'spiceLevel', 'effort', 'mealType', 'dietType',
+    'ingredients', 'steps', 'calories', 'macros', 'culturalFact', 'substitutions', 'isOfflineAvailable', 'tags',
+    'prepTime', 'servings', 'difficulty'
+}
+
+
+def test_synthetic_catalog_follows_recipe_schema_and_catalog_distributions():
+    profile = CatalogProfile.from_catalog()
+    recipes = list(generate(2000, seed=3, profile=profile))
+
+    assert recipes == list(generate(2000, seed=3, profile=profile))
+    assert len({recipe['id'] for recipe in recipes}) == len(recipes)
+    for recipe in recipes:
+        assert RECIPE_FIELDS <= set(recipe)
+        assert recipe['ingredients'] and all(isinstance(line, str) for line in recipe['ingredients'])
+
+    # State, region and cuisine come from one catalog recipe; the most common state stays the most common
+    locations = set(profile.locations[0])
+    assert all((r.get('state'), r.get('region'), r.get('cuisine')) in locations for r in recipes)
+    catalog_states = Counter(recipe.get('state') for recipe in load_catalog().recipes)
+    assert Counter(recipe.get('state') for recipe in recipes).most_common(1)[0][0] == catalog_states.most_common(1)[0][0]
+    assert ingredient_name('1 kg Basmati rice') == 'Basmati rice'
+    assert ingredient_name('Fresh mint leaves') == 'Fresh mint leaves'
+
+
+def test_benchmark_stages_and_regression_check():
+    profile = CatalogProfile.from_catalog()
+    queries = make_queries(profile, 3)
+    stages = run_size(200, profile, queries, max_seconds=0.01)
+
+    assert set(stages) == {'generate', 'fit', 'warmup', 'recommend', 'recommend_json', 'match_score'}
+    assert stages['fit']['peak_bytes'] > 0
+    assert stages['recommend']['runs'] >= 3 and stages['recommend']['p95_ms'] >= stages['recommend']['p50_ms']
+
+    baseline = {'results': {'200': stages}}
+    assert compare(baseline, baseline, tolerance=0.2) == []
+    slower = {'results': {'200': dict(stages, fit=dict(stages['fit'], seconds=stages['fit']['seconds'] * 2))}}
+    assert [line.split(':')[0] for line in compare(slower, baseline, tolerance=0.2)] == ['200 recipes, fit.seconds']
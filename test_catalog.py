@@ -0,0 +1,78 @@
+import json
+
+import catalog
+
+
+SOURCE = """
+// Sample data
+export interface Recipe { id: string; }
+
+export const mockRecipes: Recipe[] = [
+  {
+    id: '1',
+    title: 'Chef\\'s "Special"',
+    ingredients: ['Rice', `Dal`, "Ghee"], /* trailing comma below */
+    macros: { protein: 12, carbs: 40.5, fat: -1 },
+    substitutions: { 'ghee': 'oil' },
+    isFestive: true,
+  },
+  { id: '2', title: 'Plain', ingredients: [], festival: null },
+];
+
+export const leftoverRecipes = [
+  { id: 'lr1', title: 'Roti Chips', ingredients: ['Leftover rotis'], time: 10 }
+];
+
+export const commonIngredients = [{ name: 'Rice', category: 'Grains' }];
+export const indianStates = [];
+export const mockCategories = [];
+export const regionalCategories = [];
+export const getRandomRecipe = () => mockRecipes[0];
+"""
+
+
+def test_compiled_catalog_round_trips_the_typescript_literals(tmp_path):
+    source_path = tmp_path / 'mockData.ts'
+    source_path.write_text(SOURCE, encoding='utf-8')
+    catalog_path = tmp_path / 'catalog.json'
+
+    document = catalog.build_catalog(str(source_path), str(catalog_path))
+    loaded = catalog.load_catalog(str(catalog_path), str(source_path))
+
+    assert loaded.version == document['catalog_version']
+    assert loaded.collections['mockRecipes'] == [
+        {
+            'id': '1',
+            'title': 'Chef\'s "Special"',
+            'ingredients': ['Rice', 'Dal', 'Ghee'],
+            'macros': {'protein': 12, 'carbs': 40.5, 'fat': -1},
+            'substitutions': {'ghee': 'oil'},
+            'isFestive': True
+        },
+        {'id': '2', 'title': 'Plain', 'ingredients': [], 'festival': None}
+    ]
+    # Leftover recipes are served with a cookingTime taken from 'time'
+    assert loaded.recipes[-1]['cookingTime'] == 10
+    # Every string is stored once in the string table
+    strings = json.loads(catalog_path.read_text(encoding='utf-8'))['strings']
+    assert len(strings) == len(set(strings))
+
+
+def test_stale_artifact_is_recompiled(tmp_path):
+    source_path = tmp_path / 'mockData.ts'
+    source_path.write_text(SOURCE, encoding='utf-8')
+    catalog_path = tmp_path / 'catalog.json'
+    catalog.build_catalog(str(source_path), str(catalog_path))
+
+    source_path.write_text(SOURCE.replace("title: 'Plain'", "title: 'Updated'"), encoding='utf-8')
+    document = json.loads(catalog_path.read_text(encoding='utf-8'))
+    assert catalog.is_stale(document, str(source_path))
+
+    loaded = catalog.load_catalog(str(catalog_path), str(source_path))
+    assert loaded.collections['mockRecipes'][1]['title'] == 'Updated'
+    assert loaded.version != document['catalog_version']
+
+
+def test_checked_in_artifact_is_up_to_date():
+    with open(catalog.CATALOG_PATH, 'r', encoding='utf-8') as f:
+        assert not catalog.is_stale(json.load(f))
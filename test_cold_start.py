@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog, ranking
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds the serving process may spend importing the API and loading a saved
+# artifact; raise it with COOKWISE_IMPORT_BUDGET on slow machines, not in code
+IMPORT_BUDGET = float(os.environ.get('COOKWISE_IMPORT_BUDGET', 1.0))
+
+# Imports the API the way a serverless cold start does and reports what it cost
+SERVE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, 'api')
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'initialized': app.recommender is not None and app.recommender.index is not None,
+    'recommendations': len(app.recommender.get_recommendations(selected_ingredients=['rice'], top_k=5)),
+    'heavy_modules': sorted({name.split('.')[0] for name in sys.modules} & {'sklearn', 'pandas'})
+}))
+"""
+
+
+def test_serving_from_a_built_artifact_skips_sklearn_and_pandas(tmp_path):
+    path = str(tmp_path / 'model')
+    subprocess.run([sys.executable, 'model_store.py', path], cwd=ROOT_DIR, check=True, capture_output=True)
+
+    env = dict(os.environ, COOKWISE_MODEL_PATH=path, COOKWISE_SERVE_ONLY='1')
+    result = subprocess.run(
+        [sys.executable, '-c', SERVE_SCRIPT], cwd=ROOT_DIR, env=env, check=True, capture_output=True, text=True
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report['initialized']
+    assert report['recommendations'] == 5
+    assert report['heavy_modules'] == []
+    assert report['seconds'] < IMPORT_BUDGET, \
+        f"serving cold start took {report['seconds']:.2f}s, over the {IMPORT_BUDGET}s budget"
+
+
+def test_loaded_artifact_rebuilds_estimators_only_for_updates(tmp_path):
+    recipes = make_catalog(30)
+    recommender = RecipeRecommender()
+    recommender.fit(recipes)
+    recommender.save_model(str(tmp_path / 'model'))
+
+    restored = RecipeRecommender()
+    restored.load_model(str(tmp_path / 'model'))
+    assert restored.index.tfidf_vectorizer._estimator is None
+
+    # A loaded index saves again without rebuilding anything
+    restored.save_model(str(tmp_path / 'copy'))
+    assert restored.index.tfidf_vectorizer._estimator is None
+
+    extra = [dict(make_catalog(31, seed=3)[30], id='new-1')]
+    recommender.add_recipes(extra)
+    restored.add_recipes(extra)
+    assert (restored.index.recipe_embeddings != recommender.index.recipe_embeddings).nnz == 0
+    for query in QUERIES:
+        assert ranking(restored.get_recommendations(**query)) == ranking(recommender.get_recommendations(**query))
@@ -0,0 +1,133 @@
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from flask import Flask, jsonify
+
+import debug_endpoints
+from debug_endpoints import SamplingProfiler, deep_sizeof, install, memory_report
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def make_app(enabled):
+    app = Flask(__name__)
+    payload = {'weights': np.zeros(1000), 'names': ['dal', 'rice']}
+
+    @app.route('/recommend', methods=['POST'])
+    def recommend():
+        busy(0.02)
+        return jsonify({"status": "success"})
+
+    @app.route('/health')
+    def health():
+        return jsonify({"status": "healthy"})
+
+    profiler = install(app, lambda: {'payload': payload, 'not_built': None}, enabled=enabled)
+    return app, profiler
+
+
+def test_deep_sizeof_counts_shared_and_mapped_buffers_once(tmp_path):
+    base = np.zeros(1000)
+    heap, mapped = deep_sizeof({'a': base, 'view': base[:10], 'again': base})
+    assert mapped == 0 and base.nbytes <= heap < base.nbytes + 2000
+
+    path = str(tmp_path / 'array.npy')
+    np.save(path, np.ones(5000))
+    heap, mapped = deep_sizeof([np.load(path, mmap_mode='r')])
+    assert mapped == 5000 * 8 and heap < 1000
+
+    report = memory_report({'base': base, 'missing': None}, top=3)
+    assert report['components']['missing'] is None
+    assert report['components']['base']['bytes'] >= base.nbytes
+    assert report['process']['peak_rss_bytes'] > 0
+
+
+def test_endpoints_absent_unless_enabled(monkeypatch):
+    monkeypatch.setattr(debug_endpoints, 'ENABLED', False)
+    app, profiler = make_app(None)
+    client = app.test_client()
+    assert profiler is None
+    assert client.get('/debug/memory').status_code == 404
+    assert client.post('/debug/profile', json={'requests': 1}).status_code == 404
+
+
+def test_profile_of_next_requests_as_collapsed_stacks():
+    app, profiler = make_app(True)
+    client = app.test_client()
+
+    memory = client.get('/debug/memory?top=5').get_json()
+    assert memory['tracemalloc']['tracing'] and len(memory['tracemalloc']['top']) <= 5
+    assert memory['components']['payload']['bytes'] >= 8000
+    assert client.get('/debug/memory?top=x').status_code == 400
+
+    assert client.get('/debug/profile').status_code == 404
+    assert client.post('/debug/profile', json={'requests': 0}).status_code == 400
+    assert client.post('/debug/profile', json={'requests': 3, 'interval_ms': 1}).status_code == 202
+    assert client.post('/debug/profile', json={'requests': 3}).status_code == 409
+
+    # Only /recommend requests count towards the profile
+    client.get('/health')
+    for _ in range(2):
+        client.post('/recommend', json={})
+    assert client.get('/debug/profile').get_json() == {'status': 'running', 'remaining': 1}
+    client.post('/recommend', json={})
+
+    response = client.get('/debug/profile')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename=profile.collapsed'
+    lines = response.get_data(as_text=True).splitlines()
+    assert int(response.headers['X-Profile-Samples']) == sum(int(line.rsplit(' ', 1)[1]) for line in lines) > 0
+    assert any('test_debug_endpoints.py:busy' in line for line in lines)
+
+    # A finished profile can be replaced by a new one
+    assert client.post('/debug/profile', json={'requests': 1}).status_code == 202
+    tracemalloc.stop()
+
+
+def test_sampler_ignores_requests_beyond_the_profile():
+    profiler = SamplingProfiler()
+    profiler.arm(1, 0.001)
+    assert profiler.enter()
+    assert not profiler.enter()
+    profiler.exit()
+    assert not profiler.running and profiler.remaining == 0
+
+
+def test_simple_app_does_not_load_numpy():
+    # The Vercel app needs only Flask; the debug endpoints must not add numpy to its cold start
+    api_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api')
+    for flag in ('0', '1'):
+        result = subprocess.run(
+            [sys.executable, '-c', 'import sys, simple_app; print("numpy" in sys.modules)'],
+            cwd=api_dir, env=dict(os.environ, COOKWISE_DEBUG_ENDPOINTS=flag), capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == 'False'
+
+
+def test_simple_app_caps_results_like_scoring():
+    import scoring
+    import simple_app
+
+    assert simple_app.MAX_TOP_K == scoring.MAX_TOP_K
+
+
+def test_app_memory_report_lists_index_components():
+    import app
+
+    report = memory_report(app.memory_components(), 5, app.memory_lru_caches())
+    components = report['components']
+    assert components['recipe_embeddings']['bytes'] + components['recipe_embeddings']['mapped_bytes'] > 0
+    assert components['dataframe']['bytes'] > 0
+    assert {'neighbors', 'fragments', 'response_cache'} <= set(components)
+    assert report['lru_caches']['normalize_ingredient']['maxsize'] == 65536
@@ -0,0 +1,89 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+from filters import FACET_KEYS, filter_signature, parse_filter_args
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+
+def test_hard_filters_score_only_matching_recipes():
+    recipes = make_catalog(80)
+    recommender = RecipeRecommender()
+    recommender.fit(recipes)
+    query = dict(QUERIES[0], top_k=100)
+    full = recommender.get_recommendations(**query)
+
+    cases = [
+        ({'dietType': 'Vegetarian'}, lambda r: 'Veg' in r['dietType']),
+        ({'mealType': ['lunch', 'Dinner'], 'spiceLevel': 'Mild'},
+         lambda r: r['mealType'] in ('Lunch', 'Dinner') and r['spiceLevel'] == 'Mild'),
+        ({'region': 'South', 'isHealthy': True}, lambda r: r['region'] == 'South' and r['isHealthy']),
+        ({'cookingTime': ['Quick', 'long']}, lambda r: r['cookingTime'] <= 30 or r['cookingTime'] > 60),
+        ({'maxCookingTime': 45, 'dietType': ['Vegan', 'Non-Veg']},
+         lambda r: r['cookingTime'] <= 45 and ('Vegan' in r['dietType'] or 'Non-Veg' in r['dietType'])),
+        ({'region': 'Atlantis'}, lambda r: False)
+    ]
+    for filters, keep in cases:
+        filtered = recommender.get_recommendations(**query, filters=filters)
+        assert filtered == [r for r in full if keep(r)], filters
+
+    top = recommender.get_recommendations(**dict(query, top_k=3), filters={'dietType': 'Non-Veg'})
+    assert top == [r for r in full if 'Non-Veg' in r['dietType']][:3]
+
+    with pytest.raises(ValueError):
+        recommender.get_recommendations(**query, filters={'calories': 300})
+    with pytest.raises(ValueError):
+        recommender.get_recommendations(**query, filters={'isHealthy': 'yes'})
+    for minutes in (float('nan'), float('inf'), -5, True, '30'):
+        with pytest.raises(ValueError, match="'maxCookingTime' must be a number of minutes"):
+            recommender.get_recommendations(**query, filters={'maxCookingTime': minutes})
+
+
+def test_facet_counts_match_filtered_recipes():
+    recipes = make_catalog(90)
+    index = RecipeRecommender().fit(recipes)
+
+    for filters in [{}, {'dietType': 'Veg'}, {'mealType': ['Lunch', 'dinner'], 'maxCookingTime': 45},
+                    {'isHealthy': False, 'region': 'South'}]:
+        rows = index.filters.candidates(filters)
+        result = index.filters.facets(filters)
+        assert result['total'] == len(rows)
+        for key in FACET_KEYS:
+            expected = Counter()
+            for row in rows.tolist():
+                recipe = recipes[row]
+                if key == 'cookingTime':
+                    minutes = recipe['cookingTime']
+                    expected['Quick' if minutes <= 30 else 'Medium' if minutes <= 60 else 'Long'] += 1
+                else:
+                    value = recipe[key]
+                    expected.update(value if isinstance(value, list) else [value])
+            assert {f['value']: f['count'] for f in result['facets'][key]} == dict(expected), (filters, key)
+            counts = [f['count'] for f in result['facets'][key]]
+            assert counts == sorted(counts, reverse=True)
+
+    args = parse_filter_args({'dietType': 'Vegan, veg', 'isHealthy': 'true', 'maxCookingTime': '30', 'q': 'x'})
+    assert args == {'dietType': ['Vegan', 'veg'], 'isHealthy': True, 'maxCookingTime': 30.0}
+    assert filter_signature(args) == filter_signature(
+        {'maxCookingTime': 30.0, 'isHealthy': True, 'dietType': ['VEG', 'vegan']}
+    )
+    for raw in ('nan', 'inf', '-1', 'soon'):
+        with pytest.raises(ValueError, match="'maxCookingTime' must be a number of minutes"):
+            parse_filter_args({'maxCookingTime': raw})
+
+
+def test_facets_endpoint_rejects_empty_filter_values():
+    import app
+
+    client = app.app.test_client()
+    for query in ('dietType=', 'dietType=,', 'mealType=%20,%20'):
+        response = client.get(f'/facets?{query}')
+        assert response.status_code == 400, query
+        assert response.get_json()['status'] == 'error'
+    assert client.get('/facets?maxCookingTime=nan').status_code == 400
+    assert client.get('/facets?dietType=Veg').status_code == 200
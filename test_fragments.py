@@ -0,0 +1,20 @@
+import json
+
+from fragments import splice
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog
+
+
+def test_json_fragments_match_recommendation_dicts():
+    recipes = make_catalog(40)
+    recommender = RecipeRecommender()
+    recommender.fit(recipes)
+    for query in QUERIES:
+        for filters in (None, {'dietType': 'Veg'}):
+            text, count = recommender.get_recommendations_json(**query, filters=filters)
+            expected = recommender.get_recommendations(**query, filters=filters)
+            assert json.loads(text) == expected and count == len(expected)
+
+    assert splice('{}', {'a': 1}) == '{"a":1}'
+    assert json.loads(splice('{"a":1}', {'a': 2}, raw={'b': '[1,2]'})) == {'a': 2, 'b': [1, 2]}
+    assert splice('{"a":1}') == '{"a":1}'
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog, ranking
+
+
+def test_incremental_updates_match_a_full_refit():
+    recipes = make_catalog(40)
+    extra = make_catalog(46, seed=9)[40:]
+    for recipe in extra:
+        recipe['id'] = f"new-{recipe['id']}"
+    extra[0]['ingredients'] = ['jackfruit', 'Rice']
+    extra[1]['cuisine'] = 'Kashmiri'
+    changed = dict(recipes[5], ingredients=['paneer', 'saffron'], state='Kerala', region='South')
+
+    recommender = RecipeRecommender(feature_dtype='int8')
+    recommender.fit(recipes)
+    old_index = recommender.index
+    old_results = [ranking(recommender.get_recommendations(**query)) for query in QUERIES]
+
+    recommender.add_recipes(extra)
+    recommender.update_recipes([changed])
+    index = recommender.remove_recipes(['3', 'new-42'])
+
+    expected_recipes = [changed if r['id'] == '6' else r for r in recipes + extra if r['id'] not in ('3', 'new-42')]
+    assert [r['id'] for r in index.recipes] == [r['id'] for r in expected_recipes]
+    reference = RecipeRecommender().fit(expected_recipes)
+    assert index.version == reference.version
+    for selected in (['jackfruit'], ['saffron', 'rice'], ['ri'], ['leftover paneer curry']):
+        assert (index.ingredient_index.similarity_matrix([selected]).tolist()
+                == reference.ingredient_index.similarity_matrix([selected]).tolist())
+
+    refitted = RecipeRecommender()
+    refitted.fit(expected_recipes)
+    for query in QUERIES + [dict(QUERIES[0], quiz_preferences={'cuisine': 'kashmiri'})]:
+        assert ranking(recommender.get_recommendations(**query)) == ranking(refitted.get_recommendations(**query))
+
+    # Unchanged rows keep their embeddings; fresh rows use the fixed vocabulary
+    assert (index.recipe_embeddings[0] != old_index.recipe_embeddings[0]).nnz == 0
+    fresh_row = index.tfidf_vectorizer.transform(recommender._prepare_frame([extra[0]])['combined_text'])
+    assert abs(index.recipe_embeddings[len(recipes) - 1] - fresh_row).max() < 1e-6
+    assert index.tfidf_vectorizer is old_index.tfidf_vectorizer
+    assert index.numeric_features.values.dtype == np.int8
+    assert index.numeric_features.shape[0] == len(expected_recipes)
+
+    # The previous snapshot is untouched for requests still holding it
+    assert len(old_index) == len(recipes)
+    reader = RecipeRecommender()
+    reader.index = old_index
+    for query, expected in zip(QUERIES, old_results):
+        assert ranking(reader.get_recommendations(**query)) == expected
+
+
+def test_invalid_incremental_updates_are_rejected_and_refit_resets():
+    recommender = RecipeRecommender()
+    index = recommender.fit(make_catalog(10))
+    with pytest.raises(ValueError):
+        recommender.add_recipes([make_catalog(1)[0]])
+    with pytest.raises(ValueError):
+        recommender.update_recipes([dict(make_catalog(1)[0], id='missing')])
+    with pytest.raises(ValueError):
+        recommender.remove_recipes(['missing'])
+    assert recommender.index is index
+
+    recommender.add_recipes([dict(make_catalog(1)[0], id='11', title='Jackfruit biryani')])
+    assert 'jackfruit' not in recommender.index.tfidf_vectorizer.vocabulary_
+    refitted = recommender.refit()
+    assert recommender.index is refitted and len(refitted) == 11
+    assert 'jackfruit' in refitted.tfidf_vectorizer.vocabulary_
+    assert recommender._changes_since_fit == 0
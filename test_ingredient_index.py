@@ -0,0 +1,44 @@
+import numpy as np
+
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import INGREDIENTS, make_catalog
+from recipe_index import IngredientIndex
+
+
+def test_ingredient_index_matches_scalar_semantics():
+    recipes = make_catalog(40)
+    recipes[0]['ingredients'] = []
+    recipes[1]['ingredients'] = ['Rice ', 'Green chillies']
+    recipes[2]['ingredients'] = ['Licorice', 'Boiled eggs', 'Atta', 'Curd']
+    index = RecipeRecommender().fit(recipes)
+    scorer = RecipeRecommender()
+
+    queries = [
+        ['rice'], ['RICE', 'dal'], ['basmati rice and dal'], ['ch'], [''], ['  '],
+        ['curry leaves', 'coconut', 'unknown'], ['leftover chicken curry'], [],
+        ['oil', 'egg'], ['whole wheat flour', 'yogurt'], ['green chilli', 'tomatoes']
+    ]
+    for selected in queries:
+        similarities = index.ingredient_index.similarity_matrix([selected])[0]
+        for recipe, got in zip(recipes, similarities):
+            expected = scorer.calculate_ingredient_similarity(selected, recipe['ingredients'])
+            assert got == expected, (selected, recipe['ingredients'])
+
+
+def test_token_row_cache_is_bounded_by_bytes():
+    recipes = make_catalog(200)
+    index = IngredientIndex([recipe['ingredients'] for recipe in recipes], token_cache_bytes=2000)
+    scorer = RecipeRecommender()
+    for token in INGREDIENTS + ['rice']:
+        assert index.token_rows(token).tolist() == [
+            row for row, recipe in enumerate(recipes)
+            if scorer.calculate_ingredient_similarity([token], recipe['ingredients']) > 0
+        ]
+    index.token_rows('coconut')
+    info = index._token_rows.cache_info()
+    assert info.bytes <= 2000 and 0 < info.currsize < len(INGREDIENTS) and info.hits == 1
+
+    # Scoring a subset of rows matches the same rows of the full matrix
+    rows = np.array([3, 8, 40, 41, 199])
+    full = index.similarity_matrix([['rice', 'dal'], ['coconut']])
+    assert index.similarity_matrix([['rice', 'dal'], ['coconut']], rows=rows).tolist() == full[:, rows].tolist()
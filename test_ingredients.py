@@ -0,0 +1,127 @@
+from catalog import load_catalog
+from ingredient_matcher import IngredientMatcher, normalize_ingredient, words_match
+from ingredients import IngredientVocabulary, canonical_ingredients, ingredient_aliases, ingredient_names
+from ml_recipe_recommender import RecipeRecommender
+
+
+def test_canonical_ingredients_strip_quantities_and_preparation():
+    assert ingredient_names('1 cup Onions, chopped') == ['onions']
+    assert ingredient_names('1/2 tsp Salt') == ['salt']
+    assert ingredient_names('500g Fish pieces') == ['fish']
+    assert ingredient_names('1 kg Basmati rice') == ['basmati rice']
+    assert ingredient_names('2 cups Gram flour (besan)') == ['gram flour']
+    assert ingredient_names('4 Potatoes, boiled and mashed') == ['potatoes']
+    assert ingredient_names('Salt to taste') == ['salt']
+    assert ingredient_names('For tempering: Oil, mustard seeds, curry leaves') == [
+        'oil', 'mustard seeds', 'curry leaves'
+    ]
+    assert ingredient_names('  ') == []
+    assert ingredient_aliases('Maida (Refined Flour)') == ['refined flour']
+
+    # Ids are the normalized names, so spellings and synonyms share one id
+    assert canonical_ingredients('For tempering: Oil, mustard seeds, curry leaves') == [
+        'oil', 'mustard seed', 'curry leaf'
+    ]
+    assert canonical_ingredients('Curd, yoghurt') == ['yogurt']
+    assert canonical_ingredients('Green chillies') == canonical_ingredients('green chili') == ['green chili']
+
+
+def test_suggestions_match_word_prefixes_ranked_by_recipe_count():
+    vocabulary = IngredientVocabulary(
+        {'green chili': 25, 'chana dal': 9, 'chicken': 6, 'toor dal': 11, 'yogurt': 4},
+        [{'name': 'Maida (Refined Flour)', 'category': 'Grains'}, {'name': 'Chicken', 'category': 'Proteins'},
+         {'name': 'Green Chillies', 'category': 'Vegetables'}, {'name': 'Green Chili', 'category': 'Spices'}],
+        {'green chili': ['green chilies'], 'yogurt': ['curd', 'yogurt']}
+    )
+    assert [s['id'] for s in vocabulary.suggest('ch')] == ['green chili', 'chana dal', 'chicken']
+    assert [s['id'] for s in vocabulary.suggest('dal', limit=1)] == ['toor dal']
+    # Curated spellings of one id merge into a single suggestion; the first gives its name
+    assert vocabulary.suggest('chil') == [
+        {'id': 'green chili', 'name': 'Green Chillies', 'category': 'Vegetables', 'recipes': 25}
+    ]
+    # Curated ingredients no recipe uses are not suggested
+    assert vocabulary.suggest('refined') == [] and vocabulary.suggest('maida') == []
+    assert vocabulary.suggest('chicken')[0]['category'] == 'Proteins'
+    # Names as written in recipes find their id
+    assert vocabulary.suggest('curd') == [{'id': 'yogurt', 'name': 'Curd', 'category': None, 'recipes': 4}]
+    assert [s['id'] for s in vocabulary.suggest('', limit=2)] == ['green chili', 'toor dal']
+
+
+def test_ingredient_ids_are_matched_exactly():
+    recipes = [
+        {'id': '1', 'title': 'Dal', 'ingredients': ['1 cup Toor dal', '1 tsp Salt']},
+        {'id': '2', 'title': 'Sambar', 'ingredients': ['For Sambar: Toor dal, Vegetables, Sambar powder']},
+        {'id': '3', 'title': 'Rice', 'ingredients': ['2 cups Rice', 'Leftover rice']},
+        {'id': '4', 'title': 'Kheer', 'ingredients': ['Rice flour', 'Milk']}
+    ]
+    recommender = RecipeRecommender()
+    recommender.fit(recipes, common_ingredients=[{'name': 'Toor Dal', 'category': 'Pulses'}])
+
+    by_id = {r['id']: r['matchScore'] for r in recommender.get_recommendations(ingredient_ids=['rice'], top_k=4)}
+    assert by_id == {'3': 1.0, '1': 0.0, '2': 0.0, '4': 0.0}
+    # Free text keeps whole-word semantics and mixes with ids in one denominator
+    mixed = recommender.get_recommendations(selected_ingredients=['rice'], ingredient_ids=['toor dal'], top_k=4)
+    assert {r['id']: r['matchScore'] for r in mixed} == {'1': 0.5, '2': 0.5, '3': 0.5, '4': 0.5}
+
+    assert recommender.suggest_ingredients('toor') == [
+        {'id': 'toor dal', 'name': 'Toor Dal', 'category': 'Pulses', 'recipes': 2}
+    ]
+    # Incremental updates keep the id postings current
+    recommender.add_recipes([{'id': '5', 'title': 'Khichdi', 'ingredients': ['1 cup Rice', 'Toor dal']}])
+    assert recommender.suggest_ingredients('toor')[0]['recipes'] == 3
+
+
+def test_normalization_handles_case_plurals_and_synonyms():
+    assert normalize_ingredient('  Tomatoes ') == ('tomato',)
+    assert normalize_ingredient('Green Chillies') == normalize_ingredient('green chili')
+    assert normalize_ingredient('Curry leaves') == ('curry', 'leaf')
+    assert normalize_ingredient('Mixed curries') == ('mixed', 'curry')
+    assert normalize_ingredient('Curd') == normalize_ingredient('yoghurt') == ('yogurt',)
+    assert normalize_ingredient('2 cups Atta') == ('2', 'cup', 'wheat', 'flour')
+    assert normalize_ingredient('Whole wheat flour') == ('wheat', 'flour')
+    assert normalize_ingredient('Hummus') == ('hummus',)
+    assert normalize_ingredient(' - ') == ()
+
+
+def test_matcher_is_whole_word_and_agrees_with_pairwise_matching():
+    vocabulary = [
+        'Basmati rice', 'Licorice', 'Mustard oil', 'Boiled potatoes', 'Atta', 'Curd', 'Rice flour',
+        'Green chillies', 'Chicken', 'Leftover chicken curry', 'chicken'
+    ]
+    matcher = IngredientMatcher(vocabulary)
+    names = lambda text: [matcher.vocabulary[i] for i in matcher.matches(text)]
+
+    assert names('rice') == ['Basmati rice', 'Rice flour']
+    assert names('oil') == ['Mustard oil']
+    assert names('wheat flour') == ['Atta']
+    assert names('yogurt') == ['Curd']
+    assert names('leftover chicken curry') == ['Chicken', 'Leftover chicken curry', 'chicken']
+    assert names('potato') == ['Boiled potatoes']
+    assert names('') == [] and names('unknown') == []
+
+    for text in ('rice', 'chicken curry', 'green chili', 'boiled potato', 'basmati rice with oil', 'curry'):
+        expected = [i for i, entry in enumerate(matcher.vocabulary)
+                    if words_match(normalize_ingredient(text), normalize_ingredient(entry))]
+        assert list(matcher.matches(text)) == expected, text
+
+    assert matcher.match_any('yogurt', ['Chicken', 'Curd'])
+    assert not matcher.match_any('rice', ['Licorice'])
+    # Ingredients outside the compiled vocabulary are compared directly
+    assert matcher.match_any('dahi', ['Thick curd'])
+
+
+def test_every_suggested_id_matches_catalog_recipes():
+    catalog = load_catalog()
+    recommender = RecipeRecommender()
+    recommender.fit(catalog.recipes, common_ingredients=catalog.collections.get('commonIngredients', []))
+    vocabulary = recommender.index.ingredient_vocabulary
+
+    suggestions = recommender.suggest_ingredients('', limit=len(vocabulary))
+    assert len(suggestions) == len(vocabulary) and all(s['recipes'] > 0 for s in suggestions)
+    results = recommender.get_batch_recommendations([{'ingredient_ids': [s['id']], 'top_k': 1} for s in suggestions])
+    for suggestion, result in zip(suggestions, results):
+        assert result['recommendations'][0]['matchScore'] > 0, suggestion['id']
+
+    # Spellings of one ingredient are a single suggestion
+    chili = [s['id'] for s in recommender.suggest_ingredients('chil', limit=len(vocabulary))]
+    assert len(chili) == len(set(chili)) and 'green chilies' not in chili
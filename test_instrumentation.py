@@ -0,0 +1,73 @@
+import os
+import sys
+
+import instrumentation
+from instrumentation import MetricsRegistry, REGISTRY, server_timing, stage
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+
+def timing_stages(response):
+    return [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+
+
+def test_prometheus_rendering():
+    registry = MetricsRegistry()
+    for value in (0.0004, 0.0005, 0.003, 20):
+        registry.observe('cookwise_stage_seconds', value, stage='score')
+    registry.increment('cookwise_http_requests_total', endpoint='/recommend', status='200')
+    registry.increment('cookwise_http_requests_total', endpoint='/recommend', status='200')
+    registry.increment('cookwise_recommend_cache_total', result='say "hi"\n')
+    lines = registry.render().splitlines()
+
+    assert '# TYPE cookwise_stage_seconds histogram' in lines
+    assert 'cookwise_stage_seconds_bucket{stage="score",le="0.0005"} 2' in lines
+    assert 'cookwise_stage_seconds_bucket{stage="score",le="0.005"} 3' in lines
+    assert 'cookwise_stage_seconds_bucket{stage="score",le="+Inf"} 4' in lines
+    assert 'cookwise_stage_seconds_count{stage="score"} 4' in lines
+    assert 'cookwise_http_requests_total{endpoint="/recommend",status="200"} 2' in lines
+    assert 'cookwise_recommend_cache_total{result="say \\"hi\\"\\n"} 1' in lines
+    assert server_timing({'score': 0.0012}, 0.002) == 'score;dur=1.200, total;dur=2.000'
+
+
+def test_disabled_stages_are_shared_no_ops(monkeypatch):
+    monkeypatch.setattr(instrumentation, 'ENABLED', False)
+    assert stage('score') is stage('select')
+    before = REGISTRY.histogram('cookwise_stage_seconds', stage='disabled-stage')
+    with stage('disabled-stage'):
+        pass
+    assert before is None and REGISTRY.histogram('cookwise_stage_seconds', stage='disabled-stage') is None
+
+
+def test_simple_app_server_timing_and_metrics():
+    import simple_app
+
+    client = simple_app.app.test_client()
+    response = client.post('/recommend', json={'ingredients': ['rice'], 'top_k': 3})
+    assert response.status_code == 200
+    assert timing_stages(response) == ['score', 'select', 'serialize', 'total']
+
+    metrics = client.get('/metrics')
+    assert metrics.content_type.startswith('text/plain; version=0.0.4')
+    assert REGISTRY.counter(
+        'cookwise_http_requests_total', app='simple_app', method='POST', endpoint='/recommend', status='200'
+    ) >= 1
+    assert 'cookwise_http_request_duration_seconds_bucket{app="simple_app",endpoint="/recommend"' in metrics.get_data(as_text=True)
+
+
+def test_recommender_stages_in_app_server_timing():
+    import app
+
+    client = app.app.test_client()
+    query = {'ingredients': ['paneer', 'tomato'], 'top_k': 5, 'filters': {'dietType': 'Veg'}}
+    hits = REGISTRY.counter('cookwise_recommend_cache_total', result='hit')
+
+    first = client.post('/recommend', json=query)
+    assert first.status_code == 200
+    assert timing_stages(first) == ['filter', 'ingredient_match', 'score', 'select', 'match_details', 'serialize', 'total']
+
+    # A cache hit skips every recommender stage
+    second = client.post('/recommend', json=query)
+    assert timing_stages(second) == ['serialize', 'total']
+    assert REGISTRY.counter('cookwise_recommend_cache_total', result='hit') == hits + 1
+    assert REGISTRY.histogram('cookwise_stage_seconds', stage='ingredient_match').count >= 1
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from ml_recipe_recommender import RecipeRecommender
+from model_store import ModelArtifactError, is_memory_mapped
+from recipe_fixtures import QUERIES, make_catalog, ranking
+
+
+def test_saved_model_restores_index(tmp_path):
+    recipes = make_catalog(30)
+    recommender = RecipeRecommender()
+    recommender.fit(recipes)
+    path = tmp_path / 'model'
+    recommender.save_model(str(path))
+    # Saving again replaces the artifact in place
+    recommender.save_model(str(path))
+
+    restored = RecipeRecommender()
+    restored.load_model(str(path), expected_catalog_hash=recommender.index.version)
+    query = QUERIES[0]
+    assert ranking(restored.get_recommendations(**query)) == ranking(recommender.get_recommendations(**query))
+
+    # Matrices are memory-mapped from the artifact rather than copied into the process
+    assert is_memory_mapped(restored.index.recipe_embeddings.data)
+    assert is_memory_mapped(restored.index.recipe_embeddings.indices)
+    assert is_memory_mapped(restored.index.numeric_features.values)
+    assert (restored.index.recipe_embeddings != recommender.index.recipe_embeddings).nnz == 0
+    vector = restored.tfidf_vectorizer.transform(['rice dal'])
+    assert (vector != recommender.tfidf_vectorizer.transform(['rice dal'])).nnz == 0
+
+
+def test_loading_artifact_for_another_catalog_fails(tmp_path):
+    recommender = RecipeRecommender()
+    recommender.fit(make_catalog(10))
+    recommender.save_model(str(tmp_path / 'model'))
+    with pytest.raises(ModelArtifactError):
+        RecipeRecommender().load_model(str(tmp_path / 'model'), expected_catalog_hash='0' * 16)
+
+
+def test_corrupt_artifacts_raise_model_artifact_error(tmp_path):
+    recommender = RecipeRecommender()
+    recommender.fit(make_catalog(10))
+    for name in ('meta.json', 'numeric_values.npy', 'recipes.json'):
+        path = str(tmp_path / name)
+        recommender.save_model(path)
+        target = os.path.join(path, name)
+        with open(target, 'rb') as f:
+            content = f.read()
+        # Truncated: cut in the middle of the JSON document or the array data
+        with open(target, 'wb') as f:
+            f.write(content[:len(content) // 2])
+        with pytest.raises(ModelArtifactError):
+            RecipeRecommender().load_model(path)
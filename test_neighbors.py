@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from ml_recipe_recommender import RecipeRecommender
+from model_store import is_memory_mapped
+from neighbors import NeighborTable
+from recipe_fixtures import make_catalog
+
+
+def brute_force_neighbors(embeddings, num_neighbors):
+    dense = embeddings.toarray().astype(np.float64)
+    similarities = dense @ dense.T
+    table = []
+    for row, scores in enumerate(similarities):
+        order = sorted((-scores[j], j) for j in range(len(scores)) if j != row and scores[j] > 0)
+        table.append([j for _, j in order[:num_neighbors]])
+    return table
+
+
+def neighbor_lists(table):
+    return [[j for j in row.tolist() if j >= 0] for row in table.indices]
+
+
+def test_neighbor_table_matches_brute_force_and_survives_updates(tmp_path):
+    recipes = make_catalog(60)
+    recommender = RecipeRecommender()
+    index = recommender.fit(recipes)
+    table = NeighborTable.build(index.recipe_embeddings, num_neighbors=5)
+    assert neighbor_lists(table) == brute_force_neighbors(index.recipe_embeddings, 5)
+
+    assert [r['id'] for r in recommender.similar('1', 5)] == [recipes[j]['id'] for j in table.indices[0]]
+    assert len(recommender.similar('1', 3)) == 3
+    with pytest.raises(KeyError):
+        recommender.similar('missing')
+
+    # An incrementally updated table equals one built from scratch on the new embeddings
+    extra = [dict(recipe, id=f"new-{recipe['id']}") for recipe in make_catalog(3, seed=4)]
+    recommender.add_recipes(extra)
+    recommender.update_recipes([dict(recipes[10], title='Paneer tikka', tags=['festive'])])
+    updated = recommender.remove_recipes(['2', '30'])
+    rebuilt = NeighborTable.build(updated.recipe_embeddings)
+    assert neighbor_lists(updated.neighbors) == neighbor_lists(rebuilt)
+    assert np.allclose(updated.neighbors.scores, rebuilt.scores)
+
+    # The table is persisted with the model artifact and memory-mapped on load
+    recommender.save_model(str(tmp_path / 'model'))
+    restored = RecipeRecommender()
+    restored.load_model(str(tmp_path / 'model'))
+    assert is_memory_mapped(restored.index.neighbors.indices)
+    assert restored.similar('1', 5) == recommender.similar('1', 5)
@@ -0,0 +1,70 @@
+import os
+import sys
+
+from ingredient_matcher import normalize_ingredient, words_match
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import make_catalog
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+
+def test_cook_now_matches_per_recipe_coverage():
+    recipes = make_catalog(50)
+    recipes[0]['ingredients'] = [f'spice {i}' for i in range(70)] + ['rice']
+    recipes[1]['ingredients'] = ['Rice', 'rice ', 'Curd']
+    recommender = RecipeRecommender()
+    recommender.fit(recipes)
+
+    def reference(pantry, max_missing):
+        rows = []
+        for row, recipe in enumerate(recipes):
+            lines = list(dict.fromkeys(ing.lower().strip() for ing in recipe['ingredients']))
+            covered = [line for line in lines if any(
+                words_match(normalize_ingredient(item), normalize_ingredient(line)) for item in pantry
+            )]
+            missing = len(lines) - len(covered)
+            if covered and missing <= max_missing:
+                rows.append((-len(covered) / len(lines), missing, row))
+        return [recipes[row]['id'] for _, _, row in sorted(rows)]
+
+    for pantry, max_missing in [
+        (['rice', 'onion', 'tomato', 'yogurt'], 2), (['Dal', 'spices', 'ghee', 'oil'], 0),
+        (['chicken', 'onions', 'tomatoes', 'spices', 'oil', 'green chilli'], 3), (['unknown'], 5)
+    ]:
+        results = recommender.cook_now(pantry, max_missing=max_missing, top_k=100)
+        assert [r['id'] for r in results] == reference(pantry, max_missing), pantry
+        for result in results:
+            assert result['missingCount'] == len(result['missingIngredients']) <= max_missing
+
+    # Bitsets span several words for long ingredient lists
+    assert recommender.index.pantry.num_words == 2
+    long_recipe = recommender.cook_now(['rice'], max_missing=70, top_k=100)
+    assert next(r for r in long_recipe if r['id'] == '1')['missingCount'] == 70
+    assert recommender.cook_now(['curd', 'rice'], max_missing=0)[0]['coverage'] == 1.0
+
+    # Canonical ids count like pantry items; snapshots after updates rebuild the bitsets
+    recommender.add_recipes([{'id': 'new', 'title': 'Curd rice', 'ingredients': ['2 cups Rice', 'Curd']}])
+    results = recommender.cook_now(ingredient_ids=['rice'], pantry=['curd'], max_missing=0)
+    assert {r['id'] for r in results} == {'2', 'new'}
+
+
+def test_cook_now_endpoint_rejects_malformed_queries():
+    import app
+
+    client = app.app.test_client()
+    for payload, message in [
+        ({'ingredients': 'rice'}, "'ingredients' must be a list of strings"),
+        ({'ingredients': ['rice'], 'leftovers': [1]}, "'leftovers' must be a list of strings"),
+        ({'ingredient_ids': None}, "At least one ingredient or leftover must be selected"),
+        ({'ingredients': ['rice'], 'top_k': 'ten'}, "'top_k' must be a non-negative integer"),
+        ({'ingredients': ['rice'], 'max_missing': None}, "'max_missing' must be a non-negative integer"),
+        ({'ingredients': ['rice'], 'max_missing': -1}, "'max_missing' must be a non-negative integer"),
+        (['rice'], "Query must be an object")
+    ]:
+        response = client.post('/recommend/cook-now', json=payload)
+        assert response.status_code == 400, payload
+        assert response.get_json() == {'status': 'error', 'message': message}
+
+    response = client.post('/recommend/cook-now', json={'ingredients': ['rice'], 'leftovers': None, 'max_missing': 3})
+    assert response.status_code == 200
+    assert response.get_json()['query'] == {'pantry': ['rice'], 'ingredient_ids': [], 'max_missing': 3}
@@ -0,0 +1,78 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from ml_recipe_recommender import RecipeRecommender
+from model_store import is_memory_mapped
+from preload import share_index
+from recipe_fixtures import QUERIES, make_catalog, ranking
+
+
+def answers(recommender):
+    return {
+        'recommend': [ranking(recommender.get_recommendations(**query)) for query in QUERIES],
+        'json': recommender.get_recommendations_json(**QUERIES[0])[0],
+        'similar': [r['id'] for r in recommender.similar('3', k=5)],
+        'search': [r['id'] for r in recommender.search('kerala curry', limit=5)[0]],
+        'facets': recommender.index.filters.facets({'dietType': 'Veg'})
+    }
+
+
+def test_shared_index_answers_like_the_private_one():
+    reference = RecipeRecommender()
+    reference.fit(make_catalog(60))
+    expected = answers(reference)
+
+    recommender = RecipeRecommender()
+    index = recommender.fit(make_catalog(60))
+
+    shared = share_index(index)
+    assert recommender.index is index and shared['arrays'] > 10 and shared['bytes'] > 0
+    for array in (index.recipe_embeddings.data, index.numeric_features.values, index.neighbors.indices,
+                  index.search_index.doc_ids, index.pantry.bits, index.columns.cooking_time):
+        assert is_memory_mapped(array)
+        with pytest.raises(ValueError):
+            array[...] = 0
+    assert index.filters._cooking_time is index.columns.cooking_time
+    assert answers(recommender) == expected
+
+    # Updates build a new, private index from the shared one
+    recommender.add_recipes([dict(make_catalog(1, seed=5)[0], id='new-1')])
+    assert len(recommender.index) == 61 and not is_memory_mapped(recommender.index.recipe_embeddings.data)
+
+
+def test_artifact_arrays_stay_file_mapped(tmp_path):
+    recommender = RecipeRecommender()
+    recommender.fit(make_catalog(30))
+    recommender.save_model(str(tmp_path / 'model'))
+    restored = RecipeRecommender()
+    restored.load_model(str(tmp_path / 'model'))
+    embeddings = restored.index.recipe_embeddings.data
+
+    share_index(restored.index)
+    assert restored.index.recipe_embeddings.data is embeddings
+    assert isinstance(restored.index.neighbors.indices, np.memmap)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_forked_worker_reads_the_shared_index():
+    recommender = RecipeRecommender()
+    index = recommender.fit(make_catalog(60))
+    share_index(index)
+    expected = ranking(recommender.get_recommendations(**QUERIES[1]))
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            os.write(write_fd, json.dumps(ranking(recommender.get_recommendations(**QUERIES[1]))).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as f:
+        got = json.loads(f.read())
+    os.waitpid(pid, 0)
+    assert [tuple(pair) for pair in got] == expected
@@ -0,0 +1,52 @@
+import numpy as np
+from scipy import sparse
+
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog, ranking, reference_recommendations
+
+
+def test_fitted_index_matches_per_request_path():
+    recipes = make_catalog()
+    recommender = RecipeRecommender()
+    index = recommender.fit(recipes)
+
+    for query in QUERIES:
+        expected = reference_recommendations(recipes, **query)
+        # Repeated queries must reuse the same index without refitting
+        for _ in range(2):
+            got = ranking(recommender.get_recommendations(**query))
+            assert [rid for rid, _ in got] == [rid for rid, _ in expected]
+            for (_, got_score), (_, expected_score) in zip(got, expected):
+                assert abs(got_score - expected_score) < 1e-9
+        assert recommender.index is index
+
+
+def test_passing_the_fitted_catalog_does_not_refit():
+    recipes = make_catalog(20)
+    recommender = RecipeRecommender()
+    index = recommender.fit(recipes)
+    recommender.get_recommendations(recipes, ['rice'], [])
+    assert recommender.index is index
+
+    other = make_catalog(10, seed=3)
+    recommender.get_recommendations(other, ['rice'], [])
+    assert recommender.index is not index
+    assert len(recommender.index) == 10
+
+
+def test_feature_storage_is_sparse_and_compact():
+    recipes = make_catalog(40)
+    dense = RecipeRecommender()
+    dense.fit(recipes)
+    assert sparse.issparse(dense.index.recipe_embeddings)
+    assert dense.index.numeric_features.values.dtype == np.float32
+
+    for dtype, tolerance in (('float16', 1e-2), ('int8', 5e-2)):
+        compact = RecipeRecommender(feature_dtype=dtype)
+        compact.fit(recipes)
+        numeric = compact.index.numeric_features
+        assert numeric.values.dtype == np.dtype(dtype)
+        reference = dense.index.numeric_features.to_float32()
+        span = reference.max(axis=0) - reference.min(axis=0) + 1
+        assert np.all(np.abs(numeric.to_float32() - reference) <= tolerance * span)
+        assert compact.index.recipe_features.shape == dense.index.recipe_features.shape
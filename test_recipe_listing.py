@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+from recipe_listing import LIST_VIEW_FIELDS, encode_cursor
+from simple_app import app, RECIPES_DATABASE, CATALOG_VERSION
+
+
+def test_cursor_pages_cover_the_catalog_once():
+    client = app.test_client()
+    ids, cursor = [], None
+    while True:
+        url = '/recipes?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        assert body['total'] == len(RECIPES_DATABASE) and body['count'] <= 3
+        ids.extend(recipe['id'] for recipe in body['recipes'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert ids == [recipe['id'] for recipe in RECIPES_DATABASE]
+
+
+def test_projection_and_ndjson_streaming():
+    client = app.test_client()
+    recipes = client.get('/recipes?fields=list').get_json()['recipes']
+    assert all(set(recipe) == set(LIST_VIEW_FIELDS) for recipe in recipes)
+    assert client.get('/recipes?fields=title&limit=1').get_json()['recipes'] == [
+        {'id': RECIPES_DATABASE[0]['id'], 'title': RECIPES_DATABASE[0]['title']}
+    ]
+
+    response = client.get('/recipes?fields=id,rating', headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [{'id': r['id'], 'rating': r['rating']} for r in RECIPES_DATABASE]
+    assert len(client.get('/recipes?format=ndjson&limit=2').get_data(as_text=True).splitlines()) == 2
+
+
+def test_etags_and_cursor_errors():
+    client = app.test_client()
+    response = client.get('/recipes?fields=list')
+    etag = response.headers['ETag']
+    assert etag.strip('"').startswith(CATALOG_VERSION)
+    assert client.get('/recipes?fields=list', headers={'If-None-Match': etag}).status_code == 304
+    # Another projection or page is another representation
+    assert client.get('/recipes', headers={'If-None-Match': etag}).status_code == 200
+
+    stale = encode_cursor('0' * 16, 3)
+    assert client.get(f'/recipes?cursor={stale}').status_code == 410
+    assert client.get('/recipes?cursor=not-a-cursor').status_code == 400
+    assert client.get('/recipes?limit=0').status_code == 400
@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+
+from flask import Flask, jsonify, request
+
+from request_log import RequestLogger, install
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from replay import app_sender, load_entries, replay
+
+
+def read_lines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def make_app(logger):
+    app = Flask(__name__)
+
+    @app.route('/recommend', methods=['POST'])
+    def recommend():
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"status": "error"}), 400
+        if data.get('fail'):
+            return jsonify({"status": "error"}), 500
+        return jsonify({"status": "success", "count": len(data.get('ingredients', []))})
+
+    @app.route('/health')
+    def health():
+        return jsonify({"status": "healthy"})
+
+    install(app, logger)
+    return app
+
+
+def test_logger_records_sampled_requests_and_rotates(tmp_path):
+    path = str(tmp_path / 'logs' / 'requests.jsonl')
+    logger = RequestLogger(path, max_bytes=600, backup_count=2, flush_interval=0.01)
+    client = make_app(logger).test_client()
+    for i in range(12):
+        client.post('/recommend?top_k=5', json={'ingredients': ['rice'] * i})
+        # One write per request, so rotation points do not depend on batching
+        logger.flush()
+    client.get('/health')
+    logger.flush()
+
+    logged = [entry for name in (f'{path}.2', f'{path}.1', path) if os.path.exists(name) for entry in read_lines(name)]
+    assert logger.stats()['rotations'] >= 2 and not os.path.exists(f'{path}.3')
+    assert {entry['path'] for entry in logged} == {'/recommend'}
+    assert logged[-1]['body'] == {'ingredients': ['rice'] * 11}
+    assert logged[-1]['query'] == 'top_k=5' and logged[-1]['status'] == 200 and logged[-1]['duration_ms'] >= 0
+    assert [len(entry['body']['ingredients']) for entry in logged] == list(range(12 - len(logged), 12))
+    logger.close()
+
+    sampled = RequestLogger(str(tmp_path / 'sampled.jsonl'), sample_rate=0.25, seed=1, flush_interval=0.01)
+    client = make_app(sampled).test_client()
+    for _ in range(400):
+        client.post('/recommend', json={'ingredients': ['dal']})
+    sampled.close()
+    stats = sampled.stats()
+    assert stats['written'] + stats['sampled_out'] == 400
+    assert 60 < stats['written'] < 140
+    assert len(read_lines(str(tmp_path / 'sampled.jsonl'))) == stats['written']
+
+
+def test_logging_is_off_unless_enabled(monkeypatch, tmp_path):
+    monkeypatch.delenv('COOKWISE_REQUEST_LOG', raising=False)
+    assert RequestLogger.from_env() is None
+    monkeypatch.setenv('COOKWISE_REQUEST_LOG', str(tmp_path / 'r.jsonl'))
+    monkeypatch.setenv('COOKWISE_REQUEST_LOG_SAMPLE', '0.5')
+    logger = RequestLogger.from_env()
+    assert logger.path == str(tmp_path / 'r.jsonl') and logger.sample_rate == 0.5
+    logger.close()
+
+
+def test_replay_reports_latency_errors_and_throughput(tmp_path):
+    path = tmp_path / 'requests.jsonl'
+    entries = [{'ts': i, 'method': 'POST', 'path': '/recommend', 'query': '', 'body': {'ingredients': ['rice']}}
+               for i in range(20)]
+    entries[3]['body'] = {'fail': True}
+    entries[4]['body'] = None
+    path.write_text(''.join(json.dumps(entry) + '\n' for entry in entries) + 'not json\n')
+
+    loaded = load_entries([str(path)])
+    assert len(loaded) == 20
+    report = replay(loaded, app_sender(make_app(None)), concurrency=3, rate=400)
+    assert report['requests'] == 20
+    assert report['by_status'] == {'200': 18, '500': 1, '400': 1}
+    assert report['errors'] == 1 and report['error_rate'] == 0.05
+    assert report['p50_ms'] <= report['p95_ms'] <= report['p99_ms'] <= report['max_ms']
+    assert report['throughput_rps'] > 0
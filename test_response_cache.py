@@ -0,0 +1,41 @@
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog
+from response_cache import ResponseCache, recommendation_cache_key
+
+
+def test_response_cache_lru_ttl_and_version_invalidation():
+    now = [0.0]
+    cache = ResponseCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put('a', 1, 'v1')
+    cache.put('b', 2, 'v1')
+    assert cache.get('a', 'v1') == 1
+    cache.put('c', 3, 'v1')
+    # 'b' was least recently used
+    assert cache.get('b', 'v1') is None
+    assert cache.get('c', 'v1') == 3
+
+    now[0] = 11.0
+    assert cache.get('a', 'v1') is None
+    cache.put('a', 1, 'v1')
+    assert cache.get('a', 'v2') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['evictions'], stats['expirations'], stats['invalidations']) == (2, 1, 1, 1)
+
+    key = recommendation_cache_key(['Rice', ' dal'], [], {'b': 1, 'a': 2}, {'state': 'Kerala'}, 5)
+    assert key == recommendation_cache_key(['dal', 'rice'], [], {'a': 2, 'b': 1}, {'state': 'kerala'}, 5)
+    assert key != recommendation_cache_key(['dal', 'rice'], [], {}, {'state': 'kerala'}, 5)
+
+
+def test_cache_key_equivalent_queries_give_identical_recommendations():
+    recommender = RecipeRecommender()
+    recommender.fit(make_catalog(40))
+    first = dict(QUERIES[0])
+    second = dict(first, selected_ingredients=['ONION', 'rice ', 'Tomato'],
+                  user_location={'state': 'maharashtra', 'region': 'west'})
+    keys = [
+        recommendation_cache_key(q['selected_ingredients'], q['selected_leftovers'],
+                                 q['quiz_preferences'], q['user_location'], q['top_k'])
+        for q in (first, second)
+    ]
+    assert keys[0] == keys[1]
+    assert recommender.get_recommendations(**first) == recommender.get_recommendations(**second)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from ml_recipe_recommender import RecipeRecommender
+from recipe_fixtures import QUERIES, make_catalog
+from scoring import score_recipes, select_top_k
+
+
+def test_vectorized_components_match_scalar_scorers():
+    recipes = make_catalog(80, seed=11)
+    recipes[2].pop('spiceLevel')
+    recipes[3].pop('rating')
+    index = RecipeRecommender().fit(recipes)
+    scorer = RecipeRecommender()
+
+    quizzes = [
+        q['quiz_preferences'] for q in QUERIES
+    ] + [{'spiceLevel': 'Spicy', 'cookingTime': 'Medium', 'cuisine': 'south'}, {'diet': 'Vegan'}]
+    locations = [q['user_location'] for q in QUERIES] + [{'state': 'kerala'}, {'state': 'Nowhere', 'region': 'east'}]
+    for quiz, location in zip(quizzes, locations):
+        scores = score_recipes(index, ['rice'], quiz, location)
+        for i, recipe in enumerate(recipes):
+            if quiz:
+                assert scores['quiz'][i] == scorer.calculate_quiz_preference_score(quiz, recipe)
+            if location:
+                assert scores['location'][i] == scorer.calculate_location_score(location, recipe)
+
+
+def test_select_top_k_matches_stable_sort():
+    rng = np.random.default_rng(5)
+    for k in (0, 1, 3, 10, 49, 50, 80):
+        # Coarse values guarantee plenty of ties around the cut-off
+        scores = rng.integers(0, 6, size=50).astype(float) / 4
+        expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+        assert select_top_k(scores, k).tolist() == expected
@@ -0,0 +1,73 @@
+import math
+
+from search_index import SearchIndex, BM25_K1, BM25_B, tokenize, recipe_text
+
+
+TEXTS = [
+    'Paneer Butter Masala paneer rich curry North Indian Punjab',
+    'Butter Chicken creamy curry North Indian Punjab',
+    'Chicken Biryani rice festive Hyderabadi Telangana',
+    'Palak Paneer spinach healthy North Indian',
+    'Masala Dosa crispy South Indian Karnataka',
+    'Pav Bhaji street food Maharashtra'
+]
+
+
+def reference_bm25(texts, tokens):
+    """Textbook BM25 summed over the query tokens"""
+    docs = [tokenize(text) for text in texts]
+    average = sum(len(doc) for doc in docs) / len(docs)
+    scores = []
+    for doc in docs:
+        score = 0.0
+        for token in tokens:
+            freq = doc.count(token)
+            if not freq:
+                continue
+            doc_freq = sum(token in other for other in docs)
+            idf = math.log(1 + (len(docs) - doc_freq + 0.5) / (doc_freq + 0.5))
+            score += idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / average))
+        scores.append(score)
+    return scores
+
+
+def test_bm25_scores_match_reference():
+    index = SearchIndex(TEXTS)
+    for query in ('paneer', 'butter curry', 'north indian', 'biryani'):
+        expected = reference_bm25(TEXTS, tokenize(query))
+        docs, scores, total = index.search(query, limit=10, prefix=False)
+        assert total == sum(score > 0 for score in expected)
+        for doc, score in zip(docs.tolist(), scores.tolist()):
+            assert abs(score - expected[doc]) < 1e-5
+        # Every match is returned in score order when all tokens match equally
+        assert sorted(docs.tolist(), key=lambda d: -expected[d])[:1] == docs.tolist()[:1]
+
+
+def test_documents_matching_more_words_rank_first_and_pages_are_stable():
+    index = SearchIndex(TEXTS)
+    docs, _, total = index.search('paneer curry', limit=10, prefix=False)
+    assert total == 3
+    assert docs.tolist()[0] == 0
+
+    all_docs, _, total = index.search('indian', limit=10)
+    pages = [index.search('indian', limit=2, offset=offset)[0].tolist() for offset in (0, 2)]
+    assert pages[0] + pages[1] == all_docs.tolist()
+    assert index.search('indian', limit=2, offset=10)[0].tolist() == []
+
+
+def test_prefix_typeahead_and_completions():
+    index = SearchIndex(TEXTS)
+    assert index.search('chick', prefix=False)[2] == 0
+    docs, _, total = index.search('chick')
+    assert total == 2 and set(docs.tolist()) == {1, 2}
+    assert index.search('butter chi', limit=1)[0].tolist() == [1]
+
+    completions = index.complete('pa')
+    assert [c['term'] for c in completions] == ['paneer', 'palak', 'pav']
+    assert completions[0]['recipes'] == 2
+    assert index.complete('') == [] and index.complete('zz') == []
+
+
+def test_recipe_text_uses_search_fields():
+    text = recipe_text({'title': 'Dal', 'tags': ['comfort', 'quick'], 'state': 'Gujarat', 'ingredients': ['rice']})
+    assert tokenize(text) == ['dal', 'comfort', 'quick', 'gujarat']